@@ -0,0 +1,175 @@
+"""
+Wall time of the series analytics in solar_panel/utils/analytics.py against
+the same computations written as plain Python loops over lists, on a
+synthetic one-reading-per-second power series.
+
+    python benchmarks/bench_analytics.py --rows 10000000 --repeat 3
+"""
+
+import math
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from common import base_parser, measure, report
+
+# The analytics module imports the database setup, point it somewhere harmless
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="solar-panel-bench-"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from solar_panel.utils.analytics import (  # noqa: E402
+    detect_peaks,
+    load_duration_curve,
+    moving_average,
+    series_statistics,
+)
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def generate(rows: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(0)
+    timestamps = 1_700_000_000 + np.arange(rows, dtype=np.int64)
+    daily = np.sin(2 * np.pi * (timestamps % 86_400) / 86_400)
+    values = 1_000 + 800 * daily + rng.normal(0, 50, rows)
+    return timestamps, values
+
+
+####################
+# Python loops
+####################
+
+
+def loop_statistics(values: list[float], percentiles: list[float]) -> dict:
+    count = len(values)
+    total = 0.0
+    low, high = values[0], values[0]
+    for value in values:
+        total += value
+        if value < low:
+            low = value
+        if value > high:
+            high = value
+    mean = total / count
+
+    squares = 0.0
+    for value in values:
+        squares += (value - mean) ** 2
+
+    ordered = sorted(values)
+    result = {}
+    for p in percentiles:
+        # Linear interpolation between closest ranks, like np.percentile
+        rank = p / 100 * (count - 1)
+        lower = int(rank)
+        upper = min(lower + 1, count - 1)
+        result[p] = ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+    return {
+        "count": count,
+        "mean": mean,
+        "std": math.sqrt(squares / count),
+        "min": low,
+        "max": high,
+        "percentiles": result,
+    }
+
+
+def loop_load_duration_curve(
+    timestamps: list[int], values: list[float], points: int
+) -> list[dict]:
+    durations = [b - a for a, b in zip(timestamps, timestamps[1:])]
+    durations.append(sorted(durations)[len(durations) // 2])
+
+    pairs = sorted(zip(values, durations), reverse=True)
+    total = sum(durations)
+
+    curve = []
+    elapsed = 0.0
+    index = 0
+    for i in range(points):
+        fraction = i / (points - 1)
+        while index < len(pairs) - 1 and (elapsed + pairs[index][1]) / total < fraction:
+            elapsed += pairs[index][1]
+            index += 1
+        curve.append({"fraction": fraction, "value": pairs[index][0]})
+    return curve
+
+
+def loop_detect_peaks(
+    timestamps: list[int], values: list[float], threshold: float, limit: int
+) -> list[dict]:
+    peaks = []
+    for i in range(1, len(values) - 1):
+        value = values[i]
+        if value >= threshold and value > values[i - 1] and value >= values[i + 1]:
+            peaks.append((value, timestamps[i]))
+
+    peaks.sort(reverse=True)
+    return sorted(
+        ({"timestamp": t, "value": v} for v, t in peaks[:limit]),
+        key=lambda peak: peak["timestamp"],
+    )
+
+
+def loop_moving_average(
+    timestamps: list[int], values: list[float], window: int, max_points: int
+) -> list[dict]:
+    averages = []
+    total = sum(values[:window])
+    averages.append((timestamps[window - 1], total / window))
+    for i in range(window, len(values)):
+        total += values[i] - values[i - window]
+        averages.append((timestamps[i], total / window))
+
+    step = max(1, -(-len(averages) // max_points))
+    return [{"timestamp": t, "value": v} for t, v in averages[::step]]
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument("--window", type=int, default=900)
+    parser.set_defaults(repeat=3)
+    args = parser.parse_args()
+
+    timestamps, values = generate(args.rows)
+    timestamp_list, value_list = timestamps.tolist(), values.tolist()
+    threshold = float(values.mean() + 2 * values.std())
+
+    cases = {
+        "statistics": (
+            lambda: series_statistics(values, PERCENTILES),
+            lambda: loop_statistics(value_list, PERCENTILES),
+        ),
+        "load duration curve": (
+            lambda: load_duration_curve(timestamps, values, 100),
+            lambda: loop_load_duration_curve(timestamp_list, value_list, 100),
+        ),
+        "peaks": (
+            lambda: detect_peaks(timestamps, values, threshold, 10),
+            lambda: loop_detect_peaks(timestamp_list, value_list, threshold, 10),
+        ),
+        "moving average": (
+            lambda: moving_average(timestamps, values, args.window, 1000),
+            lambda: loop_moving_average(timestamp_list, value_list, args.window, 1000),
+        ),
+    }
+
+    results = {}
+    for name, (vectorized, loop) in cases.items():
+        numpy_ms = measure(vectorized, args.repeat)
+        loop_ms = measure(loop, args.repeat)
+        results[name] = {
+            "numpy ms": numpy_ms,
+            "python ms": loop_ms,
+            "speedup": loop_ms / numpy_ms,
+        }
+
+    report(f"{args.rows:,} readings", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Sustained PZEM ingest in rows/second through the create endpoint's write
+path, with readings posted by concurrent producers:
+
+- per-row commit: AsyncPzems.insert_new_pzem, one transaction per reading
+- write-behind: WriteBehindBuffer.enqueue, flushed in batches by its
+  background task; the clock stops once the buffer has been drained
+
+    python benchmarks/bench_ingest.py --rows 2000 --concurrency 32
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import base_parser, report
+
+# Import the app against a throwaway data directory
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="solar-panel-bench-"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from solar_panel.internal.db import Base, engine  # noqa: E402
+from solar_panel.models.ingest import WriteBehindBuffer  # noqa: E402
+from solar_panel.models.pzems import AsyncPzems, PzemForm  # noqa: E402
+
+
+def forms(rows: int, devices: int) -> list[PzemForm]:
+    return [
+        PzemForm(
+            device_id=i % devices + 1,
+            voltage=230.0,
+            current=1.0,
+            power=230.0,
+            energy=float(i),
+            timestamp=1_700_000_000 + i,
+        )
+        for i in range(rows)
+    ]
+
+
+async def produce(readings: list[PzemForm], concurrency: int, submit):
+    remaining = iter(readings)
+
+    async def worker():
+        for form in remaining:
+            await submit(form)
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+
+async def per_row(readings: list[PzemForm], concurrency: int) -> float:
+    start = time.perf_counter()
+    await produce(readings, concurrency, AsyncPzems.insert_new_pzem)
+    return len(readings) / (time.perf_counter() - start)
+
+
+async def write_behind(
+    readings: list[PzemForm], concurrency: int, flush_rows: int, flush_ms: int
+) -> float:
+    buffer = WriteBehindBuffer(
+        capacity=len(readings), flush_rows=flush_rows, flush_interval=flush_ms / 1000
+    )
+
+    async def submit(form):
+        buffer.enqueue("pzems", form)
+        # Let the flusher in, as request handling would
+        await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    buffer.start()
+    await produce(readings, concurrency, submit)
+    await buffer.stop()
+    elapsed = time.perf_counter() - start
+
+    metrics = buffer.get_metrics()
+    assert metrics.flushed == len(readings), metrics
+    return len(readings) / elapsed
+
+
+def main():
+    parser = base_parser(__doc__, rows=2_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--flush-rows", type=int, default=5000)
+    parser.add_argument("--flush-ms", type=int, default=200)
+    parser.set_defaults(repeat=1)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    readings = forms(args.rows, args.devices)
+
+    results = {
+        "per-row commit": {
+            "rows/s": max(
+                asyncio.run(per_row(readings, args.concurrency))
+                for _ in range(args.repeat)
+            )
+        },
+        "write-behind": {
+            "rows/s": max(
+                asyncio.run(
+                    write_behind(
+                        readings, args.concurrency, args.flush_rows, args.flush_ms
+                    )
+                )
+                for _ in range(args.repeat)
+            )
+        },
+    }
+
+    baseline = results["per-row commit"]["rows/s"]
+    for values in results.values():
+        values["speedup"] = values["rows/s"] / baseline
+
+    report(f"{args.rows:,} PZEM readings, {args.concurrency} producers", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Requests/second through the app's middleware stack for a cheap JSON endpoint,
+driving the ASGI app directly so only the framework and middleware cost is
+measured. Each variant builds a stack around the app's router:
+
+- original: BaseHTTPMiddleware redirect, per-request session commit and
+  X-Process-Time middlewares
+- no session commit: the same without the commit middleware
+- pure ASGI: the RedirectMiddleware and ProcessTimeMiddleware from main.py
+
+    python benchmarks/bench_middleware.py --requests 20000 --concurrency 32
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from fastapi.middleware.asyncexitstack import AsyncExitStackMiddleware
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import RedirectResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette_compress import CompressMiddleware
+
+from common import base_parser, report
+
+# Import the app against a throwaway data directory
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="solar-panel-bench-"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from solar_panel.internal.db import SessionLocal  # noqa: E402
+from solar_panel.main import (  # noqa: E402
+    ProcessTimeMiddleware,
+    RedirectMiddleware,
+    app,
+)
+from sqlalchemy.orm import scoped_session  # noqa: E402
+
+Session = scoped_session(SessionLocal)
+
+
+async def redirect(request, call_next):
+    if request.method == "GET":
+        path = request.url.path
+        query_params = dict(parse_qs(urlparse(str(request.url)).query))
+        if path.endswith("/watch") and "v" in query_params:
+            encoded_video_id = urlencode({"youtube": query_params["v"][0]})
+            return RedirectResponse(url=f"/?{encoded_video_id}")
+    return await call_next(request)
+
+
+async def commit_session_after_request(request, call_next):
+    response = await call_next(request)
+    Session.commit()
+    return response
+
+
+async def check_url(request, call_next):
+    start_time = int(time.time())
+    response = await call_next(request)
+    response.headers["X-Process-Time"] = str(int(time.time()) - start_time)
+    return response
+
+
+def stack(*middlewares):
+    """Wrap the router, innermost middleware first, like app.add_middleware."""
+    asgi = CompressMiddleware(AsyncExitStackMiddleware(app.router))
+    for middleware in middlewares:
+        asgi = middleware(asgi)
+    return CORSMiddleware(asgi, allow_origins=["*"], allow_methods=["*"])
+
+
+def http_middleware(dispatch):
+    return lambda asgi: BaseHTTPMiddleware(asgi, dispatch=dispatch)
+
+
+def scope(path: str) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"localhost"), (b"accept-encoding", b"gzip")],
+        "client": ("127.0.0.1", 50000),
+        "app": app,
+        "server": ("localhost", 80),
+    }
+
+
+async def request(asgi, path: str) -> int:
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await asyncio.wait_for(asgi(scope(path), receive, send), timeout=10)
+    return status
+
+
+async def run(asgi, path: str, requests: int, concurrency: int) -> float:
+    assert await request(asgi, path) == 200
+
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await request(asgi, path)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = base_parser(__doc__, rows=0)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--path", default="/api/v1/db/pool")
+    parser.set_defaults(repeat=3)
+    args = parser.parse_args()
+
+    variants = {
+        "original": stack(
+            http_middleware(redirect),
+            http_middleware(commit_session_after_request),
+            http_middleware(check_url),
+        ),
+        "no session commit": stack(
+            http_middleware(redirect), http_middleware(check_url)
+        ),
+        "pure ASGI": stack(RedirectMiddleware, ProcessTimeMiddleware),
+    }
+
+    results = {}
+    for name, asgi in variants.items():
+        samples = [
+            asyncio.run(run(asgi, args.path, args.requests, args.concurrency))
+            for _ in range(args.repeat)
+        ]
+        results[name] = {"req/s": max(samples)}
+
+    baseline = results["original"]["req/s"]
+    for values in results.values():
+        values["speedup"] = values["req/s"] / baseline
+
+    report(f"GET {args.path}, {args.concurrency} concurrent", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Rows/second for each way of turning a page of PZEM history into a JSON body:
+hydrating ORM objects and validating them twice (model_validate in the table
+class, then FastAPI's response_model), versus selecting plain column tuples
+and serializing them directly with pydantic-core, json or orjson.
+
+    python benchmarks/bench_serialization.py --rows 100000
+"""
+
+import json
+import random
+import uuid
+
+import sqlalchemy as sa
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from pydantic_core import to_json
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from common import base_parser, database_url, measure, report
+
+Base = declarative_base()
+
+
+class Pzem(Base):
+    __tablename__ = "pzems"
+
+    id = sa.Column(sa.String, primary_key=True)
+    device_id = sa.Column(sa.Integer)
+    voltage = sa.Column(sa.Float)
+    current = sa.Column(sa.Float)
+    power = sa.Column(sa.Float)
+    energy = sa.Column(sa.Float)
+    timestamp = sa.Column(sa.BigInteger)
+
+
+COLUMNS = ["id", "device_id", "voltage", "current", "power", "energy", "timestamp"]
+
+
+class PzemModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    device_id: int
+    voltage: float
+    current: float
+    power: float
+    energy: float
+    timestamp: int
+
+
+class PzemResponse(PzemModel):
+    pass
+
+
+def populate(engine, rows: int, devices: int):
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            Pzem.__table__.insert(),
+            [
+                {
+                    "id": str(uuid.uuid4()),
+                    "device_id": random.randint(1, devices),
+                    "voltage": random.uniform(200, 240),
+                    "current": random.uniform(0, 10),
+                    "power": random.uniform(0, 2000),
+                    "energy": random.uniform(0, 1e4),
+                    "timestamp": 1_700_000_000 + i,
+                }
+                for i in range(rows)
+            ],
+        )
+
+
+def main():
+    parser = base_parser(__doc__, rows=100_000)
+    parser.set_defaults(repeat=5)
+    args = parser.parse_args()
+
+    engine = sa.create_engine(database_url(args.url))
+    populate(engine, args.rows, args.devices)
+    Session = sessionmaker(bind=engine)
+    response_adapter = TypeAdapter(list[PzemResponse])
+
+    def orm_double_validation():
+        with Session() as db:
+            models = [PzemModel.model_validate(row) for row in db.query(Pzem).all()]
+        # What FastAPI does with a response_model: dump, validate, serialize
+        content = [model.model_dump() for model in models]
+        return response_adapter.dump_json(response_adapter.validate_python(content))
+
+    def select_tuples():
+        with Session() as db:
+            return db.query(*[getattr(Pzem, c) for c in COLUMNS]).all()
+
+    paths = {
+        "orm + validate x2": orm_double_validation,
+        "tuples + pydantic-core": lambda: to_json(
+            [dict(zip(COLUMNS, row)) for row in select_tuples()]
+        ),
+        "tuples + json": lambda: json.dumps(
+            [dict(zip(COLUMNS, row)) for row in select_tuples()]
+        ).encode(),
+    }
+    try:
+        import orjson
+
+        paths["tuples + orjson"] = lambda: orjson.dumps(
+            [dict(zip(COLUMNS, row)) for row in select_tuples()]
+        )
+    except ImportError:
+        pass
+
+    results = {}
+    for name, fn in paths.items():
+        ms = measure(fn, args.repeat)
+        results[name] = {"ms": ms, "rows/s": args.rows / (ms / 1000)}
+
+    baseline = results["orm + validate x2"]["rows/s"]
+    for values in results.values():
+        values["speedup"] = values["rows/s"] / baseline
+
+    report(f"{args.rows} rows on {engine.url.drivername}", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Concurrent ingest and dashboard-style reads against a SQLite file, with the
+SQLite defaults (rollback journal, synchronous=FULL) and with the pragma
+profile internal/db.py applies on connect.
+
+Writer threads commit small batches of readings while reader threads run the
+queries a dashboard issues: latest reading per device and an hourly average.
+
+    python benchmarks/bench_sqlite_pragmas.py --rows 1000000 --writers 2 --readers 8
+"""
+
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import sqlalchemy as sa
+
+from common import base_parser, database_url, report
+
+PROFILES = {
+    "defaults": {"busy_timeout": 5000},
+    "tuned": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+}
+
+metadata = sa.MetaData()
+readings = sa.Table(
+    "pzems",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("device_id", sa.Integer),
+    sa.Column("power", sa.Double),
+    sa.Column("timestamp", sa.BigInteger),
+    sa.Index("ix_pzems_device_id_timestamp", "device_id", "timestamp"),
+)
+
+LATEST = sa.text(
+    "SELECT device_id, MAX(timestamp) FROM pzems "
+    "WHERE device_id = :device_id GROUP BY device_id"
+)
+HOURLY = sa.text(
+    "SELECT timestamp / 3600 AS bucket, AVG(power) FROM pzems "
+    "WHERE device_id = :device_id AND timestamp >= :start GROUP BY bucket"
+)
+
+
+def create_engine(url: str, pragmas: dict):
+    engine = sa.create_engine(url, connect_args={"check_same_thread": False})
+
+    @sa.event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, value in pragmas.items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+        cursor.close()
+
+    return engine
+
+
+def populate(engine, rows: int, devices: int):
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        for offset in range(0, rows, 100_000):
+            conn.execute(
+                readings.insert(),
+                [
+                    {
+                        "device_id": (offset + i) % devices + 1,
+                        "power": random.uniform(0, 2000),
+                        "timestamp": offset + i,
+                    }
+                    for i in range(min(100_000, rows - offset))
+                ],
+            )
+
+
+def run(engine, args, now: int) -> dict:
+    deadline = time.perf_counter() + args.duration
+
+    def writer() -> int:
+        done = 0
+        while time.perf_counter() < deadline:
+            with engine.begin() as conn:
+                conn.execute(
+                    readings.insert(),
+                    [
+                        {
+                            "device_id": random.randint(1, args.devices),
+                            "power": random.uniform(0, 2000),
+                            "timestamp": now + done,
+                        }
+                        for _ in range(args.batch_size)
+                    ],
+                )
+            done += args.batch_size
+        return done
+
+    def reader() -> int:
+        done = 0
+        while time.perf_counter() < deadline:
+            device_id = random.randint(1, args.devices)
+            with engine.connect() as conn:
+                conn.execute(LATEST, {"device_id": device_id}).all()
+                conn.execute(
+                    HOURLY, {"device_id": device_id, "start": now - 24 * 3600}
+                ).all()
+            done += 1
+        return done
+
+    with ThreadPoolExecutor(max_workers=args.writers + args.readers) as executor:
+        writers = [executor.submit(writer) for _ in range(args.writers)]
+        readers = [executor.submit(reader) for _ in range(args.readers)]
+        inserted = sum(future.result() for future in writers)
+        reads = sum(future.result() for future in readers)
+
+    return {
+        "inserts/s": inserted / args.duration,
+        "reads/s": reads / args.duration,
+    }
+
+
+def main():
+    parser = base_parser(__doc__, rows=1_000_000)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    args = parser.parse_args()
+
+    results = {}
+    for name, pragmas in PROFILES.items():
+        # A fresh file per profile: journal_mode=WAL persists in the database
+        engine = create_engine(database_url(None), pragmas)
+        populate(engine, args.rows, args.devices)
+        results[name] = run(engine, args, now=args.rows)
+        engine.dispose()
+
+    report(f"{args.writers} writers, {args.readers} readers on sqlite", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+
+def base_parser(description: str, rows: int = 10_000_000) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--url",
+        default=None,
+        help="SQLAlchemy database URL (defaults to a throwaway SQLite file)",
+    )
+    parser.add_argument("--rows", type=int, default=rows, help="rows to generate")
+    parser.add_argument("--devices", type=int, default=8, help="distinct device ids")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per query")
+    return parser
+
+
+def database_url(url: str | None) -> str:
+    if url:
+        return url
+    path = Path(tempfile.mkdtemp(prefix="solar-panel-bench-")) / "bench.db"
+    return f"sqlite:///{path}"
+
+
+def measure(fn, repeat: int) -> float:
+    """Return the median wall time of fn() in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def report(title: str, results: dict[str, dict[str, float]]):
+    columns = list(next(iter(results.values())).keys())
+    width = max(len(name) for name in results) + 2
+
+    print(f"\n{title}")
+    print("".ljust(width) + "".join(f"{column:>16}" for column in columns))
+    for name, values in results.items():
+        print(name.ljust(width) + "".join(f"{values[c]:>16.3f}" for c in columns))
@@ -0,0 +1,177 @@
+import argparse
+import logging
+import time
+from typing import Optional
+
+from solar_panel.env import (
+    DATA_RETENTION_ENABLED,
+    DATABASE_PARTITION_MONTHS_AHEAD,
+    RETENTION_BATCH_SIZE,
+    RETENTION_DAILY_DAYS,
+    RETENTION_HOURLY_DAYS,
+    RETENTION_RAW_DAYS,
+    SRC_LOG_LEVELS,
+)
+from solar_panel.internal.db import get_db
+from solar_panel.models.ddsus import Ddsu, Ddsus
+from solar_panel.models.energy import Energy, EnergySensor
+from solar_panel.models.pzems import Pzem, Pzems
+from solar_panel.models.shts import Sht, Shts
+from solar_panel.utils.partitions import create_future_partitions, drop_old_partitions
+from solar_panel.utils.retention import retention_cutoffs, run_retention
+from sqlalchemy import func
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+####################################
+# Rollups
+####################################
+
+
+def earliest_reading(table) -> Optional[int]:
+    with get_db() as db:
+        return db.query(func.min(table.timestamp)).scalar()
+
+
+def backfill_rollups(args):
+    cutoff = None
+    if args.start is None and DATA_RETENTION_ENABLED:
+        # Raw readings past retention are gone; rebuilding their buckets from
+        # what is left would wipe the downsampled history
+        cutoff, _ = retention_cutoffs(int(time.time()))
+        if cutoff is not None:
+            print(f"rebuilding from {cutoff} (raw retention), pass --start to override")
+
+    for name, table, backfill in [
+        ("pzems", Pzem, Pzems.backfill_pzem_rollups),
+        ("ddsus", Ddsu, Ddsus.backfill_ddsu_rollups),
+        ("shts", Sht, Shts.backfill_sht_rollups),
+    ]:
+        start = args.start if args.start is not None else cutoff
+        if start is None:
+            # Rollups older than the raw readings (expired by an earlier
+            # apply-retention) are left alone
+            start = earliest_reading(table)
+            if start is None:
+                print(f"{name}: no raw readings, nothing to rebuild")
+                continue
+
+        buckets = backfill(start=start, end=args.end)
+        print(f"{name}: rebuilt {buckets} rollup buckets")
+
+
+####################################
+# Energy
+####################################
+
+
+def rebuild_energy(args):
+    for sensor in EnergySensor:
+        devices = Energy.rebuild_energy(sensor)
+        print(f"{sensor.value}: recomputed the daily energy of {devices} devices")
+
+
+####################################
+# Partitions
+####################################
+
+
+def create_partitions(args):
+    created = create_future_partitions(months_ahead=args.months_ahead)
+    if not created:
+        print("no partitioned sensor tables")
+    for name, partitions in created.items():
+        print(f"{name}: created {len(partitions)} partitions {partitions}")
+
+
+def drop_partitions(args):
+    dropped = drop_old_partitions(before=args.before)
+    if not dropped:
+        print("no partitioned sensor tables")
+    for name, partitions in dropped.items():
+        print(f"{name}: dropped {len(partitions)} partitions {partitions}")
+
+
+####################################
+# Retention
+####################################
+
+
+def apply_retention(args):
+    deleted = run_retention(
+        raw_days=args.raw_days,
+        hourly_days=args.hourly_days,
+        daily_days=args.daily_days,
+        batch_size=args.batch_size,
+    )
+    for name, count in deleted.items():
+        print(f"{name}: deleted {count} rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m solar_panel.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser(
+        "backfill-rollups",
+        help="rebuild the hourly/daily rollup tables from raw readings",
+    )
+    backfill.add_argument(
+        "--start",
+        type=int,
+        default=None,
+        help="epoch seconds (default: the raw retention cutoff when retention is "
+        "enabled, otherwise the earliest raw reading)",
+    )
+    backfill.add_argument("--end", type=int, default=None, help="epoch seconds")
+    backfill.set_defaults(func=backfill_rollups)
+
+    energy = commands.add_parser(
+        "rebuild-energy",
+        help="recompute the cached daily energy totals from raw readings",
+    )
+    energy.set_defaults(func=rebuild_energy)
+
+    create = commands.add_parser(
+        "create-partitions",
+        help="create the upcoming monthly partitions of partitioned sensor tables",
+    )
+    create.add_argument(
+        "--months-ahead", type=int, default=DATABASE_PARTITION_MONTHS_AHEAD
+    )
+    create.set_defaults(func=create_partitions)
+
+    drop = commands.add_parser(
+        "drop-partitions",
+        help="drop monthly partitions that end at or before a timestamp",
+    )
+    drop.add_argument("--before", type=int, required=True, help="epoch seconds")
+    drop.set_defaults(func=drop_partitions)
+
+    retention = commands.add_parser(
+        "apply-retention",
+        help="downsample and delete readings past their retention period",
+    )
+    retention.add_argument(
+        "--raw-days", type=int, default=RETENTION_RAW_DAYS, help="0 keeps forever"
+    )
+    retention.add_argument(
+        "--hourly-days",
+        type=int,
+        default=RETENTION_HOURLY_DAYS,
+        help="0 keeps forever",
+    )
+    retention.add_argument(
+        "--daily-days", type=int, default=RETENTION_DAILY_DAYS, help="0 keeps forever"
+    )
+    retention.add_argument("--batch-size", type=int, default=RETENTION_BATCH_SIZE)
+    retention.set_defaults(func=apply_retention)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
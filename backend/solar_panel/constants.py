@@ -48,6 +48,8 @@ class ERROR_MESSAGES(str, Enum):
         lambda err="": f"Invalid format. Please use the correct format{err}"
     )
     RATE_LIMIT_EXCEEDED = "API rate limit exceeded"
+    INGEST_BUFFER_FULL = "The ingest buffer is full. Please retry shortly."
+    STREAM_LIMIT_NOT_SUPPORTED = "Streamed formats return the whole range and do not take a limit. Narrow start/end, or page with format=rows."
 
     MODEL_NOT_FOUND = lambda name="": f"Model '{name}' was not found"
     OPENAI_NOT_FOUND = lambda name="": "OpenAI API was not found"
@@ -125,3 +125,301 @@ if "postgres://" in DATABASE_URL:
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://")
 
 DATABASE_SCHEMA = os.environ.get("DATABASE_SCHEMA", None)
+
+# Connection pool settings, only used for non-SQLite databases.
+# DATABASE_POOL_SIZE=0 disables pooling (NullPool: one connection per session).
+DATABASE_POOL_SIZE = os.environ.get("DATABASE_POOL_SIZE", "10")
+
+try:
+    DATABASE_POOL_SIZE = int(DATABASE_POOL_SIZE)
+except Exception:
+    DATABASE_POOL_SIZE = 10
+
+DATABASE_POOL_MAX_OVERFLOW = os.environ.get("DATABASE_POOL_MAX_OVERFLOW", "10")
+
+try:
+    DATABASE_POOL_MAX_OVERFLOW = int(DATABASE_POOL_MAX_OVERFLOW)
+except Exception:
+    DATABASE_POOL_MAX_OVERFLOW = 10
+
+DATABASE_POOL_TIMEOUT = os.environ.get("DATABASE_POOL_TIMEOUT", "30")
+
+try:
+    DATABASE_POOL_TIMEOUT = int(DATABASE_POOL_TIMEOUT)
+except Exception:
+    DATABASE_POOL_TIMEOUT = 30
+
+DATABASE_POOL_RECYCLE = os.environ.get("DATABASE_POOL_RECYCLE", "3600")
+
+try:
+    DATABASE_POOL_RECYCLE = int(DATABASE_POOL_RECYCLE)
+except Exception:
+    DATABASE_POOL_RECYCLE = 3600
+
+# SQLite pragmas applied to every new connection. WAL lets readers run while
+# a write is in progress, and synchronous=NORMAL only fsyncs at checkpoints.
+DATABASE_SQLITE_JOURNAL_MODE = os.environ.get("DATABASE_SQLITE_JOURNAL_MODE", "WAL")
+DATABASE_SQLITE_SYNCHRONOUS = os.environ.get("DATABASE_SQLITE_SYNCHRONOUS", "NORMAL")
+DATABASE_SQLITE_TEMP_STORE = os.environ.get("DATABASE_SQLITE_TEMP_STORE", "MEMORY")
+
+# Negative cache_size is in KiB (-64000 is ~64 MB per connection)
+DATABASE_SQLITE_CACHE_SIZE = os.environ.get("DATABASE_SQLITE_CACHE_SIZE", "-64000")
+
+try:
+    DATABASE_SQLITE_CACHE_SIZE = int(DATABASE_SQLITE_CACHE_SIZE)
+except Exception:
+    DATABASE_SQLITE_CACHE_SIZE = -64000
+
+DATABASE_SQLITE_MMAP_SIZE = os.environ.get("DATABASE_SQLITE_MMAP_SIZE", "268435456")
+
+try:
+    DATABASE_SQLITE_MMAP_SIZE = int(DATABASE_SQLITE_MMAP_SIZE)
+except Exception:
+    DATABASE_SQLITE_MMAP_SIZE = 268435456
+
+# Milliseconds to wait for a lock before failing with "database is locked"
+DATABASE_SQLITE_BUSY_TIMEOUT = os.environ.get("DATABASE_SQLITE_BUSY_TIMEOUT", "5000")
+
+try:
+    DATABASE_SQLITE_BUSY_TIMEOUT = int(DATABASE_SQLITE_BUSY_TIMEOUT)
+except Exception:
+    DATABASE_SQLITE_BUSY_TIMEOUT = 5000
+
+# PostgreSQL only: store sensor readings in monthly range partitions on
+# timestamp. Read by the partitioning migration, so set it before running
+# `alembic upgrade head` (or downgrade one step and upgrade again to convert
+# an existing database).
+DATABASE_PARTITIONING = (
+    os.environ.get("DATABASE_PARTITIONING", "False").lower() == "true"
+)
+
+# Monthly partitions created ahead of the current month
+DATABASE_PARTITION_MONTHS_AHEAD = os.environ.get("DATABASE_PARTITION_MONTHS_AHEAD", "3")
+
+try:
+    DATABASE_PARTITION_MONTHS_AHEAD = int(DATABASE_PARTITION_MONTHS_AHEAD)
+except Exception:
+    DATABASE_PARTITION_MONTHS_AHEAD = 3
+
+# Seconds the in-process device registry trusts itself before checking the
+# devices version row for writes made by other workers
+DEVICE_REGISTRY_TTL = os.environ.get("DEVICE_REGISTRY_TTL", "5")
+
+try:
+    DEVICE_REGISTRY_TTL = float(DEVICE_REGISTRY_TTL)
+except Exception:
+    DEVICE_REGISTRY_TTL = 5.0
+
+# Seconds the in-process latest reading cache trusts itself before checking
+# each sensor's version row for writes made elsewhere (other workers, the CLI,
+# the retention job)
+LATEST_CACHE_TTL = os.environ.get("LATEST_CACHE_TTL", "5")
+
+try:
+    LATEST_CACHE_TTL = float(LATEST_CACHE_TTL)
+except Exception:
+    LATEST_CACHE_TTL = 5.0
+
+####################################
+# Data retention
+####################################
+
+# Run the retention job in the background of the app. It can always be run
+# by hand with `python -m solar_panel.cli apply-retention`.
+DATA_RETENTION_ENABLED = (
+    os.environ.get("DATA_RETENTION_ENABLED", "False").lower() == "true"
+)
+
+# Days of data kept per resolution; 0 keeps that resolution forever
+RETENTION_RAW_DAYS = os.environ.get("RETENTION_RAW_DAYS", "30")
+
+try:
+    RETENTION_RAW_DAYS = int(RETENTION_RAW_DAYS)
+except Exception:
+    RETENTION_RAW_DAYS = 30
+
+RETENTION_HOURLY_DAYS = os.environ.get("RETENTION_HOURLY_DAYS", "730")
+
+try:
+    RETENTION_HOURLY_DAYS = int(RETENTION_HOURLY_DAYS)
+except Exception:
+    RETENTION_HOURLY_DAYS = 730
+
+RETENTION_DAILY_DAYS = os.environ.get("RETENTION_DAILY_DAYS", "0")
+
+try:
+    RETENTION_DAILY_DAYS = int(RETENTION_DAILY_DAYS)
+except Exception:
+    RETENTION_DAILY_DAYS = 0
+
+# Rows deleted per transaction, so no single DELETE holds locks for long
+RETENTION_BATCH_SIZE = os.environ.get("RETENTION_BATCH_SIZE", "5000")
+
+try:
+    RETENTION_BATCH_SIZE = int(RETENTION_BATCH_SIZE)
+except Exception:
+    RETENTION_BATCH_SIZE = 5000
+
+# Seconds between background retention runs
+RETENTION_INTERVAL = os.environ.get("RETENTION_INTERVAL", "3600")
+
+try:
+    RETENTION_INTERVAL = int(RETENTION_INTERVAL)
+except Exception:
+    RETENTION_INTERVAL = 3600
+
+####################################
+# Energy yield
+####################################
+
+# Largest value each sensor's cumulative energy counter reaches before it
+# wraps to zero, in the unit it reports (the PZEM-004T counts up to 9999.99
+# kWh in Wh). 0 means the counter is not known to wrap, so every drop is read
+# as a meter reset.
+ENERGY_PZEM_COUNTER_MAX = os.environ.get("ENERGY_PZEM_COUNTER_MAX", "9999990")
+
+try:
+    ENERGY_PZEM_COUNTER_MAX = float(ENERGY_PZEM_COUNTER_MAX)
+except Exception:
+    ENERGY_PZEM_COUNTER_MAX = 9999990.0
+
+ENERGY_DDSU_COUNTER_MAX = os.environ.get("ENERGY_DDSU_COUNTER_MAX", "0")
+
+try:
+    ENERGY_DDSU_COUNTER_MAX = float(ENERGY_DDSU_COUNTER_MAX)
+except Exception:
+    ENERGY_DDSU_COUNTER_MAX = 0.0
+
+# A drop from at least this fraction of the counter max is a rollover rather
+# than a reset
+ENERGY_ROLLOVER_RATIO = os.environ.get("ENERGY_ROLLOVER_RATIO", "0.9")
+
+try:
+    ENERGY_ROLLOVER_RATIO = float(ENERGY_ROLLOVER_RATIO)
+except Exception:
+    ENERGY_ROLLOVER_RATIO = 0.9
+
+####################################
+# Series analytics
+####################################
+
+# Rows fetched from the server-side cursor per batch when loading a series;
+# each batch is turned into arrays in a worker thread
+ANALYTICS_BATCH_SIZE = os.environ.get("ANALYTICS_BATCH_SIZE", "10000")
+
+try:
+    ANALYTICS_BATCH_SIZE = int(ANALYTICS_BATCH_SIZE)
+except Exception:
+    ANALYTICS_BATCH_SIZE = 10000
+
+####################################
+# Energy balance
+####################################
+
+# Meters combined by the self-consumption / grid balance. The grid meter's
+# power is positive while importing and negative while exporting.
+BALANCE_PV_DEVICE_ID = os.environ.get("BALANCE_PV_DEVICE_ID", "3")
+
+try:
+    BALANCE_PV_DEVICE_ID = int(BALANCE_PV_DEVICE_ID)
+except Exception:
+    BALANCE_PV_DEVICE_ID = 3
+
+BALANCE_GRID_DEVICE_ID = os.environ.get("BALANCE_GRID_DEVICE_ID", "2")
+
+try:
+    BALANCE_GRID_DEVICE_ID = int(BALANCE_GRID_DEVICE_ID)
+except Exception:
+    BALANCE_GRID_DEVICE_ID = 2
+
+BALANCE_LOAD_DEVICE_IDS = os.environ.get("BALANCE_LOAD_DEVICE_IDS", "4,5,6,7,8")
+
+try:
+    BALANCE_LOAD_DEVICE_IDS = [
+        int(device_id) for device_id in BALANCE_LOAD_DEVICE_IDS.split(",")
+    ]
+except Exception:
+    BALANCE_LOAD_DEVICE_IDS = [4, 5, 6, 7, 8]
+
+# Seconds between the points of the common time grid meters are resampled to
+BALANCE_STEP = os.environ.get("BALANCE_STEP", "60")
+
+try:
+    BALANCE_STEP = int(BALANCE_STEP)
+except Exception:
+    BALANCE_STEP = 60
+
+# How old a reading may be and still stand for a grid point; older than that
+# the meter counts as missing there
+BALANCE_TOLERANCE = os.environ.get("BALANCE_TOLERANCE", "120")
+
+try:
+    BALANCE_TOLERANCE = int(BALANCE_TOLERANCE)
+except Exception:
+    BALANCE_TOLERANCE = 120
+
+####################################
+# Ingest buffer
+####################################
+
+# Queue readings posted to the create endpoints in memory and write them in
+# batches, one transaction per flush. Acknowledged readings that were not
+# flushed yet are lost if the process dies without a clean shutdown.
+INGEST_BUFFER_ENABLED = (
+    os.environ.get("INGEST_BUFFER_ENABLED", "False").lower() == "true"
+)
+
+# Readings held at most; beyond that the create endpoints answer 429
+INGEST_BUFFER_SIZE = os.environ.get("INGEST_BUFFER_SIZE", "100000")
+
+try:
+    INGEST_BUFFER_SIZE = int(INGEST_BUFFER_SIZE)
+except Exception:
+    INGEST_BUFFER_SIZE = 100000
+
+# A flush starts once this many readings are queued ...
+INGEST_FLUSH_ROWS = os.environ.get("INGEST_FLUSH_ROWS", "5000")
+
+try:
+    INGEST_FLUSH_ROWS = int(INGEST_FLUSH_ROWS)
+except Exception:
+    INGEST_FLUSH_ROWS = 5000
+
+# ... or this many milliseconds after the previous one
+INGEST_FLUSH_INTERVAL_MS = os.environ.get("INGEST_FLUSH_INTERVAL_MS", "200")
+
+try:
+    INGEST_FLUSH_INTERVAL_MS = int(INGEST_FLUSH_INTERVAL_MS)
+except Exception:
+    INGEST_FLUSH_INTERVAL_MS = 200
+
+####################################
+# Live stream
+####################################
+
+# Readings buffered per stream client before the oldest are dropped
+STREAM_QUEUE_SIZE = os.environ.get("STREAM_QUEUE_SIZE", "1000")
+
+try:
+    STREAM_QUEUE_SIZE = int(STREAM_QUEUE_SIZE)
+except Exception:
+    STREAM_QUEUE_SIZE = 1000
+
+STREAM_KEEPALIVE_INTERVAL = os.environ.get("STREAM_KEEPALIVE_INTERVAL", "15")
+
+try:
+    STREAM_KEEPALIVE_INTERVAL = float(STREAM_KEEPALIVE_INTERVAL)
+except Exception:
+    STREAM_KEEPALIVE_INTERVAL = 15.0
+
+####################################
+# History streaming
+####################################
+
+# Rows fetched from the server-side cursor per chunk of a streamed response
+HISTORY_STREAM_BATCH_SIZE = os.environ.get("HISTORY_STREAM_BATCH_SIZE", "1000")
+
+try:
+    HISTORY_STREAM_BATCH_SIZE = int(HISTORY_STREAM_BATCH_SIZE)
+except Exception:
+    HISTORY_STREAM_BATCH_SIZE = 1000
@@ -1,6 +1,8 @@
 import json
 import logging
-from contextlib import contextmanager
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 from typing import Any, Optional
 
 from solar_panel.internal.wrappers import register_connection
@@ -8,13 +10,25 @@ from solar_panel.env import (
     SOLAR_PANEL_DIR,
     DATABASE_URL,
     DATABASE_SCHEMA,
+    DATABASE_POOL_SIZE,
+    DATABASE_POOL_MAX_OVERFLOW,
+    DATABASE_POOL_TIMEOUT,
+    DATABASE_POOL_RECYCLE,
+    DATABASE_SQLITE_JOURNAL_MODE,
+    DATABASE_SQLITE_SYNCHRONOUS,
+    DATABASE_SQLITE_CACHE_SIZE,
+    DATABASE_SQLITE_MMAP_SIZE,
+    DATABASE_SQLITE_TEMP_STORE,
+    DATABASE_SQLITE_BUSY_TIMEOUT,
     SRC_LOG_LEVELS,
 )
 from peewee_migrate import Router
-from sqlalchemy import Dialect, create_engine, MetaData, types
+from sqlalchemy import Dialect, create_engine, event, make_url, MetaData, types
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import scoped_session, sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
 from sqlalchemy.sql.type_api import _T
 from typing_extensions import Self
 
@@ -44,6 +58,34 @@ class JSONField(types.TypeDecorator):
             return json.loads(value)
 
 
+class UUIDField(types.TypeDecorator):
+    """
+    UUID handled as a str in Python but stored compactly: the native uuid type
+    on PostgreSQL and 16 raw bytes elsewhere, rather than 36 characters of text.
+    """
+
+    impl = types.LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect: Dialect) -> Any:
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=False))
+        return dialect.type_descriptor(types.LargeBinary(16))
+
+    def process_bind_param(self, value: Optional[_T], dialect: Dialect) -> Any:
+        if value is None:
+            return None
+        value = uuid.UUID(str(value))
+        return str(value) if dialect.name == "postgresql" else value.bytes
+
+    def process_result_value(self, value: Optional[_T], dialect: Dialect) -> Any:
+        if value is None:
+            return None
+        if dialect.name == "postgresql":
+            return str(value)
+        return str(uuid.UUID(bytes=bytes(value)))
+
+
 # Workaround to handle the peewee migration
 # This is required to ensure the peewee migration is handled before the alembic migration
 def handle_peewee_migration(DATABASE_URL):
@@ -77,20 +119,153 @@ if "sqlite" in SQLALCHEMY_DATABASE_URL:
         SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
     )
 else:
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, pool_pre_ping=True, poolclass=NullPool
-    )
+    if DATABASE_POOL_SIZE > 0:
+        engine = create_engine(
+            SQLALCHEMY_DATABASE_URL,
+            pool_size=DATABASE_POOL_SIZE,
+            max_overflow=DATABASE_POOL_MAX_OVERFLOW,
+            pool_timeout=DATABASE_POOL_TIMEOUT,
+            pool_recycle=DATABASE_POOL_RECYCLE,
+            pool_pre_ping=True,
+            poolclass=QueuePool,
+        )
+    else:
+        engine = create_engine(
+            SQLALCHEMY_DATABASE_URL, pool_pre_ping=True, poolclass=NullPool
+        )
+
+
+def get_async_database_url(url: str) -> str:
+    # Swap the sync DBAPI driver for its asyncio counterpart
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite").render_as_string(False)
+    if url.get_driver_name() == "psycopg":
+        # psycopg 3 speaks both sync and async
+        return url.render_as_string(False)
+    return url.set(drivername="postgresql+asyncpg").render_as_string(False)
+
+
+SQLALCHEMY_ASYNC_DATABASE_URL = get_async_database_url(SQLALCHEMY_DATABASE_URL)
+if "sqlite" in SQLALCHEMY_ASYNC_DATABASE_URL:
+    async_engine = create_async_engine(SQLALCHEMY_ASYNC_DATABASE_URL)
+else:
+    if DATABASE_POOL_SIZE > 0:
+        async_engine = create_async_engine(
+            SQLALCHEMY_ASYNC_DATABASE_URL,
+            pool_size=DATABASE_POOL_SIZE,
+            max_overflow=DATABASE_POOL_MAX_OVERFLOW,
+            pool_timeout=DATABASE_POOL_TIMEOUT,
+            pool_recycle=DATABASE_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+    else:
+        async_engine = create_async_engine(
+            SQLALCHEMY_ASYNC_DATABASE_URL, pool_pre_ping=True, poolclass=NullPool
+        )
+
+
+####################################
+# SQLite pragmas
+####################################
+
+SQLITE_PRAGMAS = {
+    "journal_mode": DATABASE_SQLITE_JOURNAL_MODE,
+    "synchronous": DATABASE_SQLITE_SYNCHRONOUS,
+    "cache_size": DATABASE_SQLITE_CACHE_SIZE,
+    "mmap_size": DATABASE_SQLITE_MMAP_SIZE,
+    "temp_store": DATABASE_SQLITE_TEMP_STORE,
+    "busy_timeout": DATABASE_SQLITE_BUSY_TIMEOUT,
+}
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        if value is not None and value != "":
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+    cursor.close()
+
+
+if "sqlite" in SQLALCHEMY_DATABASE_URL:
+    for _engine in [engine, async_engine.sync_engine]:
+        event.listen(_engine, "connect", _set_sqlite_pragmas)
+
+
+####################################
+# Pool statistics
+####################################
+
+POOL_EVENTS = {
+    "engine": {"connect": 0, "checkout": 0, "checkin": 0, "invalidate": 0},
+    "async_engine": {"connect": 0, "checkout": 0, "checkin": 0, "invalidate": 0},
+}
+
+
+def _count_pool_event(counters, name):
+    def listener(*args):
+        counters[name] += 1
+
+    return listener
+
+
+for _engine, _counters in [
+    (engine, POOL_EVENTS["engine"]),
+    (async_engine.sync_engine, POOL_EVENTS["async_engine"]),
+]:
+    for _name in _counters:
+        event.listen(_engine, _name, _count_pool_event(_counters, _name))
+
+
+def _get_pool_status(pool, counters) -> dict:
+    status = {"pool": type(pool).__name__, "events": dict(counters)}
+
+    if isinstance(pool, QueuePool):
+        status.update(
+            {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+            }
+        )
+
+    return status
+
+
+def get_pool_status() -> dict:
+    return {
+        "engine": _get_pool_status(engine.pool, POOL_EVENTS["engine"]),
+        "async_engine": _get_pool_status(
+            async_engine.sync_engine.pool, POOL_EVENTS["async_engine"]
+        ),
+    }
 
 
 SessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=engine, expire_on_commit=False
 )
+AsyncSessionLocal = async_sessionmaker(
+    autocommit=False, autoflush=False, bind=async_engine, expire_on_commit=False
+)
 metadata_obj = MetaData(schema=DATABASE_SCHEMA)
 Base = declarative_base(metadata=metadata_obj)
-Session = scoped_session(SessionLocal)
+
+# There is no request-wide session: each table method opens one through
+# get_db() and commits its own unit of work before returning.
+
+# Set while a sync table method runs inside AsyncSession.run_sync, so that
+# get_db() hands out the greenlet-bridged session instead of opening its own.
+_borrowed_session = ContextVar("borrowed_session", default=None)
 
 
 def get_session():
+    borrowed = _borrowed_session.get()
+    if borrowed is not None:
+        # Owned by run_async(), which closes it
+        yield borrowed
+        return
+
     db = SessionLocal()
     try:
         yield db
@@ -99,3 +274,44 @@ def get_session():
 
 
 get_db = contextmanager(get_session)
+
+
+async def get_async_session():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+get_async_db = asynccontextmanager(get_async_session)
+
+
+async def run_async(fn, *args, **kwargs):
+    """
+    Run a sync table method on the AsyncEngine. The method's queries are
+    issued through the async driver, so the event loop keeps serving other
+    requests while they wait on the database.
+    """
+
+    def call(db):
+        token = _borrowed_session.set(db)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _borrowed_session.reset(token)
+
+    async with get_async_db() as db:
+        return await db.run_sync(call)
+
+
+class AsyncTable:
+    """Expose every method of a table class as a coroutine via run_async()."""
+
+    def __init__(self, table):
+        self._table = table
+
+    def __getattr__(self, name):
+        method = getattr(self._table, name)
+
+        async def call(*args, **kwargs):
+            return await run_async(method, *args, **kwargs)
+
+        return call
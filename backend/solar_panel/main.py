@@ -1,15 +1,16 @@
+import asyncio
 import logging
 import mimetypes
 import os
 import sys
 import time
+from contextlib import asynccontextmanager
 
-from urllib.parse import urlencode, parse_qs, urlparse
+from urllib.parse import urlencode, parse_qs
 
 from fastapi import (
     FastAPI,
     HTTPException,
-    Request,
     applications,
 )
 
@@ -22,19 +23,38 @@ from fastapi.staticfiles import StaticFiles
 from starlette_compress import CompressMiddleware
 
 from starlette.exceptions import HTTPException as StarletteHTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
-
-from solar_panel.routers import pzems, shts, devices, ddsus
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from solar_panel.routers import (
+    pzems,
+    shts,
+    devices,
+    ddsus,
+    ingest,
+    latest,
+    stream,
+    dashboard,
+    energy,
+    analytics,
+)
 
 from solar_panel.config import CORS_ALLOW_ORIGIN, ENV, FRONTEND_BUILD_DIR
 
 from solar_panel.env import (
+    DATABASE_PARTITIONING,
+    DATA_RETENTION_ENABLED,
+    INGEST_BUFFER_ENABLED,
     SAFE_MODE,
     GLOBAL_LOG_LEVEL,
     SRC_LOG_LEVELS,
 )
 
-from solar_panel.internal.db import Session
+from solar_panel.internal.db import get_pool_status
+from solar_panel.models.devices import AsyncDevices
+from solar_panel.models.ingest import IngestBuffer
+from solar_panel.utils.partitions import maintain_partitions
+from solar_panel.utils.retention import maintain_retention
 
 if SAFE_MODE:
     print("SAFE MODE ENABLED")
@@ -59,32 +79,87 @@ class SPAStaticFiles(StaticFiles):
                 raise ex
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await AsyncDevices.load_devices()
+    except Exception as e:
+        log.warning(f"Could not preload the device registry: {e}")
+
+    tasks = []
+    if DATABASE_PARTITIONING:
+        tasks.append(asyncio.create_task(maintain_partitions()))
+    if DATA_RETENTION_ENABLED:
+        tasks.append(asyncio.create_task(maintain_retention()))
+    if INGEST_BUFFER_ENABLED:
+        IngestBuffer.start()
+
+    yield
+
+    if INGEST_BUFFER_ENABLED:
+        # Write out every reading that was acknowledged but not flushed yet
+        await IngestBuffer.stop()
+
+    for task in tasks:
+        task.cancel()
+
+
 app = FastAPI(
     title="Open WebUI",
     docs_url="/docs" if ENV == "dev" else None,
     openapi_url="/openapi.json" if ENV == "dev" else None,
     redoc_url=None,
+    lifespan=lifespan,
 )
 
 
-class RedirectMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # Check if the request is a GET request
-        if request.method == "GET":
-            path = request.url.path
-            query_params = dict(parse_qs(urlparse(str(request.url)).query))
+class RedirectMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # Only GET requests to a watch path are looked at; everything else is
+        # passed straight through without building a Request
+        if (
+            scope["type"] == "http"
+            and scope["method"] == "GET"
+            and scope["path"].endswith("/watch")
+        ):
+            query_params = parse_qs(scope["query_string"].decode("latin-1"))
 
-            # Check for the specific watch path and the presence of 'v' parameter
-            if path.endswith("/watch") and "v" in query_params:
+            # Check for the presence of 'v' parameter
+            if "v" in query_params:
                 # Extract the first 'v' parameter
                 video_id = query_params["v"][0]
                 encoded_video_id = urlencode({"youtube": video_id})
                 redirect_url = f"/?{encoded_video_id}"
-                return RedirectResponse(url=redirect_url)
+                response = RedirectResponse(url=redirect_url)
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
+
 
-        # Proceed with the normal flow of other requests
-        response = await call_next(request)
-        return response
+class ProcessTimeMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+
+        async def send_with_process_time(message: Message):
+            if message["type"] == "http.response.start":
+                # Seconds until the response headers are sent
+                process_time = time.perf_counter() - start_time
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Process-Time", f"{process_time:.6f}")
+            await send(message)
+
+        await self.app(scope, receive, send_with_process_time)
 
 
 ########################################
@@ -97,24 +172,7 @@ class RedirectMiddleware(BaseHTTPMiddleware):
 # Add the middleware to the app
 app.add_middleware(CompressMiddleware)
 app.add_middleware(RedirectMiddleware)
-
-
-@app.middleware("http")
-async def commit_session_after_request(request: Request, call_next):
-    response = await call_next(request)
-    # log.debug("Commit session after request")
-    Session.commit()
-    return response
-
-
-@app.middleware("http")
-async def check_url(request: Request, call_next):
-    start_time = int(time.time())
-
-    response = await call_next(request)
-    process_time = int(time.time()) - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+app.add_middleware(ProcessTimeMiddleware)
 
 
 app.add_middleware(
@@ -123,12 +181,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 app.include_router(pzems.router, prefix="/api/v1/pzems", tags=["Pzems"])
 app.include_router(shts.router, prefix="/api/v1/shts", tags=["SHTs"])
 app.include_router(devices.router, prefix="/api/v1/devices", tags=["Devices"])
 app.include_router(ddsus.router, prefix="/api/v1/ddsus", tags=["DDSUs"])
+app.include_router(ingest.router, prefix="/api/v1/ingest", tags=["Ingest"])
+app.include_router(latest.router, prefix="/api/v1/latest", tags=["Latest"])
+app.include_router(stream.router, prefix="/api/v1/stream", tags=["Stream"])
+app.include_router(dashboard.router, prefix="/api/v1/dashboard", tags=["Dashboard"])
+app.include_router(energy.router, prefix="/api/v1/energy", tags=["Energy"])
+app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["Analytics"])
+
+
+@app.get("/api/v1/db/pool")
+async def get_db_pool_status():
+    return get_pool_status()
 
 
 def swagger_ui_html(*args, **kwargs):
@@ -13,3 +13,10 @@ def get_revision_id():
     import uuid
 
     return str(uuid.uuid4()).replace("-", "")[:12]
+
+
+def get_existing_indexes(table_name):
+    con = op.get_bind()
+    inspector = Inspector.from_engine(con)
+    indexes = set(index["name"] for index in inspector.get_indexes(table_name))
+    return indexes
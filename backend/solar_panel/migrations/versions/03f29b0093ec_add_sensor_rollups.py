@@ -0,0 +1,83 @@
+"""add sensor rollups
+
+Revision ID: 03f29b0093ec
+Revises: 8d6f54a8e00b
+Create Date: 2026-10-18 11:02:17.884392
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import solar_panel.internal.db
+from solar_panel.migrations.util import get_existing_tables
+
+revision: str = "03f29b0093ec"
+down_revision: Union[str, None] = "8d6f54a8e00b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SENSOR_METRICS = {
+    "pzems": ["voltage", "current", "power", "energy"],
+    "ddsus": ["voltage", "current", "power", "energy", "frequency", "power_factor"],
+    "shts": ["temperature", "humidity"],
+}
+
+ROLLUPS = {
+    "hourly": 60 * 60,
+    "daily": 24 * 60 * 60,
+}
+
+
+def upgrade() -> None:
+    existing_tables = set(get_existing_tables())
+
+    for table_name, metrics in SENSOR_METRICS.items():
+        for suffix, width in ROLLUPS.items():
+            rollup_name = f"{table_name}_{suffix}"
+            if rollup_name in existing_tables:
+                continue
+
+            metric_columns = [
+                sa.Column(f"{metric}_{name}", sa.FLOAT(), nullable=True)
+                for metric in metrics
+                for name in ["sum", "min", "max"]
+            ]
+            rollup = op.create_table(
+                rollup_name,
+                sa.Column("device_id", sa.INTEGER(), nullable=False),
+                sa.Column("timestamp", sa.BIGINT(), nullable=False),
+                sa.Column("count", sa.BIGINT(), nullable=False),
+                *metric_columns,
+                sa.PrimaryKeyConstraint("device_id", "timestamp"),
+            )
+
+            # Seed the rollup from the readings stored so far
+            raw = sa.table(
+                table_name,
+                sa.column("device_id", sa.INTEGER()),
+                sa.column("timestamp", sa.BIGINT()),
+                *[sa.column(metric, sa.FLOAT()) for metric in metrics],
+            )
+            bucket = (raw.c.timestamp // width) * width
+            aggregates = [
+                fn(raw.c[metric])
+                for metric in metrics
+                for fn in [sa.func.sum, sa.func.min, sa.func.max]
+            ]
+            op.execute(
+                rollup.insert().from_select(
+                    [column.name for column in rollup.columns],
+                    sa.select(raw.c.device_id, bucket, sa.func.count(), *aggregates)
+                    .where(raw.c.device_id.isnot(None), raw.c.timestamp.isnot(None))
+                    .group_by(raw.c.device_id, bucket),
+                )
+            )
+
+
+def downgrade() -> None:
+    for table_name in SENSOR_METRICS:
+        for suffix in ROLLUPS:
+            op.drop_table(f"{table_name}_{suffix}")
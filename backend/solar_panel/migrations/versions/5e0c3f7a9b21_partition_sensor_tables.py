@@ -0,0 +1,137 @@
+"""partition sensor tables
+
+Revision ID: 5e0c3f7a9b21
+Revises: ba6d9e067c47
+Create Date: 2026-10-18 13:40:52.208316
+
+"""
+
+import time
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import solar_panel.internal.db
+from solar_panel.env import (
+    DATABASE_PARTITIONING,
+    DATABASE_PARTITION_MONTHS_AHEAD,
+    DATABASE_SCHEMA,
+)
+from solar_panel.utils.partitions import (
+    SENSOR_TABLES,
+    add_months,
+    ensure_partitions,
+    is_partitioned,
+    month_start,
+    qualified,
+)
+
+revision: str = "5e0c3f7a9b21"
+down_revision: Union[str, None] = "ba6d9e067c47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SENSOR_INDEXES = [
+    ("ix_{table_name}_device_id_timestamp", ["device_id", "timestamp"]),
+    ("ix_{table_name}_timestamp", ["timestamp"]),
+]
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if conn.dialect.name != "postgresql" or not DATABASE_PARTITIONING:
+        return
+
+    now = int(time.time())
+    end = int(add_months(month_start(now), DATABASE_PARTITION_MONTHS_AHEAD).timestamp())
+
+    for table_name in SENSOR_TABLES:
+        if is_partitioned(conn, table_name):
+            continue
+
+        # Move the plain table aside; its constraint and index names must be freed
+        unpartitioned = f"{table_name}_unpartitioned"
+        op.rename_table(table_name, unpartitioned, schema=DATABASE_SCHEMA)
+        op.execute(
+            f"ALTER TABLE {qualified(unpartitioned)} "
+            f'RENAME CONSTRAINT "{table_name}_pkey" TO "{unpartitioned}_pkey"'
+        )
+        for index_name, _ in SENSOR_INDEXES:
+            op.drop_index(
+                index_name.format(table_name=table_name),
+                unpartitioned,
+                schema=DATABASE_SCHEMA,
+            )
+
+        # The partition key has to be part of the primary key
+        op.execute(
+            f"CREATE TABLE {qualified(table_name)} "
+            f"(LIKE {qualified(unpartitioned)} INCLUDING DEFAULTS) "
+            f'PARTITION BY RANGE ("timestamp")'
+        )
+        op.alter_column(table_name, "timestamp", nullable=False, schema=DATABASE_SCHEMA)
+        op.create_primary_key(
+            f"{table_name}_pkey",
+            table_name,
+            ["id", "timestamp"],
+            schema=DATABASE_SCHEMA,
+        )
+        for index_name, columns in SENSOR_INDEXES:
+            op.create_index(
+                index_name.format(table_name=table_name),
+                table_name,
+                columns,
+                schema=DATABASE_SCHEMA,
+            )
+        op.execute(
+            f"CREATE TABLE {qualified(f'{table_name}_default')} "
+            f"PARTITION OF {qualified(table_name)} DEFAULT"
+        )
+
+        first = conn.execute(
+            sa.text(f'SELECT MIN("timestamp") FROM {qualified(unpartitioned)}')
+        ).scalar()
+        ensure_partitions(conn, table_name, first if first is not None else now, end)
+
+        # Readings without a timestamp cannot be placed in a partition
+        op.execute(
+            f"INSERT INTO {qualified(table_name)} "
+            f'SELECT * FROM {qualified(unpartitioned)} WHERE "timestamp" IS NOT NULL'
+        )
+        op.drop_table(unpartitioned, schema=DATABASE_SCHEMA)
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    if conn.dialect.name != "postgresql":
+        return
+
+    for table_name in SENSOR_TABLES:
+        if not is_partitioned(conn, table_name):
+            continue
+
+        unpartitioned = f"{table_name}_unpartitioned"
+        op.execute(
+            f"CREATE TABLE {qualified(unpartitioned)} "
+            f"(LIKE {qualified(table_name)} INCLUDING DEFAULTS)"
+        )
+        op.execute(
+            f"INSERT INTO {qualified(unpartitioned)} "
+            f"SELECT * FROM {qualified(table_name)}"
+        )
+
+        # Dropping the partitioned table drops every partition with it
+        op.drop_table(table_name, schema=DATABASE_SCHEMA)
+        op.rename_table(unpartitioned, table_name, schema=DATABASE_SCHEMA)
+        op.alter_column(table_name, "timestamp", nullable=True, schema=DATABASE_SCHEMA)
+        op.create_primary_key(
+            f"{table_name}_pkey", table_name, ["id"], schema=DATABASE_SCHEMA
+        )
+        for index_name, columns in SENSOR_INDEXES:
+            op.create_index(
+                index_name.format(table_name=table_name),
+                table_name,
+                columns,
+                schema=DATABASE_SCHEMA,
+            )
@@ -0,0 +1,80 @@
+"""add sensor indexes
+
+Revision ID: 8d6f54a8e00b
+Revises: 380e97e790f2
+Create Date: 2026-10-18 09:12:41.503118
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import solar_panel.internal.db
+from solar_panel.migrations.util import get_existing_indexes
+
+revision: str = "8d6f54a8e00b"
+down_revision: Union[str, None] = "380e97e790f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SENSOR_INDEXES = {
+    "pzems": [
+        ("ix_pzems_device_id_timestamp", ["device_id", "timestamp"]),
+        ("ix_pzems_timestamp", ["timestamp"]),
+    ],
+    "ddsus": [
+        ("ix_ddsus_device_id_timestamp", ["device_id", "timestamp"]),
+        ("ix_ddsus_timestamp", ["timestamp"]),
+    ],
+    "shts": [
+        ("ix_shts_device_id_timestamp", ["device_id", "timestamp"]),
+        ("ix_shts_timestamp", ["timestamp"]),
+    ],
+}
+
+
+def upgrade() -> None:
+    is_postgresql = op.get_bind().dialect.name == "postgresql"
+
+    for table_name, indexes in SENSOR_INDEXES.items():
+        existing_indexes = get_existing_indexes(table_name)
+
+        for index_name, columns in indexes:
+            if index_name in existing_indexes:
+                continue
+
+            if is_postgresql:
+                # CREATE INDEX CONCURRENTLY cannot run inside a transaction,
+                # but it keeps the table writable while the index is built.
+                with op.get_context().autocommit_block():
+                    op.create_index(
+                        index_name,
+                        table_name,
+                        columns,
+                        postgresql_concurrently=True,
+                    )
+            else:
+                op.create_index(index_name, table_name, columns)
+
+
+def downgrade() -> None:
+    is_postgresql = op.get_bind().dialect.name == "postgresql"
+
+    for table_name, indexes in SENSOR_INDEXES.items():
+        existing_indexes = get_existing_indexes(table_name)
+
+        for index_name, _ in indexes:
+            if index_name not in existing_indexes:
+                continue
+
+            if is_postgresql:
+                with op.get_context().autocommit_block():
+                    op.drop_index(
+                        index_name,
+                        table_name=table_name,
+                        postgresql_concurrently=True,
+                    )
+            else:
+                op.drop_index(index_name, table_name=table_name)
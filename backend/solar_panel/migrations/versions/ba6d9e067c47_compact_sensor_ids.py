@@ -0,0 +1,79 @@
+"""compact sensor ids
+
+Revision ID: ba6d9e067c47
+Revises: 03f29b0093ec
+Create Date: 2026-10-18 12:26:05.117640
+
+"""
+
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+import solar_panel.internal.db
+
+revision: str = "ba6d9e067c47"
+down_revision: Union[str, None] = "03f29b0093ec"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SENSOR_TABLES = ["pzems", "ddsus", "shts"]
+
+
+def register_sqlite_function(name, fn):
+    # SQLite only gained unhex() in 3.41, so the conversion runs in Python
+    driver_connection = op.get_bind().connection.driver_connection
+    driver_connection.create_function(name, 1, fn, deterministic=True)
+
+
+def uuid_to_bytes(value):
+    return uuid.UUID(value).bytes if isinstance(value, str) else value
+
+
+def bytes_to_uuid(value):
+    return str(uuid.UUID(bytes=value)) if isinstance(value, bytes) else value
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        for table_name in SENSOR_TABLES:
+            op.alter_column(
+                table_name,
+                "id",
+                type_=postgresql.UUID(as_uuid=False),
+                existing_type=sa.Text(),
+                postgresql_using="id::uuid",
+            )
+        return
+
+    register_sqlite_function("uuid_to_bytes", uuid_to_bytes)
+    for table_name in SENSOR_TABLES:
+        op.execute(f"UPDATE {table_name} SET id = uuid_to_bytes(id)")
+        with op.batch_alter_table(table_name, recreate="always") as batch_op:
+            batch_op.alter_column(
+                "id", type_=sa.LargeBinary(16), existing_type=sa.Text()
+            )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        for table_name in SENSOR_TABLES:
+            op.alter_column(
+                table_name,
+                "id",
+                type_=sa.Text(),
+                existing_type=postgresql.UUID(as_uuid=False),
+                postgresql_using="id::text",
+            )
+        return
+
+    register_sqlite_function("bytes_to_uuid", bytes_to_uuid)
+    for table_name in SENSOR_TABLES:
+        op.execute(f"UPDATE {table_name} SET id = bytes_to_uuid(id)")
+        with op.batch_alter_table(table_name, recreate="always") as batch_op:
+            batch_op.alter_column(
+                "id", type_=sa.Text(), existing_type=sa.LargeBinary(16)
+            )
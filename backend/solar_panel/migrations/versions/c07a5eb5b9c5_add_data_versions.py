@@ -0,0 +1,46 @@
+"""add data versions
+
+Revision ID: c07a5eb5b9c5
+Revises: 5e0c3f7a9b21
+Create Date: 2026-10-18 15:08:33.671904
+
+"""
+
+import time
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import solar_panel.internal.db
+from solar_panel.migrations.util import get_existing_tables
+
+revision: str = "c07a5eb5b9c5"
+down_revision: Union[str, None] = "5e0c3f7a9b21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+DATASETS = ["pzems", "ddsus", "shts", "devices"]
+
+
+def upgrade() -> None:
+    if "data_versions" in get_existing_tables():
+        return
+
+    data_versions = op.create_table(
+        "data_versions",
+        sa.Column("name", sa.Text(), nullable=False),
+        sa.Column("version", sa.BIGINT(), nullable=False),
+        sa.Column("updated_at", sa.BIGINT(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+    now = int(time.time())
+    op.bulk_insert(
+        data_versions,
+        [{"name": name, "version": 1, "updated_at": now} for name in DATASETS],
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("data_versions")
@@ -0,0 +1,62 @@
+"""add energy daily
+
+Revision ID: e4b1d2a6f830
+Revises: c07a5eb5b9c5
+Create Date: 2026-10-18 17:21:46.305118
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import solar_panel.internal.db
+from solar_panel.migrations.util import get_existing_tables
+
+revision: str = "e4b1d2a6f830"
+down_revision: Union[str, None] = "c07a5eb5b9c5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ENERGY_SENSORS = ["pzems", "ddsus"]
+
+
+def upgrade() -> None:
+    existing_tables = set(get_existing_tables())
+
+    if "energy_daily" not in existing_tables:
+        op.create_table(
+            "energy_daily",
+            sa.Column("sensor", sa.Text(), nullable=False),
+            sa.Column("device_id", sa.INTEGER(), nullable=False),
+            sa.Column("timestamp", sa.BIGINT(), nullable=False),
+            sa.Column("energy", sa.FLOAT(), nullable=False),
+            sa.Column("count", sa.BIGINT(), nullable=False),
+            sa.Column("resets", sa.INTEGER(), nullable=False),
+            sa.PrimaryKeyConstraint("sensor", "device_id", "timestamp"),
+        )
+
+    if "energy_pending" not in existing_tables:
+        op.create_table(
+            "energy_pending",
+            sa.Column("sensor", sa.Text(), nullable=False),
+            sa.Column("device_id", sa.INTEGER(), nullable=False),
+            sa.Column("since", sa.BIGINT(), nullable=False),
+            sa.Column("revision", sa.BIGINT(), nullable=False),
+            sa.PrimaryKeyConstraint("sensor", "device_id"),
+        )
+
+        # Every device with readings so far gets its totals computed on the
+        # first read
+        for sensor in ENERGY_SENSORS:
+            op.execute(
+                f"INSERT INTO energy_pending (sensor, device_id, since, revision) "
+                f"SELECT '{sensor}', device_id, 0, 1 FROM {sensor} "
+                f"WHERE device_id IS NOT NULL GROUP BY device_id"
+            )
+
+
+def downgrade() -> None:
+    op.drop_table("energy_pending")
+    op.drop_table("energy_daily")
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+from enum import Enum
+
+from solar_panel.env import SRC_LOG_LEVELS
+from solar_panel.models.ddsus import DDSU_METRICS, Ddsu
+from solar_panel.models.pzems import PZEM_METRICS, Pzem
+from solar_panel.models.shts import SHT_METRICS, Sht
+from solar_panel.utils.analytics import (
+    detect_peaks,
+    load_duration_curve,
+    load_series,
+    moving_average,
+    series_statistics,
+)
+
+from typing import Optional
+from pydantic import BaseModel
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+class AnalyticsSensor(str, Enum):
+    PZEM = "pzems"
+    DDSU = "ddsus"
+    SHT = "shts"
+
+
+ANALYTICS_TABLES = {
+    AnalyticsSensor.PZEM: (Pzem, PZEM_METRICS),
+    AnalyticsSensor.DDSU: (Ddsu, DDSU_METRICS),
+    AnalyticsSensor.SHT: (Sht, SHT_METRICS),
+}
+
+
+####################
+# Forms
+####################
+
+
+class SeriesStatisticsResponse(BaseModel):
+    device_id: int
+    metric: str
+
+    count: int
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    percentiles: dict[str, Optional[float]]
+
+
+class LoadDurationPoint(BaseModel):
+    fraction: float  # share of the time the value was met or exceeded
+    value: float
+
+
+class SeriesPoint(BaseModel):
+    timestamp: int
+    value: float
+
+
+class AnalyticsTable:
+    """
+    Unlike the other tables, the methods are coroutines: rows are streamed
+    from the async engine and the NumPy work runs in a worker thread, so a
+    long series does not hold the event loop.
+    """
+
+    async def _load_series(
+        self,
+        sensor: AnalyticsSensor,
+        metric: str,
+        device_id: int,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ):
+        table, metrics = ANALYTICS_TABLES[sensor]
+        if metric not in metrics:
+            raise ValueError(
+                f"Unknown metric '{metric}' for {sensor.value}, expected one of "
+                f"{', '.join(metrics)}"
+            )
+
+        return await load_series(table, metric, device_id, start=start, end=end)
+
+    async def get_statistics(
+        self,
+        sensor: AnalyticsSensor,
+        metric: str,
+        device_id: int,
+        percentiles: list[float],
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> SeriesStatisticsResponse:
+        _, values = await self._load_series(sensor, metric, device_id, start, end)
+        statistics = await asyncio.to_thread(series_statistics, values, percentiles)
+        return SeriesStatisticsResponse(
+            device_id=device_id,
+            metric=metric,
+            **statistics,
+        )
+
+    async def get_load_duration_curve(
+        self,
+        sensor: AnalyticsSensor,
+        metric: str,
+        device_id: int,
+        points: int,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> list[LoadDurationPoint]:
+        timestamps, values = await self._load_series(
+            sensor, metric, device_id, start, end
+        )
+        curve = await asyncio.to_thread(load_duration_curve, timestamps, values, points)
+        return [LoadDurationPoint(**point) for point in curve]
+
+    async def get_peaks(
+        self,
+        sensor: AnalyticsSensor,
+        metric: str,
+        device_id: int,
+        threshold: Optional[float] = None,
+        limit: int = 10,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> list[SeriesPoint]:
+        timestamps, values = await self._load_series(
+            sensor, metric, device_id, start, end
+        )
+        peaks = await asyncio.to_thread(
+            detect_peaks, timestamps, values, threshold, limit
+        )
+        return [SeriesPoint(**point) for point in peaks]
+
+    async def get_moving_average(
+        self,
+        sensor: AnalyticsSensor,
+        metric: str,
+        device_id: int,
+        window: int,
+        max_points: int,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> list[SeriesPoint]:
+        timestamps, values = await self._load_series(
+            sensor, metric, device_id, start, end
+        )
+        averages = await asyncio.to_thread(
+            moving_average, timestamps, values, window, max_points
+        )
+        return [SeriesPoint(**point) for point in averages]
+
+
+Analytics = AnalyticsTable()
@@ -0,0 +1,68 @@
+import logging
+import time
+
+from solar_panel.env import SRC_LOG_LEVELS
+from solar_panel.internal.db import AsyncTable
+from solar_panel.models.ddsus import Ddsus, DdsuAggregateModel
+from solar_panel.models.devices import DeviceModel, Devices
+from solar_panel.models.latest import Latest, LatestReadingsResponse
+from solar_panel.models.pzems import Pzems, PzemAggregateModel
+from solar_panel.models.shts import Shts, ShtAggregateModel
+from solar_panel.utils.aggregation import Bucket
+
+from pydantic import BaseModel
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+####################
+# Forms
+####################
+
+
+class DashboardSeries(BaseModel):
+    pzems: list[PzemAggregateModel]
+    ddsus: list[DdsuAggregateModel]
+    shts: list[ShtAggregateModel]
+
+
+class DashboardResponse(BaseModel):
+    start: int
+    end: int
+    bucket: Bucket
+
+    devices: list[DeviceModel]
+    latest: LatestReadingsResponse
+    series: DashboardSeries
+
+
+class DashboardTable:
+    """
+    Everything the dashboard needs on load in one call. Devices come from the
+    device registry and latest readings from the latest cache; the series are
+    one aggregate query per sensor type, served from the rollup tables for
+    hour and coarser buckets. Run through AsyncDashboard, all of them share
+    the single session run_async() opens.
+    """
+
+    def get_dashboard(self, seconds: int, bucket: Bucket) -> DashboardResponse:
+        end = int(time.time())
+        start = end - seconds
+
+        return DashboardResponse(
+            start=start,
+            end=end,
+            bucket=bucket,
+            devices=Devices.get_devices(),
+            latest=Latest.get_latest(),
+            series=DashboardSeries(
+                pzems=Pzems.aggregate_pzems(bucket, start=start, end=end),
+                ddsus=Ddsus.aggregate_ddsus(bucket, start=start, end=end),
+                shts=Shts.aggregate_shts(bucket, start=start, end=end),
+            ),
+        )
+
+
+Dashboard = DashboardTable()
+AsyncDashboard = AsyncTable(Dashboard)
@@ -1,14 +1,36 @@
 import logging
 import time
-import uuid
 
 from solar_panel.env import SRC_LOG_LEVELS
-from solar_panel.internal.db import Base, get_db
+from solar_panel.internal.db import AsyncTable, Base, UUIDField, get_db
+from solar_panel.utils.aggregation import Bucket, MetricAggregate, aggregate_rows
+from solar_panel.utils.columnar import rows_to_columns
+from solar_panel.utils.energy import clear_energy
+from solar_panel.utils.ids import uuid7
+from solar_panel.utils.ingest import BulkItemStatus, bulk_insert_items
+from solar_panel.utils.readings import notify_changed, notify_inserted
+from solar_panel.utils.rollups import (
+    DAILY_SECONDS,
+    HOURLY_SECONDS,
+    aggregate_rollup_rows,
+    apply_rollups,
+    backfill_rollup,
+    pick_rollup,
+    rollup_model,
+)
 
 from typing import Optional
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, Double, Integer, Text
-
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Double,
+    Index,
+    Integer,
+    and_,
+    or_,
+    select,
+)
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -17,7 +39,7 @@ log.setLevel(SRC_LOG_LEVELS["MODELS"])
 class Ddsu(Base):
     __tablename__ = "ddsus"
 
-    id = Column(Text, unique=True, primary_key=True)
+    id = Column(UUIDField, unique=True, primary_key=True)
     device_id = Column(Integer)
 
     voltage = Column(Double)
@@ -29,6 +51,11 @@ class Ddsu(Base):
 
     timestamp = Column(BigInteger)
 
+    __table_args__ = (
+        Index("ix_ddsus_device_id_timestamp", "device_id", "timestamp"),
+        Index("ix_ddsus_timestamp", "timestamp"),
+    )
+
 
 class DdsuModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -46,6 +73,38 @@ class DdsuModel(BaseModel):
     timestamp: int
 
 
+DDSU_METRICS = ["voltage", "current", "power", "energy", "frequency", "power_factor"]
+DDSU_COLUMNS = [
+    "id",
+    "device_id",
+    "voltage",
+    "current",
+    "power",
+    "frequency",
+    "power_factor",
+    "energy",
+    "timestamp",
+]
+
+DdsuHourly = rollup_model("DdsuHourly", "ddsus_hourly", DDSU_METRICS, HOURLY_SECONDS)
+DdsuDaily = rollup_model("DdsuDaily", "ddsus_daily", DDSU_METRICS, DAILY_SECONDS)
+
+DDSU_ROLLUPS = [DdsuHourly, DdsuDaily]
+
+
+class DdsuAggregateModel(BaseModel):
+    timestamp: int  # bucket start in epoch
+    device_id: int
+    count: int
+
+    voltage: MetricAggregate
+    current: MetricAggregate
+    power: MetricAggregate
+    energy: MetricAggregate
+    frequency: MetricAggregate
+    power_factor: MetricAggregate
+
+
 ####################
 # Forms
 ####################
@@ -91,13 +150,15 @@ class DdsuTable:
             ddsu = DdsuModel(
                 **{
                     **form_data.model_dump(exclude_none=True),
-                    "id": str(uuid.uuid4()),
+                    "id": uuid7(),
                 }
             )
 
             try:
                 result = Ddsu(**ddsu.model_dump())
                 db.add(result)
+                apply_rollups(db, DDSU_ROLLUPS, [ddsu.model_dump()])
+                notify_inserted(db, "ddsus", [ddsu.model_dump()])
                 db.commit()
                 db.refresh(result)
                 if result:
@@ -108,13 +169,176 @@ class DdsuTable:
             except Exception:
                 return None
 
-    def get_ddsus(self):
+    def bulk_insert_ddsus(self, db, items: list[dict]) -> list[BulkItemStatus]:
+        """
+        Validate and insert a batch inside the caller's transaction; the caller
+        commits. Items that are not valid readings are reported as failed.
+        """
+        return bulk_insert_items(db, Ddsu, DDSU_ROLLUPS, DdsuForm, items)
+
+    def insert_new_ddsus(self, items: list[dict]) -> list[BulkItemStatus]:
+        with get_db() as db:
+            results = self.bulk_insert_ddsus(db, items)
+            db.commit()
+            return results
+
+    def _history_filters(
+        self,
+        device_id: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+    ) -> list:
+        filters = []
+
+        if device_id is not None:
+            filters.append(Ddsu.device_id == device_id)
+        if start is not None:
+            filters.append(Ddsu.timestamp >= start)
+        if end is not None:
+            filters.append(Ddsu.timestamp <= end)
+        if cursor is not None:
+            # Keyset pagination: resume strictly after the last (timestamp, id) seen.
+            # The plain upper bound lets PostgreSQL prune later monthly partitions.
+            timestamp, id = cursor
+            filters.append(Ddsu.timestamp <= timestamp)
+            filters.append(
+                or_(
+                    Ddsu.timestamp < timestamp,
+                    and_(Ddsu.timestamp == timestamp, Ddsu.id < id),
+                )
+            )
+
+        return filters
+
+    def _history_query(
+        self,
+        db,
+        device_id: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+        limit: Optional[int] = None,
+        columns: Optional[list] = None,
+    ):
+        query = db.query(*columns) if columns else db.query(Ddsu)
+        query = query.filter(*self._history_filters(device_id, start, end, cursor))
+
+        query = query.order_by(Ddsu.timestamp.desc(), Ddsu.id.desc())
+        if limit is not None:
+            query = query.limit(limit)
+
+        return query
+
+    def history_statement(
+        self,
+        device_id: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+        limit: Optional[int] = None,
+    ):
+        """The history query as a Core SELECT of DDSU_COLUMNS, for streaming."""
+        statement = (
+            select(*[getattr(Ddsu, column) for column in DDSU_COLUMNS])
+            .where(*self._history_filters(device_id, start, end, cursor))
+            .order_by(Ddsu.timestamp.desc(), Ddsu.id.desc())
+        )
+        if limit is not None:
+            statement = statement.limit(limit)
+
+        return statement
+
+    def get_ddsus(
+        self,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+        limit: Optional[int] = None,
+    ) -> list[DdsuModel]:
         with get_db() as db:
             return [
                 DdsuModel.model_validate(ddsu)
-                for ddsu in db.query(Ddsu).order_by(Ddsu.timestamp.desc()).all()
+                for ddsu in self._history_query(
+                    db, start=start, end=end, cursor=cursor, limit=limit
+                ).all()
             ]
 
+    def aggregate_ddsus(
+        self,
+        bucket: Bucket,
+        device_id: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> list[DdsuAggregateModel]:
+        with get_db() as db:
+            rollup = pick_rollup(DDSU_ROLLUPS, bucket)
+            if rollup is not None:
+                rows = aggregate_rollup_rows(
+                    db, rollup, bucket, device_id=device_id, start=start, end=end
+                )
+            else:
+                rows = aggregate_rows(
+                    db,
+                    Ddsu,
+                    DDSU_METRICS,
+                    bucket,
+                    device_id=device_id,
+                    start=start,
+                    end=end,
+                )
+            return [DdsuAggregateModel.model_validate(row) for row in rows]
+
+    def backfill_ddsu_rollups(
+        self, start: Optional[int] = None, end: Optional[int] = None
+    ) -> int:
+        with get_db() as db:
+            buckets = sum(
+                backfill_rollup(db, Ddsu, rollup, start=start, end=end)
+                for rollup in DDSU_ROLLUPS
+            )
+            db.commit()
+            return buckets
+
+    def _rebuild_rollups(self, db, timestamps: set):
+        # Re-aggregate only the buckets touched by an update or delete
+        for timestamp in timestamps - {None}:
+            for rollup in DDSU_ROLLUPS:
+                backfill_rollup(db, Ddsu, rollup, start=timestamp, end=timestamp)
+
+    def get_ddsu_rows(
+        self,
+        device_id: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+        limit: Optional[int] = None,
+    ) -> list:
+        """History as plain DDSU_COLUMNS rows, without ORM or Pydantic objects."""
+        with get_db() as db:
+            return self._history_query(
+                db,
+                device_id=device_id,
+                start=start,
+                end=end,
+                cursor=cursor,
+                limit=limit,
+                columns=[getattr(Ddsu, column) for column in DDSU_COLUMNS],
+            ).all()
+
+    def get_ddsu_columns(
+        self,
+        device_id: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+        limit: Optional[int] = None,
+    ) -> dict[str, list]:
+        rows = self.get_ddsu_rows(
+            device_id=device_id, start=start, end=end, cursor=cursor, limit=limit
+        )
+        return rows_to_columns(DDSU_COLUMNS, rows)
+
     def get_ddsu_by_id(self, id: str) -> Optional[DdsuModel]:
         try:
             with get_db() as db:
@@ -123,10 +347,24 @@ class DdsuTable:
         except Exception:
             return None
 
-    def get_ddsu_by_device_id(self, device_id: str) -> Optional[list[DdsuModel]]:
+    def get_ddsu_by_device_id(
+        self,
+        device_id: int,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+        limit: Optional[int] = None,
+    ) -> Optional[list[DdsuModel]]:
         try:
             with get_db() as db:
-                ddsus = db.query(Ddsu).filter_by(device_id=device_id).all()
+                ddsus = self._history_query(
+                    db,
+                    device_id=device_id,
+                    start=start,
+                    end=end,
+                    cursor=cursor,
+                    limit=limit,
+                ).all()
                 return (
                     [DdsuModel.model_validate(ddsu) for ddsu in ddsus]
                     if ddsus
@@ -135,16 +373,30 @@ class DdsuTable:
         except Exception:
             return None
 
+    def get_latest_ddsu_by_device_id(self, device_id: int) -> Optional[DdsuModel]:
+        with get_db() as db:
+            ddsu = self._history_query(db, device_id=device_id, limit=1).first()
+            return DdsuModel.model_validate(ddsu) if ddsu else None
+
     def update_ddsu_by_id(
         self, id: str, form_data: DdsuUpdateForm, overwrite: bool = False
     ) -> Optional[DdsuModel]:
         try:
             with get_db() as db:
+                previous = (
+                    db.query(Ddsu.device_id, Ddsu.timestamp).filter_by(id=id).first()
+                )
                 db.query(Ddsu).filter_by(id=id).update(
                     {
                         **form_data.model_dump(exclude_none=True),
                     }
                 )
+                current = (
+                    db.query(Ddsu.device_id, Ddsu.timestamp).filter_by(id=id).first()
+                )
+                changed = [row._asdict() for row in (previous, current) if row]
+                self._rebuild_rollups(db, {row["timestamp"] for row in changed})
+                notify_changed(db, "ddsus", changed)
                 db.commit()
                 return self.get_ddsu_by_id(id=id)
         except Exception as e:
@@ -154,7 +406,13 @@ class DdsuTable:
     def delete_ddsu_by_id(self, id: str) -> bool:
         try:
             with get_db() as db:
+                previous = (
+                    db.query(Ddsu.device_id, Ddsu.timestamp).filter_by(id=id).first()
+                )
                 db.query(Ddsu).filter_by(id=id).delete()
+                changed = [previous._asdict()] if previous else []
+                self._rebuild_rollups(db, {row["timestamp"] for row in changed})
+                notify_changed(db, "ddsus", changed)
                 db.commit()
                 return True
         except Exception:
@@ -164,6 +422,10 @@ class DdsuTable:
         with get_db() as db:
             try:
                 db.query(Ddsu).delete()
+                for rollup in DDSU_ROLLUPS:
+                    db.query(rollup).delete()
+                clear_energy(db, "ddsus")
+                notify_changed(db, "ddsus")
                 db.commit()
 
                 return True
@@ -172,3 +434,4 @@ class DdsuTable:
 
 
 Ddsus = DdsuTable()
+AsyncDdsus = AsyncTable(Ddsus)
@@ -1,9 +1,11 @@
 import logging
+import threading
 import time
 import uuid
 
-from solar_panel.env import SRC_LOG_LEVELS
-from solar_panel.internal.db import Base, get_db
+from solar_panel.env import DEVICE_REGISTRY_TTL, SRC_LOG_LEVELS
+from solar_panel.internal.db import AsyncTable, Base, get_db
+from solar_panel.models.versions import DataVersion, DataVersionModel, touch_version
 
 from typing import Optional
 from pydantic import BaseModel, ConfigDict
@@ -55,6 +57,62 @@ class DeviceUpdateForm(DeviceForm):
 
 
 class DeviceTable:
+    """
+    The devices table is tiny and rarely written, so reads are served from an
+    in-process registry. Writes through this class drop it right away; writes
+    from other workers are noticed within DEVICE_REGISTRY_TTL seconds, when
+    the registry compares its version with the devices row in data_versions.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._devices: Optional[dict[int, DeviceModel]] = None
+        self._version: Optional[DataVersionModel] = None
+        self._checked_at = 0.0
+        self._generation = 0
+
+    def _registry(self) -> dict[int, DeviceModel]:
+        devices = self._devices
+        if (
+            devices is not None
+            and time.monotonic() - self._checked_at < DEVICE_REGISTRY_TTL
+        ):
+            return devices
+
+        generation = self._generation
+        with get_db() as db:
+            # Read the version first: a write landing in between only causes
+            # one more reload on the next check
+            version = db.get(DataVersion, "devices")
+            version = DataVersionModel.model_validate(version) if version else None
+
+            if devices is None or version != self._version:
+                devices = {
+                    device.id: DeviceModel.model_validate(device)
+                    for device in db.query(Device).all()
+                }
+
+        with self._lock:
+            # Unless a local write invalidated the registry while loading
+            if generation == self._generation:
+                self._devices = devices
+                self._version = version
+                self._checked_at = time.monotonic()
+        return devices
+
+    def _invalidate(self):
+        with self._lock:
+            self._devices = None
+            self._generation += 1
+
+    def load_devices(self) -> int:
+        self._invalidate()
+        return len(self._registry())
+
+    def get_devices_version(self) -> Optional[DataVersionModel]:
+        self._registry()
+        return self._version
+
     def insert_new_device(self, form_data: DeviceForm):
         with get_db() as db:
             device = DeviceModel(
@@ -66,7 +124,9 @@ class DeviceTable:
             try:
                 result = Device(**device.model_dump())
                 db.add(result)
+                touch_version(db, "devices")
                 db.commit()
+                self._invalidate()
                 db.refresh(result)
                 if result:
                     return DeviceModel.model_validate(result)
@@ -77,16 +137,11 @@ class DeviceTable:
                 return None
 
     def get_devices(self):
-        with get_db() as db:
-            return [
-                DeviceModel.model_validate(device) for device in db.query(Device).all()
-            ]
+        return list(self._registry().values())
 
     def get_device_by_id(self, id: int) -> Optional[DeviceModel]:
         try:
-            with get_db() as db:
-                device = db.query(Device).filter_by(id=id).first()
-                return DeviceModel.model_validate(device) if device else None
+            return self._registry().get(id)
         except Exception:
             return None
 
@@ -100,7 +155,9 @@ class DeviceTable:
                         **form_data.model_dump(exclude_none=True),
                     }
                 )
+                touch_version(db, "devices")
                 db.commit()
+                self._invalidate()
                 return self.get_device_by_id(id=id)
         except Exception as e:
             log.exception(e)
@@ -110,7 +167,9 @@ class DeviceTable:
         try:
             with get_db() as db:
                 db.query(Device).filter_by(id=id).delete()
+                touch_version(db, "devices")
                 db.commit()
+                self._invalidate()
                 return True
         except Exception:
             return False
@@ -119,7 +178,9 @@ class DeviceTable:
         with get_db() as db:
             try:
                 db.query(Device).delete()
+                touch_version(db, "devices")
                 db.commit()
+                self._invalidate()
 
                 return True
             except Exception:
@@ -127,3 +188,4 @@ class DeviceTable:
 
 
 Devices = DeviceTable()
+AsyncDevices = AsyncTable(Devices)
@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import time
+from enum import Enum
+
+from solar_panel.env import (
+    BALANCE_GRID_DEVICE_ID,
+    BALANCE_LOAD_DEVICE_IDS,
+    BALANCE_PV_DEVICE_ID,
+    SRC_LOG_LEVELS,
+)
+from solar_panel.internal.db import AsyncTable, get_db
+from solar_panel.models.ddsus import Ddsu
+from solar_panel.models.pzems import Pzem
+from solar_panel.utils.aggregation import (
+    Bucket,
+    bucket_ceiling,
+    bucket_expression,
+    bucket_floor,
+)
+from solar_panel.utils.balance import (
+    asof,
+    balance_buckets,
+    load_device_series,
+    time_grid,
+)
+from solar_panel.utils.energy import (
+    EnergyDaily,
+    aggregate_deltas,
+    interval_deltas,
+    mark_energy_stale,
+    refresh_energy,
+)
+
+from typing import Optional
+from pydantic import BaseModel
+from sqlalchemy import func
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+class EnergySensor(str, Enum):
+    PZEM = "pzems"
+    DDSU = "ddsus"
+
+
+ENERGY_TABLES = {EnergySensor.PZEM: Pzem, EnergySensor.DDSU: Ddsu}
+
+
+####################
+# Forms
+####################
+
+
+class EnergyYieldModel(BaseModel):
+    timestamp: int  # bucket start in epoch
+    device_id: int
+
+    energy: float  # counter increase over the bucket
+    count: int  # intervals between readings
+    resets: int  # counter resets and rollovers
+
+
+class EnergyYieldResponse(BaseModel):
+    sensor: EnergySensor
+    bucket: Bucket
+    total: float
+    yields: list[EnergyYieldModel]
+
+
+class LoadShare(BaseModel):
+    device_id: int
+    energy: Optional[float] = None  # None when the meter had no readings
+
+
+class BalanceBucketModel(BaseModel):
+    timestamp: int  # bucket start in epoch
+    count: int  # grid points with both PV and grid readings
+
+    # Energies in Wh
+    pv: float
+    grid_import: float
+    export: float
+    self_consumed: float
+    load: float
+    loads: list[LoadShare]
+    other: float  # load not covered by the load meters
+
+    self_consumption_ratio: Optional[float] = None  # self_consumed / pv
+    self_sufficiency_ratio: Optional[float] = None  # self_consumed / load
+
+
+class BalanceResponse(BaseModel):
+    start: int
+    end: int
+    bucket: Bucket
+    step: int
+    tolerance: int
+
+    pv_device_id: int
+    grid_device_id: int
+    load_device_ids: list[int]
+    series: list[BalanceBucketModel]
+
+
+class EnergyTable:
+    def get_yields(
+        self,
+        sensor: EnergySensor,
+        bucket: Bucket = Bucket.DAY,
+        device_id: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> EnergyYieldResponse:
+        """
+        Energy per bucket and device. Day and month buckets are summed from
+        the cached daily totals, which are refreshed first. Finer buckets are
+        computed from the raw readings. Either way the start/end bounds
+        select whole buckets, as in /aggregate.
+        """
+        table = ENERGY_TABLES[sensor]
+        if start is not None:
+            start = bucket_floor(start, bucket)
+        if end is not None:
+            end = bucket_ceiling(end, bucket) - 1
+
+        with get_db() as db:
+            dialect = db.get_bind().dialect.name
+            if bucket in (Bucket.DAY, Bucket.MONTH):
+                refresh_energy(db, table, sensor.value, device_id=device_id)
+
+                bucket_column = bucket_expression(
+                    EnergyDaily.timestamp, bucket, dialect
+                )
+                query = db.query(
+                    bucket_column.label("timestamp"),
+                    EnergyDaily.device_id,
+                    func.sum(EnergyDaily.energy).label("energy"),
+                    func.sum(EnergyDaily.count).label("count"),
+                    func.sum(EnergyDaily.resets).label("resets"),
+                ).filter(EnergyDaily.sensor == sensor.value)
+                if device_id is not None:
+                    query = query.filter(EnergyDaily.device_id == device_id)
+                if start is not None:
+                    query = query.filter(EnergyDaily.timestamp >= start)
+                if end is not None:
+                    query = query.filter(EnergyDaily.timestamp <= end)
+
+                rows = (
+                    query.group_by(bucket_column, EnergyDaily.device_id)
+                    .order_by(bucket_column, EnergyDaily.device_id)
+                    .all()
+                )
+            else:
+                deltas = interval_deltas(
+                    table, sensor.value, device_id=device_id, start=start, end=end
+                )
+                rows = db.execute(aggregate_deltas(deltas, bucket, dialect)).all()
+
+            yields = [EnergyYieldModel.model_validate(row._asdict()) for row in rows]
+            return EnergyYieldResponse(
+                sensor=sensor,
+                bucket=bucket,
+                total=sum(item.energy for item in yields),
+                yields=yields,
+            )
+
+    def rebuild_energy(self, sensor: EnergySensor) -> int:
+        """Recompute every cached daily total of a sensor from raw readings."""
+        table = ENERGY_TABLES[sensor]
+
+        with get_db() as db:
+            device_ids = db.query(table.device_id).distinct().all()
+            mark_energy_stale(
+                db,
+                sensor.value,
+                [
+                    {"device_id": device_id, "timestamp": 0}
+                    for (device_id,) in device_ids
+                ],
+            )
+            db.commit()
+            return refresh_energy(db, table, sensor.value)
+
+    async def get_balance(
+        self, seconds: int, bucket: Bucket, step: int, tolerance: int
+    ) -> BalanceResponse:
+        """
+        Self-consumption and grid balance over the last `seconds`, from the
+        PV (PZEM), grid and load (DDSU) meters aligned onto one time grid.
+        A coroutine, unlike the other methods: the series are streamed from
+        the async engine and aligned in a worker thread, so a long range
+        does not hold the event loop.
+        """
+        end = int(time.time())
+        start = end - seconds
+
+        # Reach back by the tolerance so the first grid points can be filled
+        # from readings just before the range
+        pv = await load_device_series(
+            Pzem, "power", [BALANCE_PV_DEVICE_ID], start - tolerance, end
+        )
+        ddsus = await load_device_series(
+            Ddsu,
+            "power",
+            [BALANCE_GRID_DEVICE_ID, *BALANCE_LOAD_DEVICE_IDS],
+            start - tolerance,
+            end,
+        )
+
+        def align() -> list[dict]:
+            grid = time_grid(start, end, step)
+            return balance_buckets(
+                grid,
+                asof(grid, *pv[BALANCE_PV_DEVICE_ID], tolerance),
+                asof(grid, *ddsus[BALANCE_GRID_DEVICE_ID], tolerance),
+                {
+                    device_id: asof(grid, *ddsus[device_id], tolerance)
+                    for device_id in BALANCE_LOAD_DEVICE_IDS
+                },
+                step,
+                bucket,
+            )
+
+        series = await asyncio.to_thread(align)
+
+        return BalanceResponse(
+            start=start,
+            end=end,
+            bucket=bucket,
+            step=step,
+            tolerance=tolerance,
+            pv_device_id=BALANCE_PV_DEVICE_ID,
+            grid_device_id=BALANCE_GRID_DEVICE_ID,
+            load_device_ids=BALANCE_LOAD_DEVICE_IDS,
+            series=[BalanceBucketModel(**item) for item in series],
+        )
+
+
+Energy = EnergyTable()
+AsyncEnergy = AsyncTable(Energy)
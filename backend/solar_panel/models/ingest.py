@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from solar_panel.env import (
+    INGEST_BUFFER_ENABLED,
+    INGEST_BUFFER_SIZE,
+    INGEST_FLUSH_INTERVAL_MS,
+    INGEST_FLUSH_ROWS,
+    SRC_LOG_LEVELS,
+)
+from solar_panel.internal.db import AsyncTable, get_db
+from solar_panel.models.ddsus import DDSU_ROLLUPS, Ddsu, Ddsus
+from solar_panel.models.pzems import PZEM_ROLLUPS, Pzem, Pzems
+from solar_panel.models.shts import SHT_ROLLUPS, Sht, Shts
+from solar_panel.utils.ids import uuid7
+from solar_panel.utils.ingest import BulkItemStatus, bulk_insert
+
+from pydantic import BaseModel
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+INGEST_TABLES = {
+    "pzems": (Pzem, PZEM_ROLLUPS),
+    "ddsus": (Ddsu, DDSU_ROLLUPS),
+    "shts": (Sht, SHT_ROLLUPS),
+}
+
+
+####################
+# Forms
+####################
+
+
+class IngestBulkForm(BaseModel):
+    # Raw items, validated one by one so a bad reading only fails itself
+    pzems: list[dict] = []
+    ddsus: list[dict] = []
+    shts: list[dict] = []
+
+
+class IngestBulkResponse(BaseModel):
+    pzems: list[BulkItemStatus] = []
+    ddsus: list[BulkItemStatus] = []
+    shts: list[BulkItemStatus] = []
+
+
+class IngestBufferMetrics(BaseModel):
+    enabled: bool
+    pending: int
+    capacity: int
+
+    accepted: int  # readings enqueued
+    rejected: int  # readings turned away with a 429
+    flushed: int  # readings written
+    failed: int  # readings the database refused
+    flushes: int
+    flush_errors: int  # flushes whose transaction failed and were retried
+    last_flush_rows: int
+    last_flush_seconds: float
+
+
+class IngestTable:
+    def insert_bulk(self, form_data: IngestBulkForm) -> IngestBulkResponse:
+        # One session and one commit for every sensor type in the batch
+        with get_db() as db:
+            response = IngestBulkResponse(
+                pzems=Pzems.bulk_insert_pzems(db, form_data.pzems),
+                ddsus=Ddsus.bulk_insert_ddsus(db, form_data.ddsus),
+                shts=Shts.bulk_insert_shts(db, form_data.shts),
+            )
+            db.commit()
+            return response
+
+    def insert_rows(
+        self, rows: dict[str, list[dict]]
+    ) -> dict[str, list[BulkItemStatus]]:
+        """Insert prepared rows (ids included) per sensor in one transaction."""
+        with get_db() as db:
+            results = {
+                sensor: bulk_insert(db, *INGEST_TABLES[sensor], sensor_rows)
+                for sensor, sensor_rows in rows.items()
+            }
+            db.commit()
+            return results
+
+
+Ingest = IngestTable()
+AsyncIngest = AsyncTable(Ingest)
+
+
+####################
+# Write-behind buffer
+####################
+
+
+class IngestBufferFull(Exception):
+    pass
+
+
+class WriteBehindBuffer:
+    """
+    Readings accepted by the create endpoints but not written yet. A single
+    background task drains the queue in batches of up to flush_rows, each in
+    one transaction, so a commit (an fsync on SQLite) is shared by the whole
+    batch instead of paid per reading. The queue is only touched from the
+    event loop, so it needs no lock.
+    """
+
+    def __init__(
+        self,
+        capacity: int = INGEST_BUFFER_SIZE,
+        flush_rows: int = INGEST_FLUSH_ROWS,
+        flush_interval: float = INGEST_FLUSH_INTERVAL_MS / 1000,
+    ):
+        self.capacity = capacity
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+
+        self._queue: deque[tuple[str, dict]] = deque()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._stopping = False
+        self._metrics = {
+            "accepted": 0,
+            "rejected": 0,
+            "flushed": 0,
+            "failed": 0,
+            "flushes": 0,
+            "flush_errors": 0,
+            "last_flush_rows": 0,
+            "last_flush_seconds": 0.0,
+        }
+
+    def enqueue(self, sensor: str, form_data: BaseModel) -> dict:
+        """Queue a validated reading and return it as it will be stored."""
+        if len(self._queue) >= self.capacity:
+            self._metrics["rejected"] += 1
+            raise IngestBufferFull()
+
+        row = {**form_data.model_dump(exclude_none=True), "id": uuid7()}
+        self._queue.append((sensor, row))
+        self._metrics["accepted"] += 1
+        if len(self._queue) >= self.flush_rows:
+            self._wakeup.set()
+        return row
+
+    async def flush(self) -> int:
+        """Write up to flush_rows queued readings; returns how many were taken."""
+        size = min(len(self._queue), self.flush_rows)
+        if size == 0:
+            return 0
+
+        batch = [self._queue.popleft() for _ in range(size)]
+        rows = {}
+        for sensor, row in batch:
+            rows.setdefault(sensor, []).append(row)
+
+        start = time.perf_counter()
+        try:
+            results = await AsyncIngest.insert_rows(rows)
+        except BaseException:
+            # Back to the front of the queue in order; if the database stays
+            # unavailable the queue fills up and producers get 429s
+            self._queue.extendleft(reversed(batch))
+            self._metrics["flush_errors"] += 1
+            raise
+
+        failed = sum(
+            item.status == "failed" for items in results.values() for item in items
+        )
+        if failed:
+            log.warning(f"Ingest buffer flush: {failed} readings were rejected")
+
+        self._metrics["flushed"] += size - failed
+        self._metrics["failed"] += failed
+        self._metrics["flushes"] += 1
+        self._metrics["last_flush_rows"] = size
+        self._metrics["last_flush_seconds"] = time.perf_counter() - start
+        return size
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                # Keep going while full batches are waiting
+                while await self.flush() == self.flush_rows:
+                    pass
+            except Exception as e:
+                log.exception(f"Ingest buffer flush failed: {e}")
+                await asyncio.sleep(self.flush_interval)
+
+    def start(self):
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task, then flush everything still queued."""
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+
+        while self._queue:
+            try:
+                await self.flush()
+            except Exception as e:
+                log.error(
+                    f"Dropping {len(self._queue)} unflushed readings on shutdown: {e}"
+                )
+                return
+
+    def get_metrics(self) -> IngestBufferMetrics:
+        return IngestBufferMetrics(
+            enabled=INGEST_BUFFER_ENABLED,
+            pending=len(self._queue),
+            capacity=self.capacity,
+            **self._metrics,
+        )
+
+
+IngestBuffer = WriteBehindBuffer()
@@ -0,0 +1,173 @@
+import logging
+import threading
+import time
+from typing import Optional
+
+from solar_panel.env import LATEST_CACHE_TTL, SRC_LOG_LEVELS
+from solar_panel.internal.db import AsyncTable, get_db
+from solar_panel.models.ddsus import Ddsu, Ddsus, DdsuModel
+from solar_panel.models.pzems import Pzem, Pzems, PzemModel
+from solar_panel.models.shts import Sht, Shts, ShtModel
+from solar_panel.models.versions import DataVersion, DataVersionModel
+from solar_panel.utils.readings import subscribe_readings
+
+from pydantic import BaseModel
+from sqlalchemy import func, select
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+def device_ids_with_readings(db, table) -> set[int]:
+    """
+    Distinct device ids of a sensor table, found by hopping along the
+    (device_id, timestamp) index: one lookup per device instead of a scan of
+    every reading.
+    """
+    ids = select(func.min(table.device_id).label("device_id")).cte(
+        "device_ids", recursive=True
+    )
+    following = (
+        select(func.min(table.device_id))
+        .where(table.device_id > ids.c.device_id)
+        .scalar_subquery()
+    )
+    ids = ids.union_all(select(following).where(ids.c.device_id.isnot(None)))
+
+    result = db.execute(select(ids.c.device_id).where(ids.c.device_id.isnot(None)))
+    return set(result.scalars())
+
+
+####################
+# Forms
+####################
+
+
+class LatestReadingsResponse(BaseModel):
+    pzems: list[PzemModel]
+    ddsus: list[DdsuModel]
+    shts: list[ShtModel]
+
+
+class LatestTable:
+    """
+    Newest reading per (sensor, device), kept in process memory. Committed
+    inserts of this process update it directly; its updates and deletes drop
+    the sensor's entries. Writes made elsewhere (other workers, the CLI, the
+    retention job) are noticed within LATEST_CACHE_TTL seconds, when the
+    sensor's row in data_versions has moved: the entries are then dropped
+    too. Dropped entries are re-read from the database, one indexed LIMIT 1
+    per device that has readings. A cached None means the device has none.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models = {"pzems": PzemModel, "ddsus": DdsuModel, "shts": ShtModel}
+        self._tables = {"pzems": Pzem, "ddsus": Ddsu, "shts": Sht}
+        self._loaders = {
+            "pzems": Pzems.get_latest_pzem_by_device_id,
+            "ddsus": Ddsus.get_latest_ddsu_by_device_id,
+            "shts": Shts.get_latest_sht_by_device_id,
+        }
+        self._cache: dict[str, Optional[dict[int, Optional[BaseModel]]]] = {
+            sensor: None for sensor in self._models
+        }
+        self._device_ids: dict[str, set[int]] = {
+            sensor: set() for sensor in self._models
+        }
+        self._versions: dict[str, Optional[DataVersionModel]] = {
+            sensor: None for sensor in self._models
+        }
+        self._checked_at = {sensor: 0.0 for sensor in self._models}
+        self._generations = {sensor: 0 for sensor in self._models}
+
+    def on_readings_committed(self, sensor: str, rows: Optional[list[dict]]):
+        if sensor not in self._cache:
+            return
+
+        with self._lock:
+            if rows is None:
+                self._cache[sensor] = None
+                self._generations[sensor] += 1
+                return
+
+            cache = self._cache[sensor]
+            if cache is None:
+                # Nothing to update, the next read loads everything
+                return
+
+            for row in rows:
+                self._device_ids[sensor].add(row["device_id"])
+                current = cache.get(row["device_id"])
+                if current is None or row["timestamp"] >= current.timestamp:
+                    cache[row["device_id"]] = self._models[sensor](**row)
+
+    def _entries(self, sensor: str) -> tuple[dict, list[int]]:
+        """The sensor's cache and its devices, reset if the version moved."""
+        cache = self._cache[sensor]
+        if (
+            cache is not None
+            and time.monotonic() - self._checked_at[sensor] < LATEST_CACHE_TTL
+        ):
+            with self._lock:
+                return cache, sorted(self._device_ids[sensor])
+
+        generation = self._generations[sensor]
+        with get_db() as db:
+            # Read the version first: a write landing in between only causes
+            # one more reset on the next check
+            version = db.get(DataVersion, sensor)
+            version = DataVersionModel.model_validate(version) if version else None
+
+            if cache is None or version != self._versions[sensor]:
+                cache = {}
+                device_ids = device_ids_with_readings(db, self._tables[sensor])
+            else:
+                device_ids = self._device_ids[sensor]
+
+        with self._lock:
+            # Unless a local update or delete dropped the cache while loading
+            if generation == self._generations[sensor]:
+                self._cache[sensor] = cache
+                self._device_ids[sensor] = device_ids
+                self._versions[sensor] = version
+                self._checked_at[sensor] = time.monotonic()
+            return cache, sorted(device_ids)
+
+    def _get_latest(self, sensor: str) -> list:
+        cache, device_ids = self._entries(sensor)
+
+        readings = []
+        for device_id in device_ids:
+            if device_id not in cache:
+                reading = self._loaders[sensor](device_id)
+                with self._lock:
+                    # An insert may have landed while we were querying
+                    cache.setdefault(device_id, reading)
+
+            reading = cache.get(device_id)
+            if reading is not None:
+                readings.append(reading)
+
+        return readings
+
+    def get_latest_pzems(self) -> list[PzemModel]:
+        return self._get_latest("pzems")
+
+    def get_latest_ddsus(self) -> list[DdsuModel]:
+        return self._get_latest("ddsus")
+
+    def get_latest_shts(self) -> list[ShtModel]:
+        return self._get_latest("shts")
+
+    def get_latest(self) -> LatestReadingsResponse:
+        return LatestReadingsResponse(
+            pzems=self.get_latest_pzems(),
+            ddsus=self.get_latest_ddsus(),
+            shts=self.get_latest_shts(),
+        )
+
+
+Latest = LatestTable()
+subscribe_readings(Latest.on_readings_committed)
+AsyncLatest = AsyncTable(Latest)
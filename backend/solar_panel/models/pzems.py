@@ -1,14 +1,36 @@
 import logging
 import time
-import uuid
 
 from solar_panel.env import SRC_LOG_LEVELS
-from solar_panel.internal.db import Base, get_db
+from solar_panel.internal.db import AsyncTable, Base, UUIDField, get_db
+from solar_panel.utils.aggregation import Bucket, MetricAggregate, aggregate_rows
+from solar_panel.utils.columnar import rows_to_columns
+from solar_panel.utils.energy import clear_energy
+from solar_panel.utils.ids import uuid7
+from solar_panel.utils.ingest import BulkItemStatus, bulk_insert_items
+from solar_panel.utils.readings import notify_changed, notify_inserted
+from solar_panel.utils.rollups import (
+    DAILY_SECONDS,
+    HOURLY_SECONDS,
+    aggregate_rollup_rows,
+    apply_rollups,
+    backfill_rollup,
+    pick_rollup,
+    rollup_model,
+)
 
 from typing import Optional
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, Double, Integer, Text
-
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Double,
+    Index,
+    Integer,
+    and_,
+    or_,
+    select,
+)
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -17,7 +39,7 @@ log.setLevel(SRC_LOG_LEVELS["MODELS"])
 class Pzem(Base):
     __tablename__ = "pzems"
 
-    id = Column(Text, unique=True, primary_key=True)
+    id = Column(UUIDField, unique=True, primary_key=True)
     device_id = Column(Integer)
 
     voltage = Column(Double)
@@ -27,6 +49,11 @@ class Pzem(Base):
 
     timestamp = Column(BigInteger)
 
+    __table_args__ = (
+        Index("ix_pzems_device_id_timestamp", "device_id", "timestamp"),
+        Index("ix_pzems_timestamp", "timestamp"),
+    )
+
 
 class PzemModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -42,6 +69,26 @@ class PzemModel(BaseModel):
     timestamp: int
 
 
+PZEM_METRICS = ["voltage", "current", "power", "energy"]
+PZEM_COLUMNS = ["id", "device_id", "voltage", "current", "power", "energy", "timestamp"]
+
+PzemHourly = rollup_model("PzemHourly", "pzems_hourly", PZEM_METRICS, HOURLY_SECONDS)
+PzemDaily = rollup_model("PzemDaily", "pzems_daily", PZEM_METRICS, DAILY_SECONDS)
+
+PZEM_ROLLUPS = [PzemHourly, PzemDaily]
+
+
+class PzemAggregateModel(BaseModel):
+    timestamp: int  # bucket start in epoch
+    device_id: int
+    count: int
+
+    voltage: MetricAggregate
+    current: MetricAggregate
+    power: MetricAggregate
+    energy: MetricAggregate
+
+
 ####################
 # Forms
 ####################
@@ -81,13 +128,15 @@ class PzemTable:
             pzem = PzemModel(
                 **{
                     **form_data.model_dump(exclude_none=True),
-                    "id": str(uuid.uuid4()),
+                    "id": uuid7(),
                 }
             )
 
             try:
                 result = Pzem(**pzem.model_dump())
                 db.add(result)
+                apply_rollups(db, PZEM_ROLLUPS, [pzem.model_dump()])
+                notify_inserted(db, "pzems", [pzem.model_dump()])
                 db.commit()
                 db.refresh(result)
                 if result:
@@ -98,13 +147,176 @@ class PzemTable:
             except Exception:
                 return None
 
-    def get_pzems(self):
+    def bulk_insert_pzems(self, db, items: list[dict]) -> list[BulkItemStatus]:
+        """
+        Validate and insert a batch inside the caller's transaction; the caller
+        commits. Items that are not valid readings are reported as failed.
+        """
+        return bulk_insert_items(db, Pzem, PZEM_ROLLUPS, PzemForm, items)
+
+    def insert_new_pzems(self, items: list[dict]) -> list[BulkItemStatus]:
+        with get_db() as db:
+            results = self.bulk_insert_pzems(db, items)
+            db.commit()
+            return results
+
+    def _history_filters(
+        self,
+        device_id: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+    ) -> list:
+        filters = []
+
+        if device_id is not None:
+            filters.append(Pzem.device_id == device_id)
+        if start is not None:
+            filters.append(Pzem.timestamp >= start)
+        if end is not None:
+            filters.append(Pzem.timestamp <= end)
+        if cursor is not None:
+            # Keyset pagination: resume strictly after the last (timestamp, id) seen.
+            # The plain upper bound lets PostgreSQL prune later monthly partitions.
+            timestamp, id = cursor
+            filters.append(Pzem.timestamp <= timestamp)
+            filters.append(
+                or_(
+                    Pzem.timestamp < timestamp,
+                    and_(Pzem.timestamp == timestamp, Pzem.id < id),
+                )
+            )
+
+        return filters
+
+    def _history_query(
+        self,
+        db,
+        device_id: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+        limit: Optional[int] = None,
+        columns: Optional[list] = None,
+    ):
+        query = db.query(*columns) if columns else db.query(Pzem)
+        query = query.filter(*self._history_filters(device_id, start, end, cursor))
+
+        query = query.order_by(Pzem.timestamp.desc(), Pzem.id.desc())
+        if limit is not None:
+            query = query.limit(limit)
+
+        return query
+
+    def history_statement(
+        self,
+        device_id: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+        limit: Optional[int] = None,
+    ):
+        """The history query as a Core SELECT of PZEM_COLUMNS, for streaming."""
+        statement = (
+            select(*[getattr(Pzem, column) for column in PZEM_COLUMNS])
+            .where(*self._history_filters(device_id, start, end, cursor))
+            .order_by(Pzem.timestamp.desc(), Pzem.id.desc())
+        )
+        if limit is not None:
+            statement = statement.limit(limit)
+
+        return statement
+
+    def get_pzems(
+        self,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+        limit: Optional[int] = None,
+    ) -> list[PzemModel]:
         with get_db() as db:
             return [
                 PzemModel.model_validate(pzem)
-                for pzem in db.query(Pzem).order_by(Pzem.timestamp.desc()).all()
+                for pzem in self._history_query(
+                    db, start=start, end=end, cursor=cursor, limit=limit
+                ).all()
             ]
 
+    def aggregate_pzems(
+        self,
+        bucket: Bucket,
+        device_id: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> list[PzemAggregateModel]:
+        with get_db() as db:
+            rollup = pick_rollup(PZEM_ROLLUPS, bucket)
+            if rollup is not None:
+                rows = aggregate_rollup_rows(
+                    db, rollup, bucket, device_id=device_id, start=start, end=end
+                )
+            else:
+                rows = aggregate_rows(
+                    db,
+                    Pzem,
+                    PZEM_METRICS,
+                    bucket,
+                    device_id=device_id,
+                    start=start,
+                    end=end,
+                )
+            return [PzemAggregateModel.model_validate(row) for row in rows]
+
+    def backfill_pzem_rollups(
+        self, start: Optional[int] = None, end: Optional[int] = None
+    ) -> int:
+        with get_db() as db:
+            buckets = sum(
+                backfill_rollup(db, Pzem, rollup, start=start, end=end)
+                for rollup in PZEM_ROLLUPS
+            )
+            db.commit()
+            return buckets
+
+    def _rebuild_rollups(self, db, timestamps: set):
+        # Re-aggregate only the buckets touched by an update or delete
+        for timestamp in timestamps - {None}:
+            for rollup in PZEM_ROLLUPS:
+                backfill_rollup(db, Pzem, rollup, start=timestamp, end=timestamp)
+
+    def get_pzem_rows(
+        self,
+        device_id: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+        limit: Optional[int] = None,
+    ) -> list:
+        """History as plain PZEM_COLUMNS rows, without ORM or Pydantic objects."""
+        with get_db() as db:
+            return self._history_query(
+                db,
+                device_id=device_id,
+                start=start,
+                end=end,
+                cursor=cursor,
+                limit=limit,
+                columns=[getattr(Pzem, column) for column in PZEM_COLUMNS],
+            ).all()
+
+    def get_pzem_columns(
+        self,
+        device_id: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+        limit: Optional[int] = None,
+    ) -> dict[str, list]:
+        rows = self.get_pzem_rows(
+            device_id=device_id, start=start, end=end, cursor=cursor, limit=limit
+        )
+        return rows_to_columns(PZEM_COLUMNS, rows)
+
     def get_pzem_by_id(self, id: str) -> Optional[PzemModel]:
         try:
             with get_db() as db:
@@ -113,10 +325,24 @@ class PzemTable:
         except Exception:
             return None
 
-    def get_pzem_by_device_id(self, device_id: int) -> Optional[list[PzemModel]]:
+    def get_pzem_by_device_id(
+        self,
+        device_id: int,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+        limit: Optional[int] = None,
+    ) -> Optional[list[PzemModel]]:
         try:
             with get_db() as db:
-                pzems = db.query(Pzem).filter_by(device_id=device_id).all()
+                pzems = self._history_query(
+                    db,
+                    device_id=device_id,
+                    start=start,
+                    end=end,
+                    cursor=cursor,
+                    limit=limit,
+                ).all()
                 return (
                     [PzemModel.model_validate(pzem) for pzem in pzems]
                     if pzems
@@ -125,16 +351,30 @@ class PzemTable:
         except Exception:
             return None
 
+    def get_latest_pzem_by_device_id(self, device_id: int) -> Optional[PzemModel]:
+        with get_db() as db:
+            pzem = self._history_query(db, device_id=device_id, limit=1).first()
+            return PzemModel.model_validate(pzem) if pzem else None
+
     def update_pzem_by_id(
         self, id: str, form_data: PzemUpdateForm, overwrite: bool = False
     ) -> Optional[PzemModel]:
         try:
             with get_db() as db:
+                previous = (
+                    db.query(Pzem.device_id, Pzem.timestamp).filter_by(id=id).first()
+                )
                 db.query(Pzem).filter_by(id=id).update(
                     {
                         **form_data.model_dump(exclude_none=True),
                     }
                 )
+                current = (
+                    db.query(Pzem.device_id, Pzem.timestamp).filter_by(id=id).first()
+                )
+                changed = [row._asdict() for row in (previous, current) if row]
+                self._rebuild_rollups(db, {row["timestamp"] for row in changed})
+                notify_changed(db, "pzems", changed)
                 db.commit()
                 return self.get_pzem_by_id(id=id)
         except Exception as e:
@@ -144,7 +384,13 @@ class PzemTable:
     def delete_pzem_by_id(self, id: str) -> bool:
         try:
             with get_db() as db:
+                previous = (
+                    db.query(Pzem.device_id, Pzem.timestamp).filter_by(id=id).first()
+                )
                 db.query(Pzem).filter_by(id=id).delete()
+                changed = [previous._asdict()] if previous else []
+                self._rebuild_rollups(db, {row["timestamp"] for row in changed})
+                notify_changed(db, "pzems", changed)
                 db.commit()
                 return True
         except Exception:
@@ -154,6 +400,10 @@ class PzemTable:
         with get_db() as db:
             try:
                 db.query(Pzem).delete()
+                for rollup in PZEM_ROLLUPS:
+                    db.query(rollup).delete()
+                clear_energy(db, "pzems")
+                notify_changed(db, "pzems")
                 db.commit()
 
                 return True
@@ -162,3 +412,4 @@ class PzemTable:
 
 
 Pzems = PzemTable()
+AsyncPzems = AsyncTable(Pzems)
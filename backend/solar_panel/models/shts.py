@@ -1,14 +1,35 @@
 import logging
 import time
-import uuid
 
 from solar_panel.env import SRC_LOG_LEVELS
-from solar_panel.internal.db import Base, get_db
+from solar_panel.internal.db import AsyncTable, Base, UUIDField, get_db
+from solar_panel.utils.aggregation import Bucket, MetricAggregate, aggregate_rows
+from solar_panel.utils.columnar import rows_to_columns
+from solar_panel.utils.ids import uuid7
+from solar_panel.utils.ingest import BulkItemStatus, bulk_insert_items
+from solar_panel.utils.readings import notify_changed, notify_inserted
+from solar_panel.utils.rollups import (
+    DAILY_SECONDS,
+    HOURLY_SECONDS,
+    aggregate_rollup_rows,
+    apply_rollups,
+    backfill_rollup,
+    pick_rollup,
+    rollup_model,
+)
 
 from typing import Optional
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, Double, Integer, Text
-
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Double,
+    Index,
+    Integer,
+    and_,
+    or_,
+    select,
+)
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -17,7 +38,7 @@ log.setLevel(SRC_LOG_LEVELS["MODELS"])
 class Sht(Base):
     __tablename__ = "shts"
 
-    id = Column(Text, unique=True, primary_key=True)
+    id = Column(UUIDField, unique=True, primary_key=True)
     device_id = Column(Integer)
 
     temperature = Column(Double)
@@ -25,6 +46,11 @@ class Sht(Base):
 
     timestamp = Column(BigInteger)
 
+    __table_args__ = (
+        Index("ix_shts_device_id_timestamp", "device_id", "timestamp"),
+        Index("ix_shts_timestamp", "timestamp"),
+    )
+
 
 class ShtModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -38,6 +64,24 @@ class ShtModel(BaseModel):
     timestamp: int
 
 
+SHT_METRICS = ["temperature", "humidity"]
+SHT_COLUMNS = ["id", "device_id", "temperature", "humidity", "timestamp"]
+
+ShtHourly = rollup_model("ShtHourly", "shts_hourly", SHT_METRICS, HOURLY_SECONDS)
+ShtDaily = rollup_model("ShtDaily", "shts_daily", SHT_METRICS, DAILY_SECONDS)
+
+SHT_ROLLUPS = [ShtHourly, ShtDaily]
+
+
+class ShtAggregateModel(BaseModel):
+    timestamp: int  # bucket start in epoch
+    device_id: int
+    count: int
+
+    temperature: MetricAggregate
+    humidity: MetricAggregate
+
+
 ####################
 # Forms
 ####################
@@ -71,13 +115,15 @@ class ShtTable:
             sht = ShtModel(
                 **{
                     **form_data.model_dump(exclude_none=True),
-                    "id": str(uuid.uuid4()),
+                    "id": uuid7(),
                 }
             )
 
             try:
                 result = Sht(**sht.model_dump())
                 db.add(result)
+                apply_rollups(db, SHT_ROLLUPS, [sht.model_dump()])
+                notify_inserted(db, "shts", [sht.model_dump()])
                 db.commit()
                 db.refresh(result)
                 if result:
@@ -88,13 +134,176 @@ class ShtTable:
             except Exception:
                 return None
 
-    def get_shts(self):
+    def bulk_insert_shts(self, db, items: list[dict]) -> list[BulkItemStatus]:
+        """
+        Validate and insert a batch inside the caller's transaction; the caller
+        commits. Items that are not valid readings are reported as failed.
+        """
+        return bulk_insert_items(db, Sht, SHT_ROLLUPS, ShtForm, items)
+
+    def insert_new_shts(self, items: list[dict]) -> list[BulkItemStatus]:
+        with get_db() as db:
+            results = self.bulk_insert_shts(db, items)
+            db.commit()
+            return results
+
+    def _history_filters(
+        self,
+        device_id: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+    ) -> list:
+        filters = []
+
+        if device_id is not None:
+            filters.append(Sht.device_id == device_id)
+        if start is not None:
+            filters.append(Sht.timestamp >= start)
+        if end is not None:
+            filters.append(Sht.timestamp <= end)
+        if cursor is not None:
+            # Keyset pagination: resume strictly after the last (timestamp, id) seen.
+            # The plain upper bound lets PostgreSQL prune later monthly partitions.
+            timestamp, id = cursor
+            filters.append(Sht.timestamp <= timestamp)
+            filters.append(
+                or_(
+                    Sht.timestamp < timestamp,
+                    and_(Sht.timestamp == timestamp, Sht.id < id),
+                )
+            )
+
+        return filters
+
+    def _history_query(
+        self,
+        db,
+        device_id: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+        limit: Optional[int] = None,
+        columns: Optional[list] = None,
+    ):
+        query = db.query(*columns) if columns else db.query(Sht)
+        query = query.filter(*self._history_filters(device_id, start, end, cursor))
+
+        query = query.order_by(Sht.timestamp.desc(), Sht.id.desc())
+        if limit is not None:
+            query = query.limit(limit)
+
+        return query
+
+    def history_statement(
+        self,
+        device_id: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+        limit: Optional[int] = None,
+    ):
+        """The history query as a Core SELECT of SHT_COLUMNS, for streaming."""
+        statement = (
+            select(*[getattr(Sht, column) for column in SHT_COLUMNS])
+            .where(*self._history_filters(device_id, start, end, cursor))
+            .order_by(Sht.timestamp.desc(), Sht.id.desc())
+        )
+        if limit is not None:
+            statement = statement.limit(limit)
+
+        return statement
+
+    def get_shts(
+        self,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+        limit: Optional[int] = None,
+    ) -> list[ShtModel]:
         with get_db() as db:
             return [
                 ShtModel.model_validate(sht)
-                for sht in db.query(Sht).order_by(Sht.timestamp.desc()).all()
+                for sht in self._history_query(
+                    db, start=start, end=end, cursor=cursor, limit=limit
+                ).all()
             ]
 
+    def aggregate_shts(
+        self,
+        bucket: Bucket,
+        device_id: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> list[ShtAggregateModel]:
+        with get_db() as db:
+            rollup = pick_rollup(SHT_ROLLUPS, bucket)
+            if rollup is not None:
+                rows = aggregate_rollup_rows(
+                    db, rollup, bucket, device_id=device_id, start=start, end=end
+                )
+            else:
+                rows = aggregate_rows(
+                    db,
+                    Sht,
+                    SHT_METRICS,
+                    bucket,
+                    device_id=device_id,
+                    start=start,
+                    end=end,
+                )
+            return [ShtAggregateModel.model_validate(row) for row in rows]
+
+    def backfill_sht_rollups(
+        self, start: Optional[int] = None, end: Optional[int] = None
+    ) -> int:
+        with get_db() as db:
+            buckets = sum(
+                backfill_rollup(db, Sht, rollup, start=start, end=end)
+                for rollup in SHT_ROLLUPS
+            )
+            db.commit()
+            return buckets
+
+    def _rebuild_rollups(self, db, timestamps: set):
+        # Re-aggregate only the buckets touched by an update or delete
+        for timestamp in timestamps - {None}:
+            for rollup in SHT_ROLLUPS:
+                backfill_rollup(db, Sht, rollup, start=timestamp, end=timestamp)
+
+    def get_sht_rows(
+        self,
+        device_id: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+        limit: Optional[int] = None,
+    ) -> list:
+        """History as plain SHT_COLUMNS rows, without ORM or Pydantic objects."""
+        with get_db() as db:
+            return self._history_query(
+                db,
+                device_id=device_id,
+                start=start,
+                end=end,
+                cursor=cursor,
+                limit=limit,
+                columns=[getattr(Sht, column) for column in SHT_COLUMNS],
+            ).all()
+
+    def get_sht_columns(
+        self,
+        device_id: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+        limit: Optional[int] = None,
+    ) -> dict[str, list]:
+        rows = self.get_sht_rows(
+            device_id=device_id, start=start, end=end, cursor=cursor, limit=limit
+        )
+        return rows_to_columns(SHT_COLUMNS, rows)
+
     def get_sht_by_id(self, id: str) -> Optional[ShtModel]:
         try:
             with get_db() as db:
@@ -103,24 +312,46 @@ class ShtTable:
         except Exception:
             return None
 
-    def get_sht_by_device_id(self, device_id: int) -> Optional[list[ShtModel]]:
+    def get_sht_by_device_id(
+        self,
+        device_id: int,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        cursor: Optional[tuple[int, str]] = None,
+        limit: Optional[int] = None,
+    ) -> Optional[list[ShtModel]]:
         try:
             with get_db() as db:
-                shts = db.query(Sht).filter_by(device_id=device_id).all()
+                shts = self._history_query(
+                    db,
+                    device_id=device_id,
+                    start=start,
+                    end=end,
+                    cursor=cursor,
+                    limit=limit,
+                ).all()
                 return [ShtModel.model_validate(sht) for sht in shts] if shts else None
         except Exception:
             return None
 
+    def get_latest_sht_by_device_id(self, device_id: int) -> Optional[ShtModel]:
+        with get_db() as db:
+            sht = self._history_query(db, device_id=device_id, limit=1).first()
+            return ShtModel.model_validate(sht) if sht else None
+
     def update_sht_by_id(
         self, id: str, form_data: ShtUpdateForm, overwrite: bool = False
     ) -> Optional[ShtModel]:
         try:
             with get_db() as db:
+                previous = db.query(Sht.timestamp).filter_by(id=id).scalar()
                 db.query(Sht).filter_by(id=id).update(
                     {
                         **form_data.model_dump(exclude_none=True),
                     }
                 )
+                self._rebuild_rollups(db, {previous, form_data.timestamp})
+                notify_changed(db, "shts")
                 db.commit()
                 return self.get_sht_by_id(id=id)
         except Exception as e:
@@ -130,7 +361,10 @@ class ShtTable:
     def delete_sht_by_id(self, id: str) -> bool:
         try:
             with get_db() as db:
+                previous = db.query(Sht.timestamp).filter_by(id=id).scalar()
                 db.query(Sht).filter_by(id=id).delete()
+                self._rebuild_rollups(db, {previous})
+                notify_changed(db, "shts")
                 db.commit()
                 return True
         except Exception:
@@ -140,6 +374,9 @@ class ShtTable:
         with get_db() as db:
             try:
                 db.query(Sht).delete()
+                for rollup in SHT_ROLLUPS:
+                    db.query(rollup).delete()
+                notify_changed(db, "shts")
                 db.commit()
 
                 return True
@@ -148,3 +385,4 @@ class ShtTable:
 
 
 Shts = ShtTable()
+AsyncShts = AsyncTable(Shts)
@@ -0,0 +1,93 @@
+import logging
+import time
+
+from solar_panel.env import SRC_LOG_LEVELS
+from solar_panel.internal.db import AsyncTable, Base, get_db
+
+from typing import Optional
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Column, Text, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+####################
+# Data versions
+####################
+
+# One row per dataset ("pzems", "ddsus", "shts", "devices") whose version is
+# bumped in the same transaction as every write to it. Reading a version is a
+# primary key lookup, which makes it a cheap validator for HTTP caching that
+# stays correct across worker processes.
+
+
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+
+    name = Column(Text, primary_key=True)
+    version = Column(BigInteger, nullable=False)
+    updated_at = Column(BigInteger, nullable=False)  # epoch of the last write
+
+
+class DataVersionModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    name: str
+
+    version: int
+    updated_at: int
+
+
+VERSIONS_KEY = "touched_versions"
+
+
+def touch_version(db, name: str):
+    """Mark a dataset as written; its version is bumped when db commits."""
+    db.info.setdefault(VERSIONS_KEY, set()).add(name)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_versions(session):
+    if session.in_nested_transaction():
+        # Only the outermost commit makes the write visible
+        return
+
+    names = session.info.pop(VERSIONS_KEY, None)
+    if not names:
+        return
+
+    now = int(time.time())
+    if session.get_bind().dialect.name == "postgresql":
+        insert = postgresql.insert
+    else:
+        insert = sqlite.insert
+
+    # Sorted so concurrent writers lock the rows in the same order
+    statement = insert(DataVersion).values(
+        [{"name": name, "version": 1, "updated_at": now} for name in sorted(names)]
+    )
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[DataVersion.name],
+            set_={"version": DataVersion.version + 1, "updated_at": now},
+        )
+    )
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_versions(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(VERSIONS_KEY, None)
+
+
+class VersionTable:
+    def get_version(self, name: str) -> Optional[DataVersionModel]:
+        with get_db() as db:
+            version = db.get(DataVersion, name)
+            return DataVersionModel.model_validate(version) if version else None
+
+
+Versions = VersionTable()
+AsyncVersions = AsyncTable(Versions)
@@ -0,0 +1,142 @@
+from typing import Optional
+import logging
+
+from solar_panel.models.analytics import (
+    Analytics,
+    AnalyticsSensor,
+    LoadDurationPoint,
+    SeriesPoint,
+    SeriesStatisticsResponse,
+)
+
+from solar_panel.constants import ERROR_MESSAGES
+from fastapi import APIRouter, HTTPException, Query, status
+
+from solar_panel.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+router = APIRouter()
+
+
+async def run_analytics(method, *args, **kwargs):
+    try:
+        return await method(*args, **kwargs)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.INCORRECT_FORMAT(f": {e}"),
+        )
+
+
+############################
+# GetStatistics
+############################
+
+
+@router.get("/{sensor}/stats", response_model=SeriesStatisticsResponse)
+async def get_statistics(
+    sensor: AnalyticsSensor,
+    device_id: int,
+    metric: str = "power",
+    percentiles: list[float] = Query([5, 25, 50, 75, 95]),
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+):
+    if any(p < 0 or p > 100 for p in percentiles):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.INCORRECT_FORMAT(
+                ": percentiles must be between 0 and 100"
+            ),
+        )
+
+    return await run_analytics(
+        Analytics.get_statistics,
+        sensor,
+        metric,
+        device_id,
+        percentiles,
+        start=start,
+        end=end,
+    )
+
+
+############################
+# GetLoadDurationCurve
+############################
+
+
+@router.get("/{sensor}/load-duration", response_model=list[LoadDurationPoint])
+async def get_load_duration_curve(
+    sensor: AnalyticsSensor,
+    device_id: int,
+    metric: str = "power",
+    points: int = Query(100, ge=2, le=10000),
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+):
+    return await run_analytics(
+        Analytics.get_load_duration_curve,
+        sensor,
+        metric,
+        device_id,
+        points,
+        start=start,
+        end=end,
+    )
+
+
+############################
+# GetPeaks
+############################
+
+
+@router.get("/{sensor}/peaks", response_model=list[SeriesPoint])
+async def get_peaks(
+    sensor: AnalyticsSensor,
+    device_id: int,
+    metric: str = "power",
+    threshold: Optional[float] = None,
+    limit: int = Query(10, ge=1, le=1000),
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+):
+    return await run_analytics(
+        Analytics.get_peaks,
+        sensor,
+        metric,
+        device_id,
+        threshold=threshold,
+        limit=limit,
+        start=start,
+        end=end,
+    )
+
+
+############################
+# GetMovingAverage
+############################
+
+
+@router.get("/{sensor}/moving-average", response_model=list[SeriesPoint])
+async def get_moving_average(
+    sensor: AnalyticsSensor,
+    device_id: int,
+    metric: str = "power",
+    window: int = Query(60, ge=1, description="readings per average"),
+    max_points: int = Query(1000, ge=1, le=100000),
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+):
+    return await run_analytics(
+        Analytics.get_moving_average,
+        sensor,
+        metric,
+        device_id,
+        window,
+        max_points,
+        start=start,
+        end=end,
+    )
@@ -0,0 +1,37 @@
+from typing import Optional
+import logging
+
+from solar_panel.models.dashboard import AsyncDashboard, DashboardResponse
+
+from solar_panel.constants import ERROR_MESSAGES
+from fastapi import APIRouter, HTTPException, Query, status
+
+from solar_panel.env import SRC_LOG_LEVELS
+from solar_panel.utils.aggregation import Bucket, default_bucket, parse_range
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+router = APIRouter()
+
+############################
+# GetDashboard
+############################
+
+
+@router.get("/", response_model=DashboardResponse)
+async def get_dashboard(
+    range_: str = Query("24h", alias="range", description="e.g. 15m, 24h, 7d, 4w"),
+    bucket: Optional[Bucket] = None,
+):
+    try:
+        seconds = parse_range(range_)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.INCORRECT_FORMAT(f": {e}"),
+        )
+
+    return await AsyncDashboard.get_dashboard(
+        seconds, bucket or default_bucket(seconds)
+    )
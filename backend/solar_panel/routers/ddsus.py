@@ -3,16 +3,38 @@ import logging
 
 from solar_panel.models.ddsus import (
     Ddsus,
+    AsyncDdsus,
     DdsuForm,
     DdsuUpdateForm,
     DdsuResponse,
+    DdsuAggregateModel,
+    DDSU_COLUMNS,
 )
 
-from solar_panel.constants import ERROR_MESSAGES
-from fastapi import APIRouter, HTTPException, status
+from solar_panel.models.ingest import IngestBuffer, IngestBufferFull
+from solar_panel.models.latest import AsyncLatest
+from solar_panel.models.versions import AsyncVersions
 
-from solar_panel.env import SRC_LOG_LEVELS
+from solar_panel.constants import ERROR_MESSAGES
+from fastapi import APIRouter, HTTPException, Query, Request, status
 
+from solar_panel.env import INGEST_BUFFER_ENABLED, SRC_LOG_LEVELS
+from solar_panel.utils.aggregation import Bucket
+from solar_panel.utils.caching import cache_headers, not_modified_response
+from solar_panel.utils.chunked import streaming_response
+from solar_panel.utils.columnar import (
+    STREAMING_FORMATS,
+    HistoryFormat,
+    columnar_response,
+    rows_response,
+    negotiate_format,
+)
+from solar_panel.utils.ingest import BulkItemStatus
+from solar_panel.utils.pagination import (
+    decode_cursor,
+    next_cursor,
+    next_cursor_from_columns,
+)
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
@@ -25,8 +47,86 @@ router = APIRouter()
 
 
 @router.get("/", response_model=list[DdsuResponse])
-async def get_ddsus():
-    return Ddsus.get_ddsus()
+async def get_ddsus(
+    request: Request,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    format: Optional[HistoryFormat] = None,
+):
+    try:
+        after = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.INCORRECT_FORMAT(f": {e}"),
+        )
+
+    history_format = negotiate_format(format, request.headers.get("accept"))
+    if history_format in STREAMING_FORMATS and limit is not None:
+        # A stream has no header left to carry X-Next-Cursor once it starts
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.STREAM_LIMIT_NOT_SUPPORTED,
+        )
+    headers = cache_headers(
+        await AsyncVersions.get_version("ddsus"), history_format.value
+    )
+    not_modified = not_modified_response(request, headers)
+    if not_modified:
+        return not_modified
+
+    if history_format in STREAMING_FORMATS:
+        return streaming_response(
+            Ddsus.history_statement(start=start, end=end, cursor=after),
+            DDSU_COLUMNS,
+            history_format,
+            headers=headers,
+        )
+    if history_format != HistoryFormat.ROWS:
+        columns = await AsyncDdsus.get_ddsu_columns(
+            start=start, end=end, cursor=after, limit=limit
+        )
+        cursor = next_cursor_from_columns(columns, limit)
+        if cursor:
+            headers["X-Next-Cursor"] = cursor
+        return columnar_response(columns, history_format, headers=headers)
+
+    rows = await AsyncDdsus.get_ddsu_rows(
+        start=start, end=end, cursor=after, limit=limit
+    )
+    cursor = next_cursor(rows, limit)
+    if cursor:
+        headers["X-Next-Cursor"] = cursor
+    return rows_response(DDSU_COLUMNS, rows, headers=headers)
+
+
+############################
+# GetLatestDdsus
+############################
+
+
+@router.get("/latest", response_model=list[DdsuResponse])
+async def get_latest_ddsus():
+    return await AsyncLatest.get_latest_ddsus()
+
+
+############################
+# AggregateDdsus
+############################
+
+
+@router.get("/aggregate", response_model=list[DdsuAggregateModel])
+async def aggregate_ddsus(
+    bucket: Bucket = Bucket.HOUR,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    device_id: Optional[int] = None,
+):
+    return await AsyncDdsus.aggregate_ddsus(
+        bucket, device_id=device_id, start=start, end=end
+    )
 
 
 ############################
@@ -36,8 +136,19 @@ async def get_ddsus():
 
 @router.post("/create", response_model=Optional[DdsuResponse])
 async def create_new_ddsu(form_data: DdsuForm):
+    if INGEST_BUFFER_ENABLED:
+        # Acknowledged now, written by the next buffer flush
+        try:
+            return IngestBuffer.enqueue("ddsus", form_data)
+        except IngestBufferFull:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=ERROR_MESSAGES.INGEST_BUFFER_FULL,
+                headers={"Retry-After": "1"},
+            )
+
     try:
-        ddsu = Ddsus.insert_new_ddsu(form_data)
+        ddsu = await AsyncDdsus.insert_new_ddsu(form_data)
         if ddsu:
             return ddsu
         else:
@@ -53,6 +164,23 @@ async def create_new_ddsu(form_data: DdsuForm):
         )
 
 
+############################
+# BulkCreateDdsus
+############################
+
+
+@router.post("/bulk", response_model=list[BulkItemStatus])
+async def bulk_create_ddsus(form_data: list[dict]):
+    try:
+        return await AsyncDdsus.insert_new_ddsus(form_data)
+    except Exception as e:
+        log.exception(f"Error bulk creating ddsus: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(e),
+        )
+
+
 ############################
 # GetDdsuById
 ############################
@@ -60,7 +188,7 @@ async def create_new_ddsu(form_data: DdsuForm):
 
 @router.get("/id/{id}", response_model=Optional[DdsuResponse])
 async def get_ddsu_by_id(id: str):
-    ddsu = Ddsus.get_ddsu_by_id(id)
+    ddsu = await AsyncDdsus.get_ddsu_by_id(id)
     if ddsu:
         return ddsu
     else:
@@ -76,10 +204,66 @@ async def get_ddsu_by_id(id: str):
 
 
 @router.get("/device/id/{device_id}", response_model=list[DdsuResponse])
-async def get_ddsu_by_device_id(device_id: int):
-    ddsus = Ddsus.get_ddsu_by_device_id(device_id)
-    if ddsus is not None:
-        return ddsus
+async def get_ddsu_by_device_id(
+    device_id: int,
+    request: Request,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    format: Optional[HistoryFormat] = None,
+):
+    try:
+        after = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.INCORRECT_FORMAT(f": {e}"),
+        )
+
+    history_format = negotiate_format(format, request.headers.get("accept"))
+    if history_format in STREAMING_FORMATS and limit is not None:
+        # A stream has no header left to carry X-Next-Cursor once it starts
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.STREAM_LIMIT_NOT_SUPPORTED,
+        )
+    headers = cache_headers(
+        await AsyncVersions.get_version("ddsus"), history_format.value
+    )
+    not_modified = not_modified_response(request, headers)
+    if not_modified:
+        return not_modified
+
+    if history_format in STREAMING_FORMATS:
+        return streaming_response(
+            Ddsus.history_statement(
+                device_id=device_id, start=start, end=end, cursor=after
+            ),
+            DDSU_COLUMNS,
+            history_format,
+            headers=headers,
+        )
+    if history_format != HistoryFormat.ROWS:
+        columns = await AsyncDdsus.get_ddsu_columns(
+            device_id=device_id, start=start, end=end, cursor=after, limit=limit
+        )
+        cursor = next_cursor_from_columns(columns, limit)
+        if cursor:
+            headers["X-Next-Cursor"] = cursor
+        return columnar_response(columns, history_format, headers=headers)
+
+    rows = await AsyncDdsus.get_ddsu_rows(
+        device_id=device_id, start=start, end=end, cursor=after, limit=limit
+    )
+    if rows:
+        cursor = next_cursor(rows, limit)
+        if cursor:
+            headers["X-Next-Cursor"] = cursor
+        return rows_response(DDSU_COLUMNS, rows, headers=headers)
+    elif after is not None:
+        # Paged past the last row of the device history
+        return rows_response(DDSU_COLUMNS, [], headers=headers)
     else:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -95,7 +279,7 @@ async def get_ddsu_by_device_id(device_id: int):
 @router.post("/id/{id}/update", response_model=Optional[DdsuResponse])
 async def update_ddsu_by_id(id: str, form_data: DdsuUpdateForm):
     try:
-        ddsu = Ddsus.update_ddsu_by_id(id, form_data)
+        ddsu = await AsyncDdsus.update_ddsu_by_id(id, form_data)
         if ddsu:
             return ddsu
         else:
@@ -119,7 +303,7 @@ async def update_ddsu_by_id(id: str, form_data: DdsuUpdateForm):
 @router.delete("/id/{id}/delete", response_model=bool)
 async def delete_ddsu_by_id(id: str):
     try:
-        result = Ddsus.delete_ddsu_by_id(id)
+        result = await AsyncDdsus.delete_ddsu_by_id(id)
         if result:
             return result
         else:
@@ -2,16 +2,17 @@ from typing import Optional
 import logging
 
 from solar_panel.models.devices import (
-    Devices,
+    AsyncDevices,
     DeviceForm,
     DeviceUpdateForm,
     DeviceResponse,
 )
 
 from solar_panel.constants import ERROR_MESSAGES
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, Response, status
 
 from solar_panel.env import SRC_LOG_LEVELS
+from solar_panel.utils.caching import cache_headers, not_modified_response
 
 
 log = logging.getLogger(__name__)
@@ -25,8 +26,14 @@ router = APIRouter()
 
 
 @router.get("/", response_model=list[DeviceResponse])
-async def get_devices():
-    return Devices.get_devices()
+async def get_devices(request: Request, response: Response):
+    headers = cache_headers(await AsyncDevices.get_devices_version())
+    not_modified = not_modified_response(request, headers)
+    if not_modified:
+        return not_modified
+
+    response.headers.update(headers)
+    return await AsyncDevices.get_devices()
 
 
 ############################
@@ -37,7 +44,7 @@ async def get_devices():
 @router.post("/create", response_model=Optional[DeviceResponse])
 async def create_new_device(form_data: DeviceForm):
     try:
-        device = Devices.insert_new_device(form_data)
+        device = await AsyncDevices.insert_new_device(form_data)
         if device:
             return device
         else:
@@ -59,9 +66,15 @@ async def create_new_device(form_data: DeviceForm):
 
 
 @router.get("/id/{id}", response_model=Optional[DeviceResponse])
-async def get_device_by_id(id: int):
-    device = Devices.get_device_by_id(id)
+async def get_device_by_id(id: int, request: Request, response: Response):
+    headers = cache_headers(await AsyncDevices.get_devices_version())
+    not_modified = not_modified_response(request, headers)
+    if not_modified:
+        return not_modified
+
+    device = await AsyncDevices.get_device_by_id(id)
     if device:
+        response.headers.update(headers)
         return device
     else:
         raise HTTPException(
@@ -78,7 +91,7 @@ async def get_device_by_id(id: int):
 @router.post("/id/{id}/update", response_model=Optional[DeviceResponse])
 async def update_device_by_id(id: int, form_data: DeviceUpdateForm):
     try:
-        device = Devices.update_device_by_id(id, form_data)
+        device = await AsyncDevices.update_device_by_id(id, form_data)
         if device:
             return device
         else:
@@ -102,7 +115,7 @@ async def update_device_by_id(id: int, form_data: DeviceUpdateForm):
 @router.delete("/id/{id}/delete", response_model=bool)
 async def delete_device_by_id(id: int):
     try:
-        result = Devices.delete_device_by_id(id)
+        result = await AsyncDevices.delete_device_by_id(id)
         if result:
             return result
         else:
@@ -0,0 +1,75 @@
+from typing import Optional
+import logging
+
+from solar_panel.models.energy import (
+    AsyncEnergy,
+    BalanceResponse,
+    Energy,
+    EnergySensor,
+    EnergyYieldResponse,
+)
+
+from solar_panel.constants import ERROR_MESSAGES
+from fastapi import APIRouter, HTTPException, Query, status
+
+from solar_panel.env import BALANCE_STEP, BALANCE_TOLERANCE, SRC_LOG_LEVELS
+from solar_panel.utils.aggregation import (
+    BUCKET_SECONDS,
+    Bucket,
+    default_bucket,
+    parse_range,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+router = APIRouter()
+
+############################
+# GetYield
+############################
+
+
+@router.get("/yield", response_model=EnergyYieldResponse)
+async def get_yield(
+    sensor: EnergySensor = EnergySensor.PZEM,
+    bucket: Bucket = Bucket.DAY,
+    device_id: Optional[int] = None,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+):
+    return await AsyncEnergy.get_yields(
+        sensor, bucket=bucket, device_id=device_id, start=start, end=end
+    )
+
+
+############################
+# GetBalance
+############################
+
+
+@router.get("/balance", response_model=BalanceResponse)
+async def get_balance(
+    range_: str = Query("24h", alias="range", description="e.g. 15m, 24h, 7d, 4w"),
+    bucket: Optional[Bucket] = None,
+    step: int = Query(BALANCE_STEP, ge=1, description="grid spacing in seconds"),
+    tolerance: int = Query(BALANCE_TOLERANCE, ge=0),
+):
+    try:
+        seconds = parse_range(range_)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.INCORRECT_FORMAT(f": {e}"),
+        )
+
+    bucket = bucket or default_bucket(seconds)
+    if step > BUCKET_SECONDS.get(bucket, step) or seconds // step > 1_000_000:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.INCORRECT_FORMAT(
+                ": step must fit in a bucket and give at most 1000000 grid points"
+            ),
+        )
+
+    return await Energy.get_balance(seconds, bucket, step, tolerance)
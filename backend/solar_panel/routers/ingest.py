@@ -0,0 +1,46 @@
+import logging
+
+from solar_panel.models.ingest import (
+    AsyncIngest,
+    IngestBuffer,
+    IngestBufferMetrics,
+    IngestBulkForm,
+    IngestBulkResponse,
+)
+
+from solar_panel.constants import ERROR_MESSAGES
+from fastapi import APIRouter, HTTPException, status
+
+from solar_panel.env import SRC_LOG_LEVELS
+
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+router = APIRouter()
+
+############################
+# BulkIngest
+############################
+
+
+@router.post("/bulk", response_model=IngestBulkResponse)
+async def bulk_ingest(form_data: IngestBulkForm):
+    try:
+        return await AsyncIngest.insert_bulk(form_data)
+    except Exception as e:
+        log.exception(f"Error ingesting bulk readings: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(e),
+        )
+
+
+############################
+# GetBufferMetrics
+############################
+
+
+@router.get("/buffer", response_model=IngestBufferMetrics)
+async def get_buffer_metrics():
+    return IngestBuffer.get_metrics()
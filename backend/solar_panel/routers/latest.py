@@ -0,0 +1,22 @@
+import logging
+
+from solar_panel.models.latest import AsyncLatest, LatestReadingsResponse
+
+from fastapi import APIRouter
+
+from solar_panel.env import SRC_LOG_LEVELS
+
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+router = APIRouter()
+
+############################
+# GetLatest
+############################
+
+
+@router.get("/", response_model=LatestReadingsResponse)
+async def get_latest():
+    return await AsyncLatest.get_latest()
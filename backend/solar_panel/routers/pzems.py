@@ -3,16 +3,38 @@ import logging
 
 from solar_panel.models.pzems import (
     Pzems,
+    AsyncPzems,
     PzemForm,
     PzemUpdateForm,
     PzemResponse,
+    PzemAggregateModel,
+    PZEM_COLUMNS,
 )
 
-from solar_panel.constants import ERROR_MESSAGES
-from fastapi import APIRouter, HTTPException, status
+from solar_panel.models.ingest import IngestBuffer, IngestBufferFull
+from solar_panel.models.latest import AsyncLatest
+from solar_panel.models.versions import AsyncVersions
 
-from solar_panel.env import SRC_LOG_LEVELS
+from solar_panel.constants import ERROR_MESSAGES
+from fastapi import APIRouter, HTTPException, Query, Request, status
 
+from solar_panel.env import INGEST_BUFFER_ENABLED, SRC_LOG_LEVELS
+from solar_panel.utils.aggregation import Bucket
+from solar_panel.utils.caching import cache_headers, not_modified_response
+from solar_panel.utils.chunked import streaming_response
+from solar_panel.utils.columnar import (
+    STREAMING_FORMATS,
+    HistoryFormat,
+    columnar_response,
+    rows_response,
+    negotiate_format,
+)
+from solar_panel.utils.ingest import BulkItemStatus
+from solar_panel.utils.pagination import (
+    decode_cursor,
+    next_cursor,
+    next_cursor_from_columns,
+)
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
@@ -25,8 +47,86 @@ router = APIRouter()
 
 
 @router.get("/", response_model=list[PzemResponse])
-async def get_pzems():
-    return Pzems.get_pzems()
+async def get_pzems(
+    request: Request,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    format: Optional[HistoryFormat] = None,
+):
+    try:
+        after = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.INCORRECT_FORMAT(f": {e}"),
+        )
+
+    history_format = negotiate_format(format, request.headers.get("accept"))
+    if history_format in STREAMING_FORMATS and limit is not None:
+        # A stream has no header left to carry X-Next-Cursor once it starts
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.STREAM_LIMIT_NOT_SUPPORTED,
+        )
+    headers = cache_headers(
+        await AsyncVersions.get_version("pzems"), history_format.value
+    )
+    not_modified = not_modified_response(request, headers)
+    if not_modified:
+        return not_modified
+
+    if history_format in STREAMING_FORMATS:
+        return streaming_response(
+            Pzems.history_statement(start=start, end=end, cursor=after),
+            PZEM_COLUMNS,
+            history_format,
+            headers=headers,
+        )
+    if history_format != HistoryFormat.ROWS:
+        columns = await AsyncPzems.get_pzem_columns(
+            start=start, end=end, cursor=after, limit=limit
+        )
+        cursor = next_cursor_from_columns(columns, limit)
+        if cursor:
+            headers["X-Next-Cursor"] = cursor
+        return columnar_response(columns, history_format, headers=headers)
+
+    rows = await AsyncPzems.get_pzem_rows(
+        start=start, end=end, cursor=after, limit=limit
+    )
+    cursor = next_cursor(rows, limit)
+    if cursor:
+        headers["X-Next-Cursor"] = cursor
+    return rows_response(PZEM_COLUMNS, rows, headers=headers)
+
+
+############################
+# GetLatestPzems
+############################
+
+
+@router.get("/latest", response_model=list[PzemResponse])
+async def get_latest_pzems():
+    return await AsyncLatest.get_latest_pzems()
+
+
+############################
+# AggregatePzems
+############################
+
+
+@router.get("/aggregate", response_model=list[PzemAggregateModel])
+async def aggregate_pzems(
+    bucket: Bucket = Bucket.HOUR,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    device_id: Optional[int] = None,
+):
+    return await AsyncPzems.aggregate_pzems(
+        bucket, device_id=device_id, start=start, end=end
+    )
 
 
 ############################
@@ -36,8 +136,19 @@ async def get_pzems():
 
 @router.post("/create", response_model=Optional[PzemResponse])
 async def create_new_pzem(form_data: PzemForm):
+    if INGEST_BUFFER_ENABLED:
+        # Acknowledged now, written by the next buffer flush
+        try:
+            return IngestBuffer.enqueue("pzems", form_data)
+        except IngestBufferFull:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=ERROR_MESSAGES.INGEST_BUFFER_FULL,
+                headers={"Retry-After": "1"},
+            )
+
     try:
-        pzem = Pzems.insert_new_pzem(form_data)
+        pzem = await AsyncPzems.insert_new_pzem(form_data)
         if pzem:
             return pzem
         else:
@@ -53,6 +164,23 @@ async def create_new_pzem(form_data: PzemForm):
         )
 
 
+############################
+# BulkCreatePzems
+############################
+
+
+@router.post("/bulk", response_model=list[BulkItemStatus])
+async def bulk_create_pzems(form_data: list[dict]):
+    try:
+        return await AsyncPzems.insert_new_pzems(form_data)
+    except Exception as e:
+        log.exception(f"Error bulk creating pzems: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(e),
+        )
+
+
 ############################
 # GetPzemsById
 ############################
@@ -60,7 +188,7 @@ async def create_new_pzem(form_data: PzemForm):
 
 @router.get("/id/{id}", response_model=Optional[PzemResponse])
 async def get_pzem_by_id(id: str):
-    pzem = Pzems.get_pzem_by_id(id)
+    pzem = await AsyncPzems.get_pzem_by_id(id)
     if pzem:
         return pzem
     else:
@@ -76,10 +204,66 @@ async def get_pzem_by_id(id: str):
 
 
 @router.get("/device/id/{device_id}", response_model=list[PzemResponse])
-async def get_pzem_by_device_id(device_id: int):
-    pzems = Pzems.get_pzem_by_device_id(device_id)
-    if pzems is not None:
-        return pzems
+async def get_pzem_by_device_id(
+    device_id: int,
+    request: Request,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    format: Optional[HistoryFormat] = None,
+):
+    try:
+        after = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.INCORRECT_FORMAT(f": {e}"),
+        )
+
+    history_format = negotiate_format(format, request.headers.get("accept"))
+    if history_format in STREAMING_FORMATS and limit is not None:
+        # A stream has no header left to carry X-Next-Cursor once it starts
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.STREAM_LIMIT_NOT_SUPPORTED,
+        )
+    headers = cache_headers(
+        await AsyncVersions.get_version("pzems"), history_format.value
+    )
+    not_modified = not_modified_response(request, headers)
+    if not_modified:
+        return not_modified
+
+    if history_format in STREAMING_FORMATS:
+        return streaming_response(
+            Pzems.history_statement(
+                device_id=device_id, start=start, end=end, cursor=after
+            ),
+            PZEM_COLUMNS,
+            history_format,
+            headers=headers,
+        )
+    if history_format != HistoryFormat.ROWS:
+        columns = await AsyncPzems.get_pzem_columns(
+            device_id=device_id, start=start, end=end, cursor=after, limit=limit
+        )
+        cursor = next_cursor_from_columns(columns, limit)
+        if cursor:
+            headers["X-Next-Cursor"] = cursor
+        return columnar_response(columns, history_format, headers=headers)
+
+    rows = await AsyncPzems.get_pzem_rows(
+        device_id=device_id, start=start, end=end, cursor=after, limit=limit
+    )
+    if rows:
+        cursor = next_cursor(rows, limit)
+        if cursor:
+            headers["X-Next-Cursor"] = cursor
+        return rows_response(PZEM_COLUMNS, rows, headers=headers)
+    elif after is not None:
+        # Paged past the last row of the device history
+        return rows_response(PZEM_COLUMNS, [], headers=headers)
     else:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -95,7 +279,7 @@ async def get_pzem_by_device_id(device_id: int):
 @router.post("/id/{id}/update", response_model=Optional[PzemResponse])
 async def update_pzem_by_id(id: str, form_data: PzemUpdateForm):
     try:
-        pzem = Pzems.update_pzem_by_id(id, form_data)
+        pzem = await AsyncPzems.update_pzem_by_id(id, form_data)
         if pzem:
             return pzem
         else:
@@ -119,7 +303,7 @@ async def update_pzem_by_id(id: str, form_data: PzemUpdateForm):
 @router.delete("/id/{id}/delete", response_model=bool)
 async def delete_pzem_by_id(id: str):
     try:
-        result = Pzems.delete_pzem_by_id(id)
+        result = await AsyncPzems.delete_pzem_by_id(id)
         if result:
             return result
         else:
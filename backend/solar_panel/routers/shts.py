@@ -3,16 +3,38 @@ import logging
 
 from solar_panel.models.shts import (
     Shts,
+    AsyncShts,
     ShtForm,
     ShtUpdateForm,
     ShtResponse,
+    ShtAggregateModel,
+    SHT_COLUMNS,
 )
 
-from solar_panel.constants import ERROR_MESSAGES
-from fastapi import APIRouter, HTTPException, status
-
-from solar_panel.env import SRC_LOG_LEVELS
+from solar_panel.models.ingest import IngestBuffer, IngestBufferFull
+from solar_panel.models.latest import AsyncLatest
+from solar_panel.models.versions import AsyncVersions
 
+from solar_panel.constants import ERROR_MESSAGES
+from fastapi import APIRouter, HTTPException, Query, Request, status
+
+from solar_panel.env import INGEST_BUFFER_ENABLED, SRC_LOG_LEVELS
+from solar_panel.utils.aggregation import Bucket
+from solar_panel.utils.caching import cache_headers, not_modified_response
+from solar_panel.utils.chunked import streaming_response
+from solar_panel.utils.columnar import (
+    STREAMING_FORMATS,
+    HistoryFormat,
+    columnar_response,
+    rows_response,
+    negotiate_format,
+)
+from solar_panel.utils.ingest import BulkItemStatus
+from solar_panel.utils.pagination import (
+    decode_cursor,
+    next_cursor,
+    next_cursor_from_columns,
+)
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
@@ -25,8 +47,84 @@ router = APIRouter()
 
 
 @router.get("/", response_model=list[ShtResponse])
-async def get_shts():
-    return Shts.get_shts()
+async def get_shts(
+    request: Request,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    format: Optional[HistoryFormat] = None,
+):
+    try:
+        after = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.INCORRECT_FORMAT(f": {e}"),
+        )
+
+    history_format = negotiate_format(format, request.headers.get("accept"))
+    if history_format in STREAMING_FORMATS and limit is not None:
+        # A stream has no header left to carry X-Next-Cursor once it starts
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.STREAM_LIMIT_NOT_SUPPORTED,
+        )
+    headers = cache_headers(
+        await AsyncVersions.get_version("shts"), history_format.value
+    )
+    not_modified = not_modified_response(request, headers)
+    if not_modified:
+        return not_modified
+
+    if history_format in STREAMING_FORMATS:
+        return streaming_response(
+            Shts.history_statement(start=start, end=end, cursor=after),
+            SHT_COLUMNS,
+            history_format,
+            headers=headers,
+        )
+    if history_format != HistoryFormat.ROWS:
+        columns = await AsyncShts.get_sht_columns(
+            start=start, end=end, cursor=after, limit=limit
+        )
+        cursor = next_cursor_from_columns(columns, limit)
+        if cursor:
+            headers["X-Next-Cursor"] = cursor
+        return columnar_response(columns, history_format, headers=headers)
+
+    rows = await AsyncShts.get_sht_rows(start=start, end=end, cursor=after, limit=limit)
+    cursor = next_cursor(rows, limit)
+    if cursor:
+        headers["X-Next-Cursor"] = cursor
+    return rows_response(SHT_COLUMNS, rows, headers=headers)
+
+
+############################
+# GetLatestShts
+############################
+
+
+@router.get("/latest", response_model=list[ShtResponse])
+async def get_latest_shts():
+    return await AsyncLatest.get_latest_shts()
+
+
+############################
+# AggregateShts
+############################
+
+
+@router.get("/aggregate", response_model=list[ShtAggregateModel])
+async def aggregate_shts(
+    bucket: Bucket = Bucket.HOUR,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    device_id: Optional[int] = None,
+):
+    return await AsyncShts.aggregate_shts(
+        bucket, device_id=device_id, start=start, end=end
+    )
 
 
 ############################
@@ -36,8 +134,19 @@ async def get_shts():
 
 @router.post("/create", response_model=Optional[ShtResponse])
 async def create_new_sht(form_data: ShtForm):
+    if INGEST_BUFFER_ENABLED:
+        # Acknowledged now, written by the next buffer flush
+        try:
+            return IngestBuffer.enqueue("shts", form_data)
+        except IngestBufferFull:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=ERROR_MESSAGES.INGEST_BUFFER_FULL,
+                headers={"Retry-After": "1"},
+            )
+
     try:
-        sht = Shts.insert_new_sht(form_data)
+        sht = await AsyncShts.insert_new_sht(form_data)
         if sht:
             return sht
         else:
@@ -53,6 +162,23 @@ async def create_new_sht(form_data: ShtForm):
         )
 
 
+############################
+# BulkCreateShts
+############################
+
+
+@router.post("/bulk", response_model=list[BulkItemStatus])
+async def bulk_create_shts(form_data: list[dict]):
+    try:
+        return await AsyncShts.insert_new_shts(form_data)
+    except Exception as e:
+        log.exception(f"Error bulk creating shts: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(e),
+        )
+
+
 ############################
 # GetShtsById
 ############################
@@ -60,7 +186,7 @@ async def create_new_sht(form_data: ShtForm):
 
 @router.get("/id/{id}", response_model=Optional[ShtResponse])
 async def get_sht_by_id(id: str):
-    sht = Shts.get_sht_by_id(id)
+    sht = await AsyncShts.get_sht_by_id(id)
     if sht:
         return sht
     else:
@@ -78,7 +204,7 @@ async def get_sht_by_id(id: str):
 @router.post("/id/{id}/update", response_model=Optional[ShtResponse])
 async def update_sht_by_id(id: str, form_data: ShtUpdateForm):
     try:
-        sht = Shts.update_sht_by_id(id, form_data)
+        sht = await AsyncShts.update_sht_by_id(id, form_data)
         if sht:
             return sht
         else:
@@ -102,7 +228,7 @@ async def update_sht_by_id(id: str, form_data: ShtUpdateForm):
 @router.delete("/id/{id}/delete", response_model=bool)
 async def delete_sht_by_id(id: str):
     try:
-        result = Shts.delete_sht_by_id(id)
+        result = await AsyncShts.delete_sht_by_id(id)
         if result:
             return result
         else:
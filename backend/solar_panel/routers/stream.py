@@ -0,0 +1,91 @@
+import asyncio
+import json
+import logging
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from solar_panel.env import SRC_LOG_LEVELS, STREAM_KEEPALIVE_INTERVAL
+from solar_panel.utils.stream import Bus
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+router = APIRouter()
+
+Sensor = Literal["pzems", "ddsus", "shts"]
+
+############################
+# StreamReadings (SSE)
+############################
+
+
+@router.get("/")
+async def stream_readings(
+    sensor: Optional[list[Sensor]] = Query(None),
+    device_id: Optional[list[int]] = Query(None),
+):
+    subscription = Bus.subscribe(set(sensor or []), set(device_id or []))
+
+    async def event_stream():
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.get(), timeout=STREAM_KEEPALIVE_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    # SSE comment line, keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+
+                yield f"event: {message['sensor']}\ndata: {json.dumps(message)}\n\n"
+        finally:
+            Bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+############################
+# StreamReadings (WebSocket)
+############################
+
+
+@router.websocket("/ws")
+async def stream_readings_ws(
+    websocket: WebSocket,
+    sensor: Optional[list[Sensor]] = Query(None),
+    device_id: Optional[list[int]] = Query(None),
+):
+    await websocket.accept()
+    subscription = Bus.subscribe(set(sensor or []), set(device_id or []))
+
+    async def drain_client():
+        # Clients only listen; reading is how we notice that they went away
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    receiver = asyncio.create_task(drain_client())
+    try:
+        while True:
+            getter = asyncio.create_task(subscription.get())
+            done, _ = await asyncio.wait(
+                {getter, receiver}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if receiver in done:
+                getter.cancel()
+                break
+            await websocket.send_json(getter.result())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        Bus.unsubscribe(subscription)
@@ -0,0 +1,156 @@
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel
+from sqlalchemy import BigInteger, cast, extract, func
+
+
+class Bucket(str, Enum):
+    MINUTE = "minute"
+    HOUR = "hour"
+    DAY = "day"
+    MONTH = "month"
+
+
+BUCKET_SECONDS = {
+    Bucket.MINUTE: 60,
+    Bucket.HOUR: 60 * 60,
+    Bucket.DAY: 24 * 60 * 60,
+}
+
+RANGE_UNITS = {"m": 60, "h": 60 * 60, "d": 24 * 60 * 60, "w": 7 * 24 * 60 * 60}
+
+
+def parse_range(value: str) -> int:
+    """Parse a time range like "15m", "24h", "7d" or "4w" into seconds."""
+    number, unit = value[:-1], value[-1:]
+    if not number.isdigit() or unit not in RANGE_UNITS or int(number) == 0:
+        raise ValueError(f"Invalid range '{value}', expected e.g. 24h, 7d or 4w")
+    return int(number) * RANGE_UNITS[unit]
+
+
+def default_bucket(seconds: int) -> Bucket:
+    """A bucket giving a chart-sized series (tens to hundreds of points)."""
+    if seconds <= 6 * 60 * 60:
+        return Bucket.MINUTE
+    if seconds <= 14 * 24 * 60 * 60:
+        return Bucket.HOUR
+    if seconds <= 366 * 24 * 60 * 60:
+        return Bucket.DAY
+    return Bucket.MONTH
+
+
+AGGREGATE_FUNCTIONS = {
+    "avg": func.avg,
+    "min": func.min,
+    "max": func.max,
+    "sum": func.sum,
+}
+
+
+class MetricAggregate(BaseModel):
+    avg: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    sum: Optional[float] = None
+
+
+def bucket_expression(column, bucket: Bucket, dialect: str):
+    """Floor an epoch-seconds column to the start of its (UTC) bucket."""
+    if bucket in BUCKET_SECONDS:
+        width = BUCKET_SECONDS[bucket]
+        return (column // width) * width
+
+    # Months have no fixed width, let the database do the calendar math
+    if dialect == "sqlite":
+        return cast(
+            func.strftime("%s", column, "unixepoch", "start of month"), BigInteger
+        )
+    return cast(
+        extract(
+            "epoch",
+            func.date_trunc("month", func.timezone("UTC", func.to_timestamp(column))),
+        ),
+        BigInteger,
+    )
+
+
+def bucket_floor(timestamp: int, bucket: Bucket) -> int:
+    """Start of the (UTC) bucket an epoch timestamp falls in."""
+    if bucket in BUCKET_SECONDS:
+        width = BUCKET_SECONDS[bucket]
+        return timestamp // width * width
+
+    moment = datetime.fromtimestamp(timestamp, timezone.utc)
+    return int(datetime(moment.year, moment.month, 1, tzinfo=timezone.utc).timestamp())
+
+
+def bucket_ceiling(timestamp: int, bucket: Bucket) -> int:
+    """Start of the (UTC) bucket after the one an epoch timestamp falls in."""
+    if bucket in BUCKET_SECONDS:
+        return bucket_floor(timestamp, bucket) + BUCKET_SECONDS[bucket]
+
+    moment = datetime.fromtimestamp(timestamp, timezone.utc)
+    year, month = divmod(moment.year * 12 + moment.month, 12)
+    return int(datetime(year, month + 1, 1, tzinfo=timezone.utc).timestamp())
+
+
+def format_aggregate_rows(rows, metrics: list[str]) -> list[dict]:
+    """
+    Shape labelled (bucket, device_id, count, <metric>_<fn>...) result rows as
+    {"timestamp", "device_id", "count", <metric>: {avg, min, max, sum}}.
+    """
+    return [
+        {
+            "timestamp": row.bucket,
+            "device_id": row.device_id,
+            "count": row.count,
+            **{
+                metric: {
+                    name: getattr(row, f"{metric}_{name}")
+                    for name in AGGREGATE_FUNCTIONS
+                }
+                for metric in metrics
+            },
+        }
+        for row in rows
+    ]
+
+
+def aggregate_rows(
+    db,
+    table,
+    metrics: list[str],
+    bucket: Bucket,
+    device_id: Optional[int] = None,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+) -> list[dict]:
+    """
+    GROUP BY (bucket, device_id) over a raw sensor table. The start/end
+    bounds select whole buckets: the buckets they fall in are returned in
+    full, whether rows are read from a rollup or from the raw table.
+    """
+    bucket_column = bucket_expression(
+        table.timestamp, bucket, db.get_bind().dialect.name
+    ).label("bucket")
+
+    columns = [bucket_column, table.device_id, func.count().label("count")]
+    for metric in metrics:
+        for name, fn in AGGREGATE_FUNCTIONS.items():
+            columns.append(fn(getattr(table, metric)).label(f"{metric}_{name}"))
+
+    query = db.query(*columns)
+    if device_id is not None:
+        query = query.filter(table.device_id == device_id)
+    if start is not None:
+        query = query.filter(table.timestamp >= bucket_floor(start, bucket))
+    if end is not None:
+        query = query.filter(table.timestamp < bucket_ceiling(end, bucket))
+
+    query = query.group_by(bucket_column, table.device_id).order_by(
+        bucket_column, table.device_id
+    )
+
+    return format_aggregate_rows(query.all(), metrics)
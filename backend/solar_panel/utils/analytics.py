@@ -0,0 +1,182 @@
+import asyncio
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select
+
+from solar_panel.env import ANALYTICS_BATCH_SIZE
+from solar_panel.utils.chunked import stream_partitions
+
+####################
+# Series analytics
+####################
+
+# A series is a pair of equally long arrays: int64 epoch timestamps in
+# ascending order and the float64 values of one metric. Everything below
+# works on whole arrays at once; nothing loops over readings in Python.
+# Callers on the event loop run these functions in a worker thread
+# (asyncio.to_thread), so a long series never stalls other requests.
+
+SERIES_DTYPE = [("timestamp", np.int64), ("value", np.float64)]
+
+
+def rows_to_array(rows: list, dtype) -> np.ndarray:
+    """Copy a batch of result rows into a structured array."""
+    return np.fromiter(map(tuple, rows), dtype=dtype, count=len(rows))
+
+
+async def stream_array(statement, dtype) -> np.ndarray:
+    """
+    Run a SELECT on the async engine and collect its rows into one structured
+    array. Rows arrive in batches of ANALYTICS_BATCH_SIZE and each batch is
+    converted in a worker thread, so neither the fetch nor the conversion
+    holds the event loop for the whole result.
+    """
+    chunks = [
+        await asyncio.to_thread(rows_to_array, partition, dtype)
+        async for partition in stream_partitions(statement, ANALYTICS_BATCH_SIZE)
+    ]
+    if not chunks:
+        return np.empty(0, dtype=dtype)
+    return await asyncio.to_thread(np.concatenate, chunks)
+
+
+async def load_series(
+    table,
+    metric: str,
+    device_id: int,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Read one metric of a device into (timestamps, values) arrays."""
+    column = getattr(table, metric)
+    conditions = [
+        table.device_id == device_id,
+        table.timestamp.isnot(None),
+        column.isnot(None),
+    ]
+    if start is not None:
+        conditions.append(table.timestamp >= start)
+    if end is not None:
+        conditions.append(table.timestamp <= end)
+
+    series = await stream_array(
+        select(table.timestamp, column).where(*conditions).order_by(table.timestamp),
+        SERIES_DTYPE,
+    )
+    return series["timestamp"], series["value"]
+
+
+def sample_durations(timestamps: np.ndarray) -> np.ndarray:
+    """
+    Seconds each reading stands for: the gap to the next reading, and the
+    median gap for the last one. Timestamps are whole seconds, so every gap
+    counts at least one: readings sharing a timestamp never weigh zero.
+    """
+    if len(timestamps) < 2:
+        return np.ones(len(timestamps), dtype=np.float64)
+
+    gaps = np.maximum(np.diff(timestamps), 1).astype(np.float64)
+    return np.append(gaps, np.median(gaps))
+
+
+def series_statistics(values: np.ndarray, percentiles: list[float]) -> dict:
+    if len(values) == 0:
+        return {
+            "count": 0,
+            "mean": None,
+            "std": None,
+            "min": None,
+            "max": None,
+            "percentiles": {f"{p:g}": None for p in percentiles},
+        }
+
+    return {
+        "count": int(len(values)),
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "percentiles": dict(
+            zip(
+                [f"{p:g}" for p in percentiles],
+                np.percentile(values, percentiles).tolist(),
+            )
+        ),
+    }
+
+
+def load_duration_curve(
+    timestamps: np.ndarray, values: np.ndarray, points: int
+) -> list[dict]:
+    """
+    Values sorted from highest to lowest against the fraction of time they
+    were met or exceeded, sampled at `points` evenly spaced fractions.
+    Readings are weighted by the time they stand for, so uneven sampling does
+    not skew the curve.
+    """
+    if len(values) == 0:
+        return []
+
+    order = np.argsort(values)[::-1]
+    durations = sample_durations(timestamps)[order]
+    exceeded = np.cumsum(durations) / durations.sum()
+
+    fractions = np.linspace(0, 1, points)
+    curve = np.interp(fractions, exceeded, values[order])
+    return [
+        {"fraction": fraction, "value": value}
+        for fraction, value in zip(fractions.tolist(), curve.tolist())
+    ]
+
+
+def detect_peaks(
+    timestamps: np.ndarray,
+    values: np.ndarray,
+    threshold: Optional[float] = None,
+    limit: int = 10,
+) -> list[dict]:
+    """
+    Local maxima at or above threshold (mean + 2 std by default), the highest
+    `limit` of them in time order. A plateau counts once, at its first reading.
+    """
+    if len(values) < 3:
+        return []
+    if threshold is None:
+        threshold = values.mean() + 2 * values.std()
+
+    middle = values[1:-1]
+    is_peak = (middle > values[:-2]) & (middle >= values[2:]) & (middle >= threshold)
+    indexes = np.flatnonzero(is_peak) + 1
+
+    if len(indexes) > limit:
+        highest = np.argpartition(values[indexes], -limit)[-limit:]
+        indexes = np.sort(indexes[highest])
+
+    return [
+        {"timestamp": timestamp, "value": value}
+        for timestamp, value in zip(
+            timestamps[indexes].tolist(), values[indexes].tolist()
+        )
+    ]
+
+
+def moving_average(
+    timestamps: np.ndarray, values: np.ndarray, window: int, max_points: int
+) -> list[dict]:
+    """
+    Mean of each run of `window` consecutive readings, stamped with the last
+    reading of the run. Long series are thinned to at most max_points.
+    """
+    if len(values) < window:
+        return []
+
+    totals = np.cumsum(np.insert(values, 0, 0.0))
+    averages = (totals[window:] - totals[:-window]) / window
+    stamps = timestamps[window - 1 :]
+
+    step = max(1, -(-len(averages) // max_points))
+    return [
+        {"timestamp": timestamp, "value": value}
+        for timestamp, value in zip(stamps[::step].tolist(), averages[::step].tolist())
+    ]
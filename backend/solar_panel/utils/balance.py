@@ -0,0 +1,174 @@
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select
+
+from solar_panel.utils.aggregation import BUCKET_SECONDS, Bucket
+from solar_panel.utils.analytics import stream_array
+
+####################
+# Energy balance
+####################
+
+# The PV, grid and load meters are read at their own, unaligned instants. Each
+# series is resampled onto one time grid with an as-of join: a grid point
+# takes the meter's latest reading at or before it, if that reading is no
+# older than the tolerance. Grid points where the PV or the grid meter is
+# missing are left out. Every remaining point stands for `step` seconds of
+# the power it carries; those energies are then summed per bucket. Apart
+# from loading, everything here is CPU-bound and meant to run in a worker
+# thread.
+
+
+async def load_device_series(
+    table,
+    metric: str,
+    device_ids: list[int],
+    start: int,
+    end: int,
+) -> dict[int, tuple[np.ndarray, np.ndarray]]:
+    """
+    Read one metric of several devices with a single query, as (timestamps,
+    values) arrays per device. Devices without readings get empty arrays.
+    Rows are streamed from the async engine and converted off the event loop.
+    """
+    column = getattr(table, metric)
+    rows = await stream_array(
+        select(table.device_id, table.timestamp, column)
+        .where(
+            table.device_id.in_(device_ids),
+            table.timestamp >= start,
+            table.timestamp <= end,
+            column.isnot(None),
+        )
+        .order_by(table.device_id, table.timestamp),
+        [("device_id", np.int64), ("timestamp", np.int64), ("value", np.float64)],
+    )
+
+    # Rows are sorted by device, so each device is one contiguous slice
+    series = {}
+    for device_id in device_ids:
+        low = np.searchsorted(rows["device_id"], device_id, side="left")
+        high = np.searchsorted(rows["device_id"], device_id, side="right")
+        series[device_id] = (rows["timestamp"][low:high], rows["value"][low:high])
+    return series
+
+
+def time_grid(start: int, end: int, step: int) -> np.ndarray:
+    """Multiples of step in [start, end]."""
+    first = -(-start // step) * step
+    return np.arange(first, end + 1, step, dtype=np.int64)
+
+
+def asof(
+    grid: np.ndarray,
+    timestamps: np.ndarray,
+    values: np.ndarray,
+    tolerance: int,
+) -> np.ndarray:
+    """
+    Value of the latest reading at or before each grid point, NaN where there
+    is none within tolerance seconds.
+    """
+    aligned = np.full(len(grid), np.nan)
+    if len(timestamps) == 0:
+        return aligned
+
+    index = np.searchsorted(timestamps, grid, side="right") - 1
+    found = index >= 0
+    index = np.maximum(index, 0)
+    found &= grid - timestamps[index] <= tolerance
+
+    aligned[found] = values[index[found]]
+    return aligned
+
+
+def bucket_starts(timestamps: np.ndarray, bucket: Bucket) -> np.ndarray:
+    """Floor epoch seconds to the start of their (UTC) bucket."""
+    if bucket in BUCKET_SECONDS:
+        width = BUCKET_SECONDS[bucket]
+        return timestamps // width * width
+
+    months = timestamps.astype("datetime64[s]").astype("datetime64[M]")
+    return months.astype("datetime64[s]").astype(np.int64)
+
+
+def _ratio(numerator: float, denominator: float) -> Optional[float]:
+    return numerator / denominator if denominator > 0 else None
+
+
+def balance_buckets(
+    grid: np.ndarray,
+    pv: np.ndarray,
+    grid_power: np.ndarray,
+    loads: dict[int, np.ndarray],
+    step: int,
+    bucket: Bucket,
+) -> list[dict]:
+    """
+    Per bucket energies (Wh) of PV production, grid import and export, the
+    PV consumed on site, the site load (PV + grid) and its split over the
+    load meters, with whatever they do not cover as `other`.
+    """
+    covered = ~np.isnan(pv) & ~np.isnan(grid_power)
+    if not covered.any():
+        return []
+
+    pv = np.clip(pv[covered], 0, None)
+    grid_power = grid_power[covered]
+    site_load = np.clip(pv + grid_power, 0, None)
+    self_consumed = np.minimum(pv, site_load)
+
+    starts, inverse = np.unique(
+        bucket_starts(grid[covered], bucket), return_inverse=True
+    )
+    counts = np.bincount(inverse, minlength=len(starts))
+    hours = step / 3600
+
+    def energy(power: np.ndarray) -> np.ndarray:
+        return np.bincount(inverse, weights=power, minlength=len(starts)) * hours
+
+    totals = {
+        "pv": energy(pv),
+        "grid_import": energy(np.clip(grid_power, 0, None)),
+        "export": energy(np.clip(-grid_power, 0, None)),
+        "self_consumed": energy(self_consumed),
+        "load": energy(site_load),
+    }
+
+    metered = np.zeros(len(starts))
+    load_energy = {}
+    for device_id, power in loads.items():
+        power = power[covered]
+        present = ~np.isnan(power)
+        load_energy[device_id] = (
+            energy(np.where(present, power, 0.0)),
+            np.bincount(inverse, weights=present, minlength=len(starts)) > 0,
+        )
+        metered += load_energy[device_id][0]
+
+    other = totals["load"] - metered
+
+    buckets = []
+    for i, start in enumerate(starts.tolist()):
+        values = {name: float(total[i]) for name, total in totals.items()}
+        buckets.append(
+            {
+                "timestamp": start,
+                "count": int(counts[i]),
+                **values,
+                "loads": [
+                    {
+                        "device_id": device_id,
+                        "energy": float(total[i]) if present[i] else None,
+                    }
+                    for device_id, (total, present) in load_energy.items()
+                ],
+                "other": float(other[i]),
+                "self_consumption_ratio": _ratio(values["self_consumed"], values["pv"]),
+                "self_sufficiency_ratio": _ratio(
+                    values["self_consumed"], values["load"]
+                ),
+            }
+        )
+    return buckets
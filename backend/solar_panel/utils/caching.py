@@ -0,0 +1,54 @@
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+####################
+# Conditional requests
+####################
+
+
+# Responses carry an ETag built from the version of the dataset they were read
+# from (see models/versions.py) and the representation, plus Last-Modified.
+# Cache-Control: no-cache lets clients keep the body but revalidate each time,
+# which costs a primary key lookup and an empty 304 when nothing changed.
+
+
+def cache_headers(version, representation: str = "json") -> dict:
+    number = version.version if version else 0
+    name = version.name if version else "empty"
+
+    headers = {
+        "ETag": f'W/"{name}-{number}-{representation}"',
+        "Cache-Control": "no-cache",
+        "Vary": "Accept",
+    }
+    if version:
+        headers["Last-Modified"] = formatdate(version.updated_at, usegmt=True)
+    return headers
+
+
+def _opaque_tag(tag: str) -> str:
+    # Weak comparison: W/"x" and "x" match
+    return tag.strip().removeprefix("W/")
+
+
+def not_modified_response(request: Request, headers: dict) -> Optional[Response]:
+    """A 304 response if the request's validators still match, else None."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {_opaque_tag(tag) for tag in if_none_match.split(",")}
+        if "*" not in tags and _opaque_tag(headers["ETag"]) not in tags:
+            return None
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        if not if_modified_since or "Last-Modified" not in headers:
+            return None
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return None
+        if parsedate_to_datetime(headers["Last-Modified"]) > since:
+            return None
+
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
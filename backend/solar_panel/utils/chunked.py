@@ -0,0 +1,57 @@
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi.responses import StreamingResponse
+
+from solar_panel.env import HISTORY_STREAM_BATCH_SIZE
+from solar_panel.internal.db import get_async_db
+from solar_panel.utils.columnar import NDJSON_MEDIA_TYPE, HistoryFormat
+
+
+async def stream_partitions(
+    statement, batch_size: int = HISTORY_STREAM_BATCH_SIZE
+) -> AsyncIterator[list]:
+    """
+    Execute a SELECT on a server-side cursor and yield its rows in batches of
+    batch_size, so only one batch is ever held in memory.
+    """
+    async with get_async_db() as db:
+        result = await db.stream(statement.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield partition
+
+
+async def ndjson_chunks(statement, names: list[str]) -> AsyncIterator[str]:
+    async for partition in stream_partitions(statement):
+        yield "".join(
+            json.dumps(dict(zip(names, row)), separators=(",", ":")) + "\n"
+            for row in partition
+        )
+
+
+async def json_array_chunks(statement, names: list[str]) -> AsyncIterator[str]:
+    yield "["
+    separator = ""
+    async for partition in stream_partitions(statement):
+        yield separator + ",".join(
+            json.dumps(dict(zip(names, row)), separators=(",", ":"))
+            for row in partition
+        )
+        separator = ","
+    yield "]"
+
+
+def streaming_response(
+    statement, names: list[str], format: HistoryFormat, headers: Optional[dict] = None
+) -> StreamingResponse:
+    if format == HistoryFormat.NDJSON:
+        return StreamingResponse(
+            ndjson_chunks(statement, names),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers=headers,
+        )
+    return StreamingResponse(
+        json_array_chunks(statement, names),
+        media_type="application/json",
+        headers=headers,
+    )
@@ -0,0 +1,146 @@
+import json
+from enum import Enum
+from typing import Optional
+
+from fastapi import HTTPException, status
+from fastapi.responses import Response
+from pydantic_core import to_json
+
+from solar_panel.constants import ERROR_MESSAGES
+
+
+class HistoryFormat(str, Enum):
+    ROWS = "rows"  # default: one JSON object per reading
+    COLUMNS = "columns"  # JSON object of equal-length arrays
+    ARROW = "arrow"  # Apache Arrow IPC stream (needs pyarrow)
+    MSGPACK = "msgpack"  # MessagePack map of arrays (needs msgpack)
+    NDJSON = "ndjson"  # streamed, one JSON object per line
+    STREAM = "stream"  # streamed JSON array, same shape as ROWS
+
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+ACCEPT_FORMATS = {
+    "application/json": HistoryFormat.ROWS,
+    ARROW_MEDIA_TYPE: HistoryFormat.ARROW,
+    MSGPACK_MEDIA_TYPE: HistoryFormat.MSGPACK,
+    "application/x-msgpack": HistoryFormat.MSGPACK,
+    NDJSON_MEDIA_TYPE: HistoryFormat.NDJSON,
+    # Anything goes, so the default
+    "application/*": HistoryFormat.ROWS,
+    "*/*": HistoryFormat.ROWS,
+}
+
+STREAMING_FORMATS = {HistoryFormat.NDJSON, HistoryFormat.STREAM}
+
+
+def parse_accept(accept: Optional[str]) -> list[str]:
+    """
+    Media types of an Accept header, most preferred first: by q-value, then
+    concrete types before wildcards, then in header order. Types with q=0
+    are left out.
+    """
+    ranges = []
+    for position, media_range in enumerate((accept or "").split(",")):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        if not media_type:
+            continue
+
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+
+        if q > 0:
+            ranges.append((-q, "*" in media_type, position, media_type.lower()))
+
+    return [media_type for *_, media_type in sorted(ranges)]
+
+
+def negotiate_format(
+    format: Optional[HistoryFormat], accept: Optional[str]
+) -> HistoryFormat:
+    """
+    An explicit ?format= wins, otherwise the most preferred type in Accept
+    that we can produce.
+    """
+    if format is not None:
+        return format
+
+    for media_type in parse_accept(accept):
+        if media_type in ACCEPT_FORMATS:
+            return ACCEPT_FORMATS[media_type]
+
+    return HistoryFormat.ROWS
+
+
+def rows_to_columns(names: list[str], rows: list) -> dict[str, list]:
+    if not rows:
+        return {name: [] for name in names}
+    return {name: list(values) for name, values in zip(names, zip(*rows))}
+
+
+def rows_response(
+    names: list[str], rows: list, headers: Optional[dict] = None
+) -> Response:
+    """
+    Serialize plain rows as a JSON array of objects in one pydantic-core pass,
+    skipping response_model validation of data that came straight from the DB.
+    """
+    return Response(
+        content=to_json([dict(zip(names, row)) for row in rows]),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+def columnar_response(
+    columns: dict[str, list],
+    format: HistoryFormat,
+    headers: Optional[dict] = None,
+) -> Response:
+    if format == HistoryFormat.ARROW:
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise HTTPException(
+                status_code=status.HTTP_406_NOT_ACCEPTABLE,
+                detail=ERROR_MESSAGES.DEFAULT("pyarrow is not installed"),
+            )
+
+        table = pa.table(columns)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return Response(
+            content=sink.getvalue().to_pybytes(),
+            media_type=ARROW_MEDIA_TYPE,
+            headers=headers,
+        )
+
+    if format == HistoryFormat.MSGPACK:
+        try:
+            import msgpack
+        except ImportError:
+            raise HTTPException(
+                status_code=status.HTTP_406_NOT_ACCEPTABLE,
+                detail=ERROR_MESSAGES.DEFAULT("msgpack is not installed"),
+            )
+
+        return Response(
+            content=msgpack.packb(columns),
+            media_type=MSGPACK_MEDIA_TYPE,
+            headers=headers,
+        )
+
+    return Response(
+        content=json.dumps(columns, separators=(",", ":")),
+        media_type="application/json",
+        headers=headers,
+    )
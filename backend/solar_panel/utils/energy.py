@@ -0,0 +1,296 @@
+import logging
+from typing import Optional
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Double,
+    Integer,
+    Text,
+    case,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+
+from solar_panel.env import (
+    ENERGY_DDSU_COUNTER_MAX,
+    ENERGY_PZEM_COUNTER_MAX,
+    ENERGY_ROLLOVER_RATIO,
+    SRC_LOG_LEVELS,
+)
+from solar_panel.internal.db import Base
+from solar_panel.utils.aggregation import BUCKET_SECONDS, Bucket, bucket_expression
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+####################
+# Energy yield
+####################
+
+# The energy column of PZEM and DDSU readings is a cumulative meter counter, so
+# the energy produced between two readings is the difference between them.
+# Deltas are computed in the database with LAG() over each device's readings;
+# a counter that goes down either wrapped around (it was close to its max) or
+# was reset, in which case it restarted from zero.
+#
+# Daily totals are cached in energy_daily. Writes do not touch it: they only
+# record, per device, the oldest reading they changed in energy_pending, and
+# the days from there on are recomputed the next time the totals are read. An
+# append therefore costs one upsert and re-sums the current day only.
+
+ENERGY_COUNTER_MAX = {
+    "pzems": ENERGY_PZEM_COUNTER_MAX,
+    "ddsus": ENERGY_DDSU_COUNTER_MAX,
+}
+
+DAILY_SECONDS = BUCKET_SECONDS[Bucket.DAY]
+
+
+class EnergyDaily(Base):
+    __tablename__ = "energy_daily"
+
+    sensor = Column(Text, primary_key=True)
+    device_id = Column(Integer, primary_key=True)
+    timestamp = Column(BigInteger, primary_key=True)  # day start in epoch
+
+    energy = Column(Double, nullable=False)  # counter increase over the day
+    count = Column(BigInteger, nullable=False)  # intervals between readings
+    resets = Column(Integer, nullable=False)  # counter resets and rollovers
+
+
+class EnergyPending(Base):
+    __tablename__ = "energy_pending"
+
+    sensor = Column(Text, primary_key=True)
+    device_id = Column(Integer, primary_key=True)
+
+    since = Column(BigInteger, nullable=False)  # oldest changed reading
+    revision = Column(BigInteger, nullable=False)  # bumped by every write
+
+
+def mark_energy_stale(db, sensor: str, rows: list[dict]):
+    """
+    Record that readings of a sensor changed at the given (device_id,
+    timestamp)s. Runs inside the caller's transaction.
+    """
+    if sensor not in ENERGY_COUNTER_MAX:
+        return
+
+    since = {}
+    for row in rows:
+        device_id, timestamp = row.get("device_id"), row.get("timestamp")
+        if device_id is not None and timestamp is not None:
+            since[device_id] = min(timestamp, since.get(device_id, timestamp))
+    if not since:
+        return
+
+    if db.get_bind().dialect.name == "postgresql":
+        insert_fn, least = postgresql.insert, func.least
+    else:
+        insert_fn, least = sqlite.insert, func.min
+
+    table = EnergyPending.__table__
+    stmt = insert_fn(table).values(
+        [
+            {
+                "sensor": sensor,
+                "device_id": device_id,
+                "since": since[device_id],
+                "revision": 1,
+            }
+            for device_id in sorted(since)
+        ]
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["sensor", "device_id"],
+            set_={
+                "since": least(table.c.since, stmt.excluded.since),
+                "revision": table.c.revision + 1,
+            },
+        )
+    )
+
+
+def interval_deltas(
+    table,
+    sensor: str,
+    device_id: Optional[int] = None,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+):
+    """
+    Subquery of (device_id, timestamp, energy, resets) with one row per reading
+    in [start, end]: the counter increase since the device's previous reading,
+    and 1 if the counter went down in between.
+    """
+    conditions = [
+        table.device_id.isnot(None),
+        table.timestamp.isnot(None),
+        table.energy.isnot(None),
+    ]
+    if device_id is not None:
+        conditions.append(table.device_id == device_id)
+    if end is not None:
+        conditions.append(table.timestamp <= end)
+
+    lower = []
+    if start is not None:
+        # Reach back to the reading before start, so the first interval of
+        # the range has something to be measured against
+        previous = (
+            select(func.max(table.timestamp).label("timestamp"))
+            .where(*conditions, table.timestamp < start)
+            .group_by(table.device_id)
+            .subquery()
+        )
+        lower.append(
+            table.timestamp
+            >= func.coalesce(
+                select(func.min(previous.c.timestamp)).scalar_subquery(), start
+            )
+        )
+
+    readings = (
+        select(
+            table.device_id,
+            table.timestamp,
+            table.energy,
+            func.lag(table.energy)
+            .over(partition_by=table.device_id, order_by=(table.timestamp, table.id))
+            .label("previous"),
+        )
+        .where(*conditions, *lower)
+        .subquery()
+    )
+
+    change = readings.c.energy - readings.c.previous
+    counter_max = ENERGY_COUNTER_MAX[sensor]
+    whens = [(change >= 0, change)]
+    if counter_max > 0:
+        whens.append(
+            (
+                readings.c.previous >= counter_max * ENERGY_ROLLOVER_RATIO,
+                readings.c.energy + counter_max - readings.c.previous,
+            )
+        )
+
+    outer = [readings.c.previous.isnot(None)]
+    if start is not None:
+        outer.append(readings.c.timestamp >= start)
+
+    return (
+        select(
+            readings.c.device_id,
+            readings.c.timestamp,
+            case(*whens, else_=readings.c.energy).label("energy"),
+            case((change < 0, 1), else_=0).label("resets"),
+        )
+        .where(*outer)
+        .subquery()
+    )
+
+
+def aggregate_deltas(deltas, bucket: Bucket, dialect: str):
+    """Sum a subquery of interval_deltas per (bucket, device_id)."""
+    bucket_column = bucket_expression(deltas.c.timestamp, bucket, dialect)
+    return (
+        select(
+            bucket_column.label("timestamp"),
+            deltas.c.device_id,
+            func.sum(deltas.c.energy).label("energy"),
+            func.count().label("count"),
+            func.sum(deltas.c.resets).label("resets"),
+        )
+        .group_by(bucket_column, deltas.c.device_id)
+        .order_by(bucket_column, deltas.c.device_id)
+    )
+
+
+def refresh_device(db, table, sensor: str, device_id: int, since: int):
+    """Recompute the cached daily totals of a device from the day of since on."""
+    day = since // DAILY_SECONDS * DAILY_SECONDS
+    first = (
+        db.query(func.min(table.timestamp))
+        .filter(table.device_id == device_id, table.energy.isnot(None))
+        .scalar()
+    )
+    if first is not None:
+        # Days before the oldest raw reading were expired by retention and
+        # only survive as cached totals
+        day = max(day, first // DAILY_SECONDS * DAILY_SECONDS)
+
+    db.execute(
+        delete(EnergyDaily).where(
+            EnergyDaily.sensor == sensor,
+            EnergyDaily.device_id == device_id,
+            EnergyDaily.timestamp >= day,
+        )
+    )
+    if first is None:
+        return
+
+    deltas = interval_deltas(table, sensor, device_id=device_id, start=day)
+    daily = aggregate_deltas(deltas, Bucket.DAY, db.get_bind().dialect.name).subquery()
+    db.execute(
+        insert(EnergyDaily).from_select(
+            ["sensor", "device_id", "timestamp", "energy", "count", "resets"],
+            select(
+                literal(sensor),
+                daily.c.device_id,
+                daily.c.timestamp,
+                daily.c.energy,
+                daily.c["count"],
+                daily.c.resets,
+            ),
+        )
+    )
+
+
+def refresh_energy(db, table, sensor: str, device_id: Optional[int] = None) -> int:
+    """
+    Bring the cached daily totals of a sensor up to date with its readings,
+    one device per transaction. Returns the number of devices refreshed.
+    """
+    query = db.query(EnergyPending.device_id).filter(EnergyPending.sensor == sensor)
+    if device_id is not None:
+        query = query.filter(EnergyPending.device_id == device_id)
+
+    refreshed = 0
+    for (pending_device_id,) in query.all():
+        # The row lock makes concurrent refreshes of a device take turns;
+        # writers only wait on it while the device is being recomputed
+        pending = (
+            db.query(EnergyPending)
+            .filter_by(sensor=sensor, device_id=pending_device_id)
+            .with_for_update()
+            .first()
+        )
+        if pending is None:
+            # Refreshed by someone else in the meantime
+            continue
+
+        refresh_device(db, table, sensor, pending.device_id, pending.since)
+        db.execute(
+            delete(EnergyPending).where(
+                EnergyPending.sensor == sensor,
+                EnergyPending.device_id == pending.device_id,
+                EnergyPending.revision == pending.revision,
+            )
+        )
+        db.commit()
+        refreshed += 1
+
+    return refreshed
+
+
+def clear_energy(db, sensor: str):
+    """Drop every cached total of a sensor, inside the caller's transaction."""
+    db.query(EnergyDaily).filter(EnergyDaily.sensor == sensor).delete()
+    db.query(EnergyPending).filter(EnergyPending.sensor == sensor).delete()
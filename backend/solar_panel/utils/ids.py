@@ -0,0 +1,19 @@
+import os
+import time
+import uuid
+
+####################
+# Row ids
+####################
+
+
+def uuid7() -> str:
+    """
+    A UUIDv7 (RFC 9562): 48 bits of Unix milliseconds followed by random bits,
+    so ids generated one after another land next to each other in the index.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10))
+
+    value = value & ~(0xF << 76) | 0x7 << 76  # version
+    value = value & ~(0x3 << 62) | 0x2 << 62  # variant
+    return str(uuid.UUID(int=value))
@@ -0,0 +1,99 @@
+import logging
+from typing import Literal, Optional
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+
+from solar_panel.env import SRC_LOG_LEVELS
+from solar_panel.utils.ids import uuid7
+from solar_panel.utils.readings import notify_inserted
+from solar_panel.utils.rollups import apply_rollups
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+class BulkItemStatus(BaseModel):
+    index: int
+    id: Optional[str] = None
+    status: Literal["created", "failed"]
+    detail: Optional[str] = None
+
+
+def bulk_insert(
+    db, table, rollups: list, rows: list[dict], indexes: Optional[list[int]] = None
+) -> list[BulkItemStatus]:
+    """
+    Insert rows with a single executemany inside the caller's transaction and
+    fold them into the rollups. If the batch is rejected, retry row by row in
+    savepoints so one bad reading does not drop the rest of the batch.
+    Statuses carry the rows' positions in the request, `indexes`, which
+    default to their positions in rows.
+    """
+    if not rows:
+        return []
+    if indexes is None:
+        indexes = list(range(len(rows)))
+
+    try:
+        with db.begin_nested():
+            db.execute(insert(table), rows)
+            apply_rollups(db, rollups, rows)
+        notify_inserted(db, table.__tablename__, rows)
+        return [
+            BulkItemStatus(index=index, id=row["id"], status="created")
+            for index, row in zip(indexes, rows)
+        ]
+    except Exception as e:
+        log.warning(
+            f"Bulk insert into {table.__tablename__} failed, retrying rows: {e}"
+        )
+
+    results = []
+    created = []
+    for index, row in zip(indexes, rows):
+        try:
+            with db.begin_nested():
+                db.execute(insert(table), [row])
+            created.append(row)
+            results.append(BulkItemStatus(index=index, id=row["id"], status="created"))
+        except Exception as e:
+            results.append(BulkItemStatus(index=index, status="failed", detail=str(e)))
+
+    apply_rollups(db, rollups, created)
+    notify_inserted(db, table.__tablename__, created)
+    return results
+
+
+def validation_detail(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'item'}: {error['msg']}"
+        for error in e.errors()
+    )
+
+
+def bulk_insert_items(
+    db, table, rollups: list, form_class: type[BaseModel], items: list
+) -> list[BulkItemStatus]:
+    """
+    Validate the raw items of a bulk request one by one and insert the valid
+    ones with bulk_insert. Invalid items get a failed status instead of
+    failing the whole request.
+    """
+    indexes, rows, failed = [], [], []
+    for index, item in enumerate(items):
+        try:
+            form = form_class.model_validate(item)
+        except ValidationError as e:
+            failed.append(
+                BulkItemStatus(
+                    index=index, status="failed", detail=validation_detail(e)
+                )
+            )
+            continue
+
+        indexes.append(index)
+        rows.append({**form.model_dump(exclude_none=True), "id": uuid7()})
+
+    results = bulk_insert(db, table, rollups, rows, indexes)
+    return sorted(results + failed, key=lambda result: result.index)
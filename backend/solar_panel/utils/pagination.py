@@ -0,0 +1,42 @@
+import uuid
+from typing import Optional
+
+####################
+# Keyset cursors
+####################
+
+
+# History endpoints page through rows ordered by (timestamp DESC, id DESC).
+# The cursor is the (timestamp, id) pair of the last row of the previous page,
+# serialized as "<timestamp>:<id>" so it can be passed back as a query param.
+
+
+def encode_cursor(timestamp: int, id: str) -> str:
+    return f"{timestamp}:{id}"
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[tuple[int, str]]:
+    if not cursor:
+        return None
+
+    timestamp, sep, id = cursor.partition(":")
+    if not sep or not id:
+        raise ValueError(f"Invalid cursor '{cursor}'")
+
+    return int(timestamp), str(uuid.UUID(id))
+
+
+def next_cursor(rows: list, limit: Optional[int]) -> Optional[str]:
+    # A short page means there is nothing left to fetch
+    if not limit or len(rows) < limit:
+        return None
+
+    last = rows[-1]
+    return encode_cursor(last.timestamp, last.id)
+
+
+def next_cursor_from_columns(columns: dict, limit: Optional[int]) -> Optional[str]:
+    if not limit or len(columns["timestamp"]) < limit:
+        return None
+
+    return encode_cursor(columns["timestamp"][-1], columns["id"][-1])
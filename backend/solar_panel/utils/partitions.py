@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import re
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from solar_panel.env import (
+    DATABASE_PARTITION_MONTHS_AHEAD,
+    DATABASE_SCHEMA,
+    SRC_LOG_LEVELS,
+)
+from solar_panel.internal.db import engine, get_db
+from solar_panel.utils.readings import notify_changed
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["DB"])
+
+####################
+# Monthly partitions
+####################
+
+
+# On PostgreSQL the sensor tables can be range-partitioned by month on
+# timestamp (see DATABASE_PARTITIONING). Each month lives in "<table>_pYYYYMM",
+# covering [first second of the month, first second of the next month) in UTC.
+# Anything outside the existing months lands in "<table>_default" until the
+# matching partition is created.
+
+SENSOR_TABLES = ["pzems", "ddsus", "shts"]
+
+# How often the app checks that upcoming months have partitions
+PARTITION_MAINTENANCE_INTERVAL = 24 * 60 * 60
+
+
+def month_start(timestamp: int) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table_name: str, month: datetime) -> str:
+    return f"{table_name}_p{month:%Y%m}"
+
+
+def qualified(name: str) -> str:
+    """Quoted table name for raw SQL, in DATABASE_SCHEMA when one is set."""
+    if DATABASE_SCHEMA:
+        return f'"{DATABASE_SCHEMA}"."{name}"'
+    return f'"{name}"'
+
+
+def is_partitioned(conn, table_name: str) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+
+    return conn.execute(
+        text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+            "WHERE partrelid = to_regclass(:table_name))"
+        ),
+        {"table_name": qualified(table_name)},
+    ).scalar()
+
+
+def get_partitions(conn, table_name: str) -> dict[str, datetime]:
+    """Monthly partitions of table_name, as {partition name: month start}."""
+    names = conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(:table_name)"
+        ),
+        {"table_name": qualified(table_name)},
+    ).scalars()
+
+    pattern = re.compile(rf"^{re.escape(table_name)}_p(\d{{4}})(\d{{2}})$")
+    partitions = {}
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            partitions[name] = datetime(
+                int(match[1]), int(match[2]), 1, tzinfo=timezone.utc
+            )
+    return partitions
+
+
+def create_partition(conn, table_name: str, month: datetime) -> str:
+    name = partition_name(table_name, month)
+    start = int(month.timestamp())
+    end = int(add_months(month, 1).timestamp())
+
+    # Rows for this month may already sit in the default partition, which would
+    # make a plain CREATE ... PARTITION OF fail. Build the table on its own, move
+    # those rows over, then attach it.
+    conn.execute(
+        text(
+            f"CREATE TABLE {qualified(name)} "
+            f"(LIKE {qualified(table_name)} INCLUDING DEFAULTS)"
+        )
+    )
+    conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {qualified(f'{table_name}_default')} "
+            f'WHERE "timestamp" >= :start AND "timestamp" < :end RETURNING *) '
+            f"INSERT INTO {qualified(name)} SELECT * FROM moved"
+        ),
+        {"start": start, "end": end},
+    )
+    conn.execute(
+        text(
+            f"ALTER TABLE {qualified(table_name)} ATTACH PARTITION {qualified(name)} "
+            f"FOR VALUES FROM ({start}) TO ({end})"
+        )
+    )
+    return name
+
+
+def ensure_partitions(conn, table_name: str, start: int, end: int) -> list[str]:
+    """Create the missing monthly partitions covering [start, end]."""
+    # Serialize concurrent workers creating the same months
+    conn.execute(
+        text("SELECT pg_advisory_xact_lock(hashtext(:table_name))"),
+        {"table_name": qualified(table_name)},
+    )
+    existing = set(get_partitions(conn, table_name).values())
+
+    created = []
+    month, last = month_start(start), month_start(end)
+    while month <= last:
+        if month not in existing:
+            created.append(create_partition(conn, table_name, month))
+        month = add_months(month, 1)
+    return created
+
+
+def drop_partitions(conn, table_name: str, before: int) -> list[str]:
+    """
+    Drop the monthly partitions that end at or before `before`. Detaching and
+    dropping a partition only touches the catalog, unlike a DELETE of its rows.
+    """
+    dropped = []
+    for name, month in sorted(get_partitions(conn, table_name).items()):
+        if add_months(month, 1).timestamp() > before:
+            continue
+
+        conn.execute(
+            text(
+                f"ALTER TABLE {qualified(table_name)} "
+                f"DETACH PARTITION {qualified(name)}"
+            )
+        )
+        conn.execute(text(f"DROP TABLE {qualified(name)}"))
+        dropped.append(name)
+    return dropped
+
+
+def create_future_partitions(
+    months_ahead: int = DATABASE_PARTITION_MONTHS_AHEAD,
+) -> dict[str, list[str]]:
+    now = int(time.time())
+    end = int(add_months(month_start(now), months_ahead).timestamp())
+
+    created = {}
+    with engine.begin() as conn:
+        for table_name in SENSOR_TABLES:
+            if is_partitioned(conn, table_name):
+                created[table_name] = ensure_partitions(conn, table_name, now, end)
+    return created
+
+
+def drop_old_partitions(before: int) -> dict[str, list[str]]:
+    dropped = {}
+    with get_db() as db:
+        conn = db.connection()
+        for table_name in SENSOR_TABLES:
+            if is_partitioned(conn, table_name):
+                dropped[table_name] = drop_partitions(conn, table_name, before)
+                if dropped[table_name]:
+                    # Raw DDL never goes through the ORM: bump the version (and
+                    # drop cached latest readings) in the same transaction
+                    notify_changed(db, table_name)
+        db.commit()
+    return dropped
+
+
+async def maintain_partitions():
+    """Background task keeping DATABASE_PARTITION_MONTHS_AHEAD months created."""
+    while True:
+        try:
+            created = await asyncio.to_thread(create_future_partitions)
+            for table_name, names in created.items():
+                if names:
+                    log.info(f"Created partitions of {table_name}: {names}")
+        except Exception as e:
+            log.exception(f"Partition maintenance failed: {e}")
+        await asyncio.sleep(PARTITION_MAINTENANCE_INTERVAL)
@@ -0,0 +1,70 @@
+import logging
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from solar_panel.env import SRC_LOG_LEVELS
+from solar_panel.models.versions import touch_version
+from solar_panel.utils.energy import mark_energy_stale
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+####################
+# Commit hooks
+####################
+
+# Write paths queue what they touched on the session; listeners only hear
+# about it once the transaction has actually committed. A listener is called
+# as fn(sensor, rows), where rows is the list of inserted row dicts or None
+# when existing readings were updated or deleted.
+#
+# Both also flag the cached energy totals as stale from the readings they
+# were given; notify_changed takes the (device_id, timestamp) of the rows as
+# they were before and after the change. Retention leaves it out, as expired
+# readings live on in the totals.
+
+READINGS_KEY = "committed_readings"
+
+_listeners: list[Callable[[str, Optional[list[dict]]], None]] = []
+
+
+def subscribe_readings(fn: Callable[[str, Optional[list[dict]]], None]):
+    _listeners.append(fn)
+    return fn
+
+
+def notify_inserted(db, sensor: str, rows: list[dict]):
+    if rows:
+        touch_version(db, sensor)
+        mark_energy_stale(db, sensor, rows)
+        db.info.setdefault(READINGS_KEY, []).append((sensor, rows))
+
+
+def notify_changed(db, sensor: str, rows: Optional[list[dict]] = None):
+    touch_version(db, sensor)
+    if rows:
+        mark_energy_stale(db, sensor, rows)
+    db.info.setdefault(READINGS_KEY, []).append((sensor, None))
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_readings(session):
+    if session.in_nested_transaction():
+        # Releasing a savepoint, the outer transaction may still roll back
+        return
+
+    for sensor, rows in session.info.pop(READINGS_KEY, []):
+        for listener in _listeners:
+            try:
+                listener(sensor, rows)
+            except Exception as e:
+                log.exception(f"Readings listener {listener} failed: {e}")
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_readings(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(READINGS_KEY, None)
@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import delete, func, select, tuple_
+
+from solar_panel.env import (
+    RETENTION_BATCH_SIZE,
+    RETENTION_DAILY_DAYS,
+    RETENTION_HOURLY_DAYS,
+    RETENTION_INTERVAL,
+    RETENTION_RAW_DAYS,
+    SRC_LOG_LEVELS,
+)
+from solar_panel.internal.db import get_db
+from solar_panel.models.ddsus import DDSU_ROLLUPS, Ddsu
+from solar_panel.models.pzems import PZEM_ROLLUPS, Pzem
+from solar_panel.models.shts import SHT_ROLLUPS, Sht
+from solar_panel.utils.partitions import (
+    add_months,
+    drop_partitions,
+    is_partitioned,
+    month_start,
+)
+from solar_panel.utils.readings import notify_changed
+from solar_panel.utils.rollups import DAILY_SECONDS, HOURLY_SECONDS, backfill_rollup
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["DB"])
+
+####################
+# Retention
+####################
+
+
+# Raw readings are expired one window at a time, oldest first. Each window is
+# aligned to the coarsest rollup bucket, and its rollups are completed from the
+# raw rows before any of them is deleted, so expiring raw data never loses the
+# hourly/daily history. Deletes run in short batches of RETENTION_BATCH_SIZE,
+# each in its own transaction.
+
+SENSOR_TABLES = {
+    "pzems": (Pzem, PZEM_ROLLUPS),
+    "ddsus": (Ddsu, DDSU_ROLLUPS),
+    "shts": (Sht, SHT_ROLLUPS),
+}
+
+DAY_SECONDS = 24 * 60 * 60
+
+
+def retention_cutoffs(
+    now: int,
+    raw_days: int = RETENTION_RAW_DAYS,
+    hourly_days: int = RETENTION_HOURLY_DAYS,
+    daily_days: int = RETENTION_DAILY_DAYS,
+) -> tuple[Optional[int], dict[int, Optional[int]]]:
+    """Timestamps before which each resolution expires, None to keep forever."""
+
+    def cutoff(days: int) -> Optional[int]:
+        return now - days * DAY_SECONDS if days > 0 else None
+
+    return cutoff(raw_days), {
+        HOURLY_SECONDS: cutoff(hourly_days),
+        DAILY_SECONDS: cutoff(daily_days),
+    }
+
+
+def downsample(db, table, rollups, start: int, end: int) -> int:
+    """
+    Complete the rollups of [start, end) from raw rows about to be removed.
+    Returns the number of raw rows in the window.
+    """
+    raw_count = (
+        db.query(func.count())
+        .select_from(table)
+        .filter(
+            table.device_id.isnot(None),
+            table.timestamp >= start,
+            table.timestamp < end,
+        )
+        .scalar()
+    )
+
+    for rollup in rollups:
+        rolled_up = (
+            db.query(func.coalesce(func.sum(rollup.count), 0))
+            .filter(rollup.timestamp >= start, rollup.timestamp < end)
+            .scalar()
+        )
+        # Fewer rows in the rollup than in the raw table means it missed some;
+        # more means a previous run already expired part of this window.
+        if rolled_up < raw_count:
+            backfill_rollup(db, table, rollup, start=start, end=end - 1)
+
+    return raw_count
+
+
+def delete_in_batches(db, table, key, conditions: list, batch_size: int) -> int:
+    deleted = 0
+    while True:
+        batch = select(*key).where(*conditions).limit(batch_size)
+        if len(key) == 1:
+            statement = delete(table).where(key[0].in_(batch))
+        else:
+            statement = delete(table).where(tuple_(*key).in_(batch))
+
+        count = db.execute(
+            statement.execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+
+def expire_raw(db, table, rollups, before: int, batch_size: int) -> int:
+    width = max(rollup.bucket_seconds for rollup in rollups)
+    before = before // width * width
+    partitioned = is_partitioned(db.connection(), table.__tablename__)
+
+    deleted = 0
+    while True:
+        first = (
+            db.query(func.min(table.timestamp))
+            .filter(table.timestamp < before)
+            .scalar()
+        )
+        if first is None:
+            return deleted
+
+        if partitioned:
+            month = month_start(first)
+            month_end = int(add_months(month, 1).timestamp())
+            if month_end <= before:
+                # A whole month has expired: downsample it, then drop its
+                # partition instead of deleting the rows
+                start = int(month.timestamp())
+                count = downsample(db, table, rollups, start, month_end)
+                dropped = drop_partitions(
+                    db.connection(), table.__tablename__, month_end
+                )
+                db.commit()
+                if dropped:
+                    deleted += count
+                    continue
+
+        start = first // width * width
+        end = min(start + width, before)
+        downsample(db, table, rollups, start, end)
+        db.commit()
+
+        deleted += delete_in_batches(
+            db,
+            table,
+            [table.id],
+            [table.timestamp >= start, table.timestamp < end],
+            batch_size,
+        )
+
+
+def expire_readings(
+    db,
+    table,
+    rollups,
+    raw_before: Optional[int],
+    rollup_before: dict[int, Optional[int]],
+    batch_size: int = RETENTION_BATCH_SIZE,
+) -> dict[str, int]:
+    """Apply retention to one sensor; returns the rows deleted per table."""
+    deleted = {}
+
+    if raw_before is not None:
+        deleted[table.__tablename__] = expire_raw(
+            db, table, rollups, raw_before, batch_size
+        )
+
+    for rollup in rollups:
+        before = rollup_before.get(rollup.bucket_seconds)
+        if before is not None:
+            deleted[rollup.__tablename__] = delete_in_batches(
+                db,
+                rollup,
+                [rollup.device_id, rollup.timestamp],
+                [rollup.timestamp < before],
+                batch_size,
+            )
+
+    return deleted
+
+
+def run_retention(
+    now: Optional[int] = None,
+    raw_days: int = RETENTION_RAW_DAYS,
+    hourly_days: int = RETENTION_HOURLY_DAYS,
+    daily_days: int = RETENTION_DAILY_DAYS,
+    batch_size: int = RETENTION_BATCH_SIZE,
+) -> dict[str, int]:
+    raw_before, rollup_before = retention_cutoffs(
+        now if now is not None else int(time.time()),
+        raw_days=raw_days,
+        hourly_days=hourly_days,
+        daily_days=daily_days,
+    )
+
+    deleted = {}
+    for sensor, (table, rollups) in SENSOR_TABLES.items():
+        with get_db() as db:
+            counts = expire_readings(
+                db, table, rollups, raw_before, rollup_before, batch_size
+            )
+            if counts.get(table.__tablename__):
+                # Cached latest readings may point at rows that are gone now
+                notify_changed(db, sensor)
+                db.commit()
+        deleted.update(counts)
+    return deleted
+
+
+async def maintain_retention():
+    """Background task applying the retention policy every RETENTION_INTERVAL."""
+    while True:
+        try:
+            deleted = await asyncio.to_thread(run_retention)
+            if any(deleted.values()):
+                log.info(f"Expired readings: {deleted}")
+        except Exception as e:
+            log.exception(f"Retention run failed: {e}")
+        await asyncio.sleep(RETENTION_INTERVAL)
@@ -0,0 +1,203 @@
+from typing import Optional
+
+from sqlalchemy import BigInteger, Column, Double, Integer, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from solar_panel.internal.db import Base
+from solar_panel.utils.aggregation import (
+    AGGREGATE_FUNCTIONS,
+    BUCKET_SECONDS,
+    Bucket,
+    bucket_ceiling,
+    bucket_expression,
+    bucket_floor,
+    format_aggregate_rows,
+)
+
+HOURLY_SECONDS = BUCKET_SECONDS[Bucket.HOUR]
+DAILY_SECONDS = BUCKET_SECONDS[Bucket.DAY]
+
+# Aggregates kept per metric; avg is derived from sum / count at query time
+ROLLUP_FUNCTIONS = ["sum", "min", "max"]
+
+
+def rollup_model(
+    class_name: str, table_name: str, metrics: list[str], bucket_seconds: int
+):
+    """
+    Declare a pre-aggregated table for a sensor: one row per (device_id,
+    bucket start) holding the row count and sum/min/max of every metric.
+    """
+    attrs = {
+        "__tablename__": table_name,
+        "device_id": Column(Integer, primary_key=True),
+        "timestamp": Column(BigInteger, primary_key=True),  # bucket start in epoch
+        "count": Column(BigInteger, nullable=False),
+        "metrics": metrics,
+        "bucket_seconds": bucket_seconds,
+    }
+    for metric in metrics:
+        for name in ROLLUP_FUNCTIONS:
+            attrs[f"{metric}_{name}"] = Column(Double)
+
+    return type(class_name, (Base,), attrs)
+
+
+def merge_rollup_values(rollup, rows: list[dict]) -> list[dict]:
+    """Fold raw readings into one partial aggregate per (device_id, bucket)."""
+    width = rollup.bucket_seconds
+    groups = {}
+
+    for row in rows:
+        key = (row["device_id"], row["timestamp"] // width * width)
+        group = groups.get(key)
+
+        if group is None:
+            group = {"device_id": key[0], "timestamp": key[1], "count": 0}
+            for metric in rollup.metrics:
+                value = row[metric]
+                group[f"{metric}_sum"] = 0.0
+                group[f"{metric}_min"] = value
+                group[f"{metric}_max"] = value
+            groups[key] = group
+
+        group["count"] += 1
+        for metric in rollup.metrics:
+            value = row[metric]
+            group[f"{metric}_sum"] += value
+            group[f"{metric}_min"] = min(group[f"{metric}_min"], value)
+            group[f"{metric}_max"] = max(group[f"{metric}_max"], value)
+
+    return list(groups.values())
+
+
+def apply_rollups(db, rollups: list, rows: list[dict]):
+    """
+    Upsert the contribution of freshly inserted raw rows into each rollup
+    table. Runs inside the caller's transaction so raw rows and rollups are
+    committed together.
+    """
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        insert_fn, least, greatest = postgresql.insert, func.least, func.greatest
+    else:
+        # SQLite's multi-argument min()/max() are scalar, like LEAST/GREATEST
+        insert_fn, least, greatest = sqlite.insert, func.min, func.max
+
+    for rollup in rollups:
+        table = rollup.__table__
+        stmt = insert_fn(table)
+
+        updates = {"count": table.c.count + stmt.excluded.count}
+        for metric in rollup.metrics:
+            updates[f"{metric}_sum"] = (
+                table.c[f"{metric}_sum"] + stmt.excluded[f"{metric}_sum"]
+            )
+            updates[f"{metric}_min"] = least(
+                table.c[f"{metric}_min"], stmt.excluded[f"{metric}_min"]
+            )
+            updates[f"{metric}_max"] = greatest(
+                table.c[f"{metric}_max"], stmt.excluded[f"{metric}_max"]
+            )
+
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["device_id", "timestamp"], set_=updates
+        )
+        db.execute(stmt, merge_rollup_values(rollup, rows))
+
+
+def backfill_rollup(
+    db, table, rollup, start: Optional[int] = None, end: Optional[int] = None
+) -> int:
+    """
+    Rebuild the rollup buckets overlapping [start, end] from the raw table.
+    Returns the number of buckets written.
+    """
+    width = rollup.bucket_seconds
+    bucket = (table.timestamp // width) * width
+
+    conditions = [table.device_id.isnot(None), table.timestamp.isnot(None)]
+    rollup_conditions = []
+    if start is not None:
+        start = start // width * width
+        conditions.append(table.timestamp >= start)
+        rollup_conditions.append(rollup.timestamp >= start)
+    if end is not None:
+        end = (end // width + 1) * width
+        conditions.append(table.timestamp < end)
+        rollup_conditions.append(rollup.timestamp < end)
+
+    columns = [table.device_id, bucket, func.count()]
+    names = ["device_id", "timestamp", "count"]
+    for metric in rollup.metrics:
+        for name in ROLLUP_FUNCTIONS:
+            columns.append(AGGREGATE_FUNCTIONS[name](getattr(table, metric)))
+            names.append(f"{metric}_{name}")
+
+    db.execute(delete(rollup).where(*rollup_conditions))
+    result = db.execute(
+        insert(rollup).from_select(
+            names,
+            select(*columns).where(*conditions).group_by(table.device_id, bucket),
+        )
+    )
+    return result.rowcount
+
+
+def pick_rollup(rollups: list, bucket: Bucket):
+    """Return the coarsest rollup whose buckets nest inside the requested bucket."""
+    candidates = [
+        rollup
+        for rollup in rollups
+        if bucket != Bucket.MINUTE
+        and (
+            bucket == Bucket.MONTH
+            or BUCKET_SECONDS[bucket] % rollup.bucket_seconds == 0
+        )
+    ]
+    return max(candidates, key=lambda r: r.bucket_seconds, default=None)
+
+
+def aggregate_rollup_rows(
+    db,
+    rollup,
+    bucket: Bucket,
+    device_id: Optional[int] = None,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+) -> list[dict]:
+    """
+    Same output as aggregate_rows, but re-grouped from a rollup table. The
+    start/end bounds select whole buckets, as in aggregate_rows.
+    """
+    bucket_column = bucket_expression(
+        rollup.timestamp, bucket, db.get_bind().dialect.name
+    ).label("bucket")
+    count = func.sum(rollup.count)
+
+    columns = [bucket_column, rollup.device_id, count.label("count")]
+    for metric in rollup.metrics:
+        total = func.sum(getattr(rollup, f"{metric}_sum"))
+        columns += [
+            (total / count).label(f"{metric}_avg"),
+            func.min(getattr(rollup, f"{metric}_min")).label(f"{metric}_min"),
+            func.max(getattr(rollup, f"{metric}_max")).label(f"{metric}_max"),
+            total.label(f"{metric}_sum"),
+        ]
+
+    query = db.query(*columns)
+    if device_id is not None:
+        query = query.filter(rollup.device_id == device_id)
+    if start is not None:
+        query = query.filter(rollup.timestamp >= bucket_floor(start, bucket))
+    if end is not None:
+        query = query.filter(rollup.timestamp < bucket_ceiling(end, bucket))
+
+    query = query.group_by(bucket_column, rollup.device_id).order_by(
+        bucket_column, rollup.device_id
+    )
+
+    return format_aggregate_rows(query.all(), rollup.metrics)
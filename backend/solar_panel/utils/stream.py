@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import threading
+from typing import Optional
+
+from solar_panel.env import SRC_LOG_LEVELS, STREAM_QUEUE_SIZE
+from solar_panel.utils.readings import subscribe_readings
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class ReadingsSubscription:
+    """
+    A bounded queue of readings for one stream client. When the client falls
+    behind, the oldest readings are dropped and counted rather than letting
+    the queue (or the publisher) grow without bound.
+    """
+
+    def __init__(
+        self,
+        sensors: Optional[set[str]] = None,
+        device_ids: Optional[set[int]] = None,
+        maxsize: int = STREAM_QUEUE_SIZE,
+    ):
+        self.sensors = sensors or None
+        self.device_ids = device_ids or None
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def matches(self, sensor: str, row: dict) -> bool:
+        if self.sensors is not None and sensor not in self.sensors:
+            return False
+        if self.device_ids is not None and row["device_id"] not in self.device_ids:
+            return False
+        return True
+
+    def put(self, message: dict):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def get(self) -> dict:
+        message = await self.queue.get()
+        if self.dropped:
+            # Let the client know it missed readings before handing it the next one
+            message = {**message, "dropped": self.dropped}
+            self.dropped = 0
+        return message
+
+
+class ReadingsBus:
+    """In-process fan-out of committed readings to live stream clients."""
+
+    def __init__(self):
+        self._subscriptions: set[ReadingsSubscription] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def subscribe(
+        self,
+        sensors: Optional[set[str]] = None,
+        device_ids: Optional[set[int]] = None,
+    ) -> ReadingsSubscription:
+        self._loop = asyncio.get_running_loop()
+        subscription = ReadingsSubscription(sensors, device_ids)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: ReadingsSubscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def _publish(self, sensor: str, rows: list[dict]):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+
+        for row in rows:
+            message = {"sensor": sensor, "data": row}
+            for subscription in subscriptions:
+                if subscription.matches(sensor, row):
+                    subscription.put(message)
+
+    def on_readings_committed(self, sensor: str, rows: Optional[list[dict]]):
+        if not rows or not self._subscriptions or self._loop is None:
+            return
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self._loop:
+            self._publish(sensor, rows)
+        else:
+            # Committed from a worker thread, hand over to the event loop
+            self._loop.call_soon_threadsafe(self._publish, sensor, rows)
+
+
+Bus = ReadingsBus()
+subscribe_readings(Bus.on_readings_committed)
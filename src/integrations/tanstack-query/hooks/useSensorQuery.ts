@@ -1,7 +1,12 @@
 import axios from "axios";
 import { useQuery } from "@tanstack/react-query";
 
-import type { DDSURecord, PZEMRecord, SHTRecord } from "@/types";
+import type {
+  DDSURecord,
+  EnergyYield,
+  PZEMRecord,
+  SHTRecord,
+} from "@/types";
 
 import { BASE_API_URL, SENSOR_AGGREGATION_INTERVAL_MS } from "@/lib/constants";
 
@@ -37,3 +42,16 @@ export const usePZEMHistory = () => {
     refetchInterval: SENSOR_AGGREGATION_INTERVAL_MS,
   });
 };
+
+export const usePZEMYield = () => {
+  return useQuery<EnergyYield>({
+    queryKey: ["yield", "pzem"],
+    queryFn: async () => {
+      const { data } = await axios.get(`${BASE_API_URL}/energy/yield`, {
+        params: { sensor: "pzems", bucket: "month" },
+      });
+      return data;
+    },
+    refetchInterval: SENSOR_AGGREGATION_INTERVAL_MS,
+  });
+};
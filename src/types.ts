@@ -69,3 +69,18 @@ export interface SHTRecord {
   humidity: number;
   timestamp: number;
 }
+
+export interface EnergyYieldRecord {
+  timestamp: number;
+  device_id: number;
+  energy: number;
+  count: number;
+  resets: number;
+}
+
+export interface EnergyYield {
+  sensor: "pzems" | "ddsus";
+  bucket: "minute" | "hour" | "day" | "month";
+  total: number;
+  yields: EnergyYieldRecord[];
+}